@@ -1,77 +0,0 @@
-# -*- coding: utf-8 -*-
-
-################################################################################
-## Form generated from reading UI file 'welcome.ui'
-##
-## Created by: Qt User Interface Compiler version 6.3.0
-##
-## WARNING! All changes made in this file will be lost when recompiling UI file!
-################################################################################
-
-from PySide6.QtCore import (QCoreApplication, QDate, QDateTime, QLocale,
-    QMetaObject, QObject, QPoint, QRect,
-    QSize, QTime, QUrl, Qt)
-from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
-    QFont, QFontDatabase, QGradient, QIcon,
-    QImage, QKeySequence, QLinearGradient, QPainter,
-    QPalette, QPixmap, QRadialGradient, QTransform)
-from PySide6.QtWidgets import (QApplication, QCheckBox, QHBoxLayout, QPushButton,
-    QSizePolicy, QSpacerItem, QVBoxLayout, QWidget)
-
-class Ui_Welcome(object):
-    def setupUi(self, Welcome):
-        if not Welcome.objectName():
-            Welcome.setObjectName(u"Welcome")
-        Welcome.resize(714, 452)
-        self.verticalLayout = QVBoxLayout(Welcome)
-        self.verticalLayout.setSpacing(6)
-        self.verticalLayout.setContentsMargins(11, 11, 11, 11)
-        self.verticalLayout.setObjectName(u"verticalLayout")
-        self.verticalLayout.setContentsMargins(0, 0, 0, 0)
-        self.verticalLayout_2 = QVBoxLayout()
-        self.verticalLayout_2.setSpacing(6)
-        self.verticalLayout_2.setObjectName(u"verticalLayout_2")
-        self.browserHost = QWidget(Welcome)
-        self.browserHost.setObjectName(u"browserHost")
-        self.browserHost.setStyleSheet(u"background-color:\n"
-"                                    rgb(243, 243, 243);\n"
-"                                ")
-
-        self.verticalLayout_2.addWidget(self.browserHost)
-
-
-        self.verticalLayout.addLayout(self.verticalLayout_2)
-
-        self.horizontalLayout = QHBoxLayout()
-        self.horizontalLayout.setSpacing(6)
-        self.horizontalLayout.setObjectName(u"horizontalLayout")
-        self.chDontShowAgain = QCheckBox(Welcome)
-        self.chDontShowAgain.setObjectName(u"chDontShowAgain")
-
-        self.horizontalLayout.addWidget(self.chDontShowAgain)
-
-        self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
-
-        self.horizontalLayout.addItem(self.horizontalSpacer)
-
-        self.btnClose = QPushButton(Welcome)
-        self.btnClose.setObjectName(u"btnClose")
-
-        self.horizontalLayout.addWidget(self.btnClose)
-
-
-        self.verticalLayout.addLayout(self.horizontalLayout)
-
-        self.verticalLayout.setStretch(0, 1)
-
-        self.retranslateUi(Welcome)
-
-        QMetaObject.connectSlotsByName(Welcome)
-    # setupUi
-
-    def retranslateUi(self, Welcome):
-        Welcome.setWindowTitle(QCoreApplication.translate("Welcome", u"Welcome", None))
-        self.chDontShowAgain.setText(QCoreApplication.translate("Welcome", u"Don't show again", None))
-        self.btnClose.setText(QCoreApplication.translate("Welcome", u"Close", None))
-    # retranslateUi
-
@@ -4,70 +4,112 @@ reimplemented by all subclasses."""
 from __future__ import annotations
 
 from abc import abstractmethod
+from enum import IntEnum
 import os
-import pickle
-from typing import NoReturn
+import time
+from typing import Callable, NoReturn, TYPE_CHECKING
 
-from PySide6.QtCore import QUrl
-from PySide6.QtGui import QAction, QDesktopServices, QKeyEvent, QMouseEvent
+from PySide6.QtCore import QByteArray, QEvent, QMetaObject, QObject, \
+  QTimer, QUrl, Signal
+from PySide6.QtGui import QAction, QCloseEvent, QDesktopServices, \
+  QKeyEvent, QMouseEvent, QShowEvent
 from PySide6.QtWidgets import QGridLayout, QMainWindow, QMessageBox, \
   QWidget
-from icecream import ic
 
+from bindings import Bindings, Field
+from dirtytracker import DirtyTracker
 from filedialogs import FileDialog
+from keymap import Binding, KeyDispatcher
 from menubars import MenuBar
 from mousefilter import ClickEvent
+from profiler import LatencyProfiler
+from recentfiles import RecentFiles
+from resources import AppResources
+from saver import Saver
+from settings import Settings
 from statusbar import StatusBar
+from tasks import Task, TaskRunner
+from themes import ThemeEngine
+from uicache import UiCache
 
-ic.configureOutput(includeContext=True)
+if TYPE_CHECKING:
+  from journal import Journal
+
+
+class Lifecycle(IntEnum):
+  """The stages of a window. The build phases run while BUILDING, after
+  which the window is BUILT. The window becomes SHOWN at its first show
+  event and remains so."""
+  CREATED = 0
+  BUILDING = 1
+  BUILT = 2
+  SHOWN = 3
 
 
 class BaseWindow(QMainWindow):
   """The reimplementation of QMainWindow"""
 
+  modelLoaded = Signal()
+
   @classmethod
   def fromUI(cls, uiFid, title=None):
-    """Creates the window based on a provided ui file"""
-    cmdString = 'pyside6-uic %s > _tempui.py' % (uiFid)
-    os.system(cmdString)
+    """Creates the window based on a provided ui file. The file is
+    compiled by uic only if the ui cache holds no module for its current
+    contents. In development mode, the window reloads the file whenever
+    it changes, see UiWatcher."""
     out = cls('QtYnotPy') if title is None else cls(title)
-    import _tempui
-    out.ui = _tempui.__dict__['Ui_%s' % (
-      os.path.basename(uiFid)[:-3].capitalize())]()
+    out.uiFid = uiFid
+    out.ui = UiCache.instance().load(uiFid)()
     if not out.ui:
       raise Exception('No main window found!')
     out.setupWidgets = out.loadUi
+    if out.profileTimer is not None:
+      LatencyProfiler.instance().instrument(out, ['setupWidgets'])
+    from uiwatcher import UiWatcher
+    if UiWatcher.enabled():
+      UiWatcher.instance().watch(out, uiFid)
     return out
 
   def __init__(self, title=None):
     title = 'QtYnotPy' if title is None else title
-    self._filters = ['JPEG image (*.jpg *.jpeg *.jpe)']
+    ThemeEngine.instance().install()
     QMainWindow.__init__(self)
-    self.clicker = ClickEvent(self)
-    self.timeLimit = 1
+    self.settings = Settings.instance()
+    self._filters = None
+    self._timeLimit = None
+    self.resources = AppResources.instance()
+    self.themes = ThemeEngine.instance()
+    self._clicker = None
+    self._keys = None
     self.setWindowTitle(title)
     #  Layouts
     self.baseWidget = QWidget(self)
     self.baseLayout = QGridLayout(self.baseWidget)
     self.setCentralWidget(self.baseWidget)
-    self.setGeometry(300, 300, 640, 480)
+    self.geometryKey = 'geometry/%s' % type(self).__name__
+    if self.geometryKey not in Settings.declarations:
+      Settings.declare(self.geometryKey, QByteArray, QByteArray())
+    if not self.restoreGeometry(self.settings[self.geometryKey]):
+      self.setGeometry(300, 300, 640, 480)
     self.ui = None
-    #  Dialogs
-    self.openFileDialog = FileDialog.loadFile(self)
-    self.loadDirDialog = FileDialog.loadDir(self)
-    self.saveFileDialog = FileDialog.saveFile(self)
-    #  Actions
-    self.saveAction = QAction()
-    self.saveAsAction = QAction()
-    self.newAction = QAction()
-    self.openAction = QAction()
-    self.propAction = QAction()
-    self.docAction = QAction()
-    self.aboutQtAction = QAction()
-    #  MenuBar
+    self.uiFid = None
+    self.uiWidget = None
+    self._lifecycle = Lifecycle.CREATED
+    self._actionSlots = {}
+    #  Dialogs, created from the shared pool when first called
+    self.openFileDialog = FileDialog.lazy(self, 'loadFile')
+    self.loadDirDialog = FileDialog.lazy(self, 'loadDir')
+    self.saveFileDialog = FileDialog.lazy(self, 'saveFile')
+    #  MenuBar, holding the shared menus and actions
     self.setMenuBar(MenuBar.Basic(self))
-    #  StatusBar
-    self.setStatusBar(StatusBar(self))
+    self.saveAction = self.resources.action('save')
+    self.saveAsAction = self.resources.action('saveAs')
+    self.newAction = self.resources.action('new')
+    self.openAction = self.resources.action('open')
+    self.propAction = self.resources.action('props')
+    self.docAction = self.resources.action('docs')
+    self.aboutQtAction = self.resources.action('aboutQt')
+    self.recentMenu = self.resources.menu('files').recentMenu
     #  Data
     self.dataFid = ''
     self._requireFileName = True
@@ -77,17 +119,61 @@ class BaseWindow(QMainWindow):
     self.data = {}
     self.getters = {}
     self.setters = {}
+    self.dirty = DirtyTracker(self)
+    self.bindings = Bindings(self)
+    self.saver = Saver(self)
+    self.document = None
+    self.journal = None
+    self._saveQuestion = None
+    self._commandPalette = None
+    self.inspector = None
+    self.tasks = TaskRunner(self)
     #  Other
     self.events = {}
     #  Status Bar
     self.stBar = StatusBar(self)
     self.setStatusBar(self.stBar)
+    self.dirty.countChanged.connect(self.stBar.showDirtyCount)
+    self.saver.started.connect(self.saveStarted)
+    self.saver.progress.connect(self.saveProgress)
+    self.saver.saved.connect(self.saveFinished)
+    self.saver.failed.connect(self.saveFailed)
+    self.settings.changed.connect(self.settingChanged)
+    self.tasks.busyChanged.connect(self.stBar.showBusy)
+    self.tasks.progress.connect(self.taskProgress)
+    self.tasks.failed.connect(self.taskFailed)
+    self.tasks.finished.connect(self.taskFinished)
+    #  Profiling
+    self.profileTimer = None
+    if LatencyProfiler.enabled():
+      self.enableProfiling()
+
+  def enableProfiling(self, interval=1000):
+    """Instruments the handlers of the window with the latency profiler
+    and shows its summary in the status bar every interval milliseconds.
+    Called when the window is created if profiling is enabled."""
+    profiler = LatencyProfiler.instance()
+    if self.profileTimer is None:
+      profiler.instrument(self)
+      self.profileTimer = QTimer(self)
+      self.profileTimer.timeout.connect(
+        lambda: self.stBar.showProfile(profiler.statusText()))
+    self.profileTimer.start(interval)
 
   def debug(self):
     """Happens every 100ms"""
     msg = 'Mouse waiting for %s'
     msg = msg % ('release' if self.clicker.active else 'press')
-    self.statusBar().showMessage(msg)
+    self.stBar.post('debug', msg)
+
+  @property
+  def lifecycle(self) -> Lifecycle:
+    """The current stage of the window"""
+    return self._lifecycle
+
+  @lifecycle.setter
+  def lifecycle(self, *_):
+    raise TypeError('lifecycle should not be set directly!')
 
   @property
   def requireFileName(self) -> bool:
@@ -129,66 +215,168 @@ class BaseWindow(QMainWindow):
     self._dataFilePath = value
 
   @property
-  def filters(self):
-    """The named filters used by file dialogs"""
+  def filters(self) -> list:
+    """The named filters used by file dialogs. Setting them changes this
+    window only, and None returns to the setting files/filters, which
+    holds the filters of every window."""
+    if self._filters is None:
+      return self.settings.values['files/filters']
     return self._filters
 
   @filters.setter
-  def filters(self, value):
-    self._filters = value
+  def filters(self, value: list):
+    self._filters = None if value is None else list(value)
 
-  def unsavedChanges(self):
+  @property
+  def timeLimit(self) -> float:
+    """Seconds within which a release counts as a click. Setting it
+    changes this window only, and None returns to the setting
+    mouse/timeLimit, which holds the time limit of every window."""
+    if self._timeLimit is None:
+      return self.settings.values['mouse/timeLimit']
+    return self._timeLimit
+
+  @timeLimit.setter
+  def timeLimit(self, value: float):
+    self._timeLimit = None if value is None else float(value)
+
+  def settingChanged(self, key: str, value: any):
+    """Called when a setting of the application changes. Settings are
+    read from memory each time they are used, so reimplement only to
+    react to a change right away."""
+
+  def bind(self, key: str, widget: QObject, prop=None, type_=None,
+           default=None) -> Field:
+    """Declares a field binding the key to the property of the widget.
+    The property defaults to the user property of the widget, such as
+    text for QLineEdit or value for QSpinBox. The data, getters and
+    setters of the key are filled in by the binding."""
+    return self.bindings.bind(key, widget, prop, type_, default)
+
+  def trackFields(self):
+    """Connects the widget behind each getter to the dirty tracker, such
+    that editing the widget marks its key as changed. This method is
+    called automatically when the window is built. Getters already
+    tracked are skipped."""
+    for (key, getter) in self.getters.items():
+      self.dirty.track(key, getter)
+
+  def unsavedChanges(self) -> bool:
     """The instance data variable contains the most recently saved data.
-    The save function first updates the contents of this variable,
-    and then saves the variable to the disk. Thus, any discrepancy between
-    the data variable and its sources indicates the presence of unsaved
-    changes. """
-    for (key, val) in self.data.items():
-      if self.accessAppData(key, 'get')() != val:
-        return True
-    return False
+    Widgets mark their key in the dirty tracker when changed, so unsaved
+    changes are present exactly when the tracker is not empty."""
+    return bool(self.dirty)
+
+  def changedKeys(self) -> set:
+    """The keys changed since the most recent save or load"""
+    return self.dirty.keys()
+
+  def enableJournal(self, interval=5000) -> Journal:
+    """Starts journaling the changes of the document every interval
+    milliseconds. The journal is emptied whenever the document is
+    saved."""
+    if self.journal is None:
+      from journal import Journal
+      self.journal = Journal(self, interval)
+      self.saver.saved.connect(self.journal.documentSaved)
+    self.journal.timer.setInterval(interval)
+    self.journal.start()
+    return self.journal
+
+  def submit(self, fn: Callable, *args, name=None, process=False,
+             **kwargs) -> Task:
+    """Runs fn with the arguments in the background and returns its task.
+    Connect to the signals of the task for the result. The progress of
+    the task is shown in the status bar, as is its error if it fails. See
+    the tasks module for cancellation and progress."""
+    return self.tasks.submit(fn, *args, name=name, process=process,
+                             **kwargs)
+
+  def taskProgress(self, task: Task, done: int, total: int):
+    """Shows the progress of the task in the status bar"""
+    self.stBar.post('task:%d' % id(task), progress=(done, total))
+
+  def taskFailed(self, task: Task, error: str):
+    """Reports the failure of the task in the status bar"""
+    self.stBar.post('tasks', '%s failed: %s' % (task.name, error),
+                    priority=1, timeout=5000)
+
+  def taskFinished(self, task: Task):
+    """Removes the progress of the task from the status bar"""
+    self.stBar.post('task:%d' % id(task), progress=False)
+
+  def dockInspector(self, row=None, column=0, rowSpan=1, columnSpan=-1):
+    """Shows the inspector of the data in the base layout, by default in
+    a new row below the existing widgets. The inspector is created on
+    first use. Returns the inspector."""
+    if self.inspector is None:
+      from inspector import Inspector
+      self.inspector = Inspector(self)
+    else:
+      self.baseLayout.removeWidget(self.inspector)
+    row = self.baseLayout.rowCount() if row is None else row
+    self.baseLayout.addWidget(self.inspector, row, column, rowSpan,
+                              columnSpan)
+    self.inspector.show()
+    return self.inspector
+
+  def askSaveChanges(self) -> bool:
+    """Asks the user whether to save the unsaved changes, if any, and
+    passes the answer to maybeSave. Returns False if the window should
+    keep its document. Called before the window closes and before a new
+    or another document replaces the current one. The question is
+    created when first asked."""
+    if not self.unsavedChanges():
+      return True
+    if self._saveQuestion is None:
+      from confirmdialog import Question
+      self._saveQuestion = Question.saveChanges()
+      self._saveQuestion.setParent(self, self._saveQuestion.windowFlags())
+    return self.maybeSave(
+      QMessageBox.StandardButton(self._saveQuestion.exec()))
 
   def maybeSave(self, btn: QMessageBox.StandardButton) -> bool:
-    """Opens a confirmation dialog if unsaved changes are present. If the
-    user accepts or if there are no saved changes present, returns True.
-    Otherwise, returns False"""
+    """Acts on the answer to the question for unsaved changes. Save saves
+    the document, Discard and Ignore drop the changes. Returns True if
+    there are no unsaved changes left or the user dropped them, and
+    False if the user cancelled or did not choose a file to save to."""
     if not self.unsavedChanges():
       return True
     if btn == QMessageBox.StandardButton.Save:
       self.saveFunc()
-    if btn == QMessageBox.StandardButton.Ignore:
-      return True
-    if btn == QMessageBox.StandardButton.Cancel:
-      return False
+      return not self.unsavedChanges()
+    return btn in (QMessageBox.StandardButton.Discard,
+                   QMessageBox.StandardButton.Ignore)
 
   def saveChangesToData(self):
-    """Updates the contents of the instance data variable as described by
-    the getter functions of accessAppData. Used by the save file
-    functions."""
-    for (key, val) in self.data.items():
+    """Updates the changed keys of the instance data variable from the
+    getter functions. Used by the save file functions."""
+    for key in self.dirty.keys():
       self.data[key] = self.getters[key]()
 
   def applyValuesFromData(self):
     """Sets the values in the application to the values currently in the
-    instance data variable. Used by the open function."""
-    for (key, val) in self.data.items():
-      self.data[key] = self.setters[key](val)
+    instance data variable as a single batch, after which modelLoaded is
+    emitted. Used by the open function."""
+    self.bindings.apply(self.data)
 
   def docFunc(self):
     """Opens documentation"""
     QDesktopServices.openUrl(QUrl.fromLocalFile('./README.md'))
 
   def propFunc(self):
-    """Opens properties window"""
-    QDesktopServices.openUrl(QUrl.fromLocalFile('./properties.txt'))
+    """Writes the settings and opens their file. Call reload on the
+    settings to apply changes made to the file."""
+    self.settings.sync()
+    QDesktopServices.openUrl(QUrl.fromLocalFile(self.settings.fileName()))
 
   def aboutQtFunc(self):
     """Opens properties window"""
     QMessageBox.aboutQt(self)
 
   def saveAsFunc(self):
-    """This method saves the data in the self.data dictionary to pickled
-    file on the disk."""
+    """This method lets the user choose the file to which the data in the
+    self.data dictionary is saved."""
     files = self.saveFileDialog()
     if files:
       self.dataFilePath = os.path.abspath(files)
@@ -198,33 +386,147 @@ class BaseWindow(QMainWindow):
 
   def newFunc(self):
     """This method creates a new instance. Checks for unsaved changes and
-    prompts user if necessary."""
+    prompts user if necessary. The data is replaced by the defaults of
+    the bound fields, and the next save asks for a file name."""
+    if not self.askSaveChanges():
+      return False
+    self.closeDocument()
+    self.data.clear()
+    self.data.update({key: field.default
+                      for (key, field) in self.bindings.fields.items()})
+    self.dataFilePath = None
+    self.requireFileName = True
+    self.applyValuesFromData()
+    return True
 
   def saveFunc(self):
     """This method actually saves the data on the disk. It is triggered by
-    either the saveAsFunc or by the save action. """
+    either the saveAsFunc or by the save action. The data is copied on
+    the GUI thread and written by the saver on a worker thread. The copy
+    of a save requested while another is running is held back until that
+    one finishes."""
     if not self.unsavedChanges():
       return
     if self.requireFileName:
       return self.saveAsFunc()
+    self.saver.save(self.dataFilePath, self.snapshotData)
+    return True
+
+  def snapshotData(self) -> tuple:
+    """Updates the data from the changed fields and returns a copy of it
+    for the saver, along with the changed keys. The saver passes the keys
+    back when the save has finished, such that they are marked again if
+    it fails. Keys of the opened document not read yet are passed as
+    sections of the document, which the saver copies from the file
+    without reading them. Windows cannot replace a file held open, so
+    there the keys are read and the document closed first."""
+    keys = self.dirty.keys()
+    if os.name == 'nt':
+      self.readDocument()
     self.saveChangesToData()
-    with open(self.dataFilePath, 'wb') as f:
-      pickle.dump(self.data, f)
-      return True
-
-  def openFunc(self):
+    self.dirty.clear()
+    data = dict(self.data)
+    if self.document is not None:
+      for key in self.document.keys():
+        if key not in data:
+          data[key] = self.document.section(key)
+    return data, keys
+
+  def saveStarted(self, fid: str):
+    """Reports the start of a save in the status bar"""
+    self.stBar.post('save', 'Saving %s' % os.path.basename(fid),
+                    progress=(0, 1))
+
+  def saveProgress(self, done: int, total: int):
+    """Reports the progress of a save in the status bar"""
+    self.stBar.post('save', progress=(done, total))
+
+  def saveFinished(self, fid: str, keys: set):
+    """Reports the completion of a save in the status bar and adds the
+    file to the recent files"""
+    RecentFiles.instance().add(fid)
+    self.stBar.post('save', 'Saved %s' % os.path.basename(fid),
+                    timeout=2000, progress=False)
+
+  def saveFailed(self, fid: str, error: str, keys: set):
+    """Marks the fields of the failed save as changed again and reports
+    the error in the status bar"""
+    for key in keys:
+      self.dirty.mark(key)
+    self.stBar.post('save', 'Failed to save %s: %s' % (
+      os.path.basename(fid), error), priority=1, timeout=10000,
+                    progress=False)
+
+  def openFunc(self, fid=None):
     """This method opens the disk allowing the user to select an
-    existing file which is then opened but applying its values on the
-    self.data variable"""
-    files = self.openFileDialog()
-    if files:
-      with open(self.dataFid, 'rb') as f:
-        self.data = pickle.load(f)
+    existing file which is then opened, replacing the self.data variable
+    by the defaults of the bound fields and the values of the file. Only
+    the keys with a setter are read when the file is opened. The other
+    keys stay in the file, kept open as self.document, from which saves
+    copy them and readDocument reads them. If fid is given, that file is opened
+    without the dialog, as when reopening a recent file. Files saved as
+    plain pickles by earlier versions are opened as well. Changes recorded
+    in the journal of the file are applied on top and remain marked as
+    unsaved. Unsaved changes of the current document are asked about
+    first. The file is added to the recent files."""
+    if not self.askSaveChanges():
+      return False
+    files = self.openFileDialog() if fid is None else fid
+    if not files:
+      return False
+    from document import Document
+    from journal import Journal
+    self.closeDocument()
+    document = Document.open(files)
+    try:
+      data = {key: field.default
+              for (key, field) in self.bindings.fields.items()}
+      data.update({key: document.read(key) for key in document.keys()
+                   if key in self.setters})
+      changes = Journal.replay(files)
+      data.update(changes)
+    except BaseException:
+      document.close()
+      raise
+    self.data.clear()
+    self.data.update(data)
+    if all(key in data for key in document.keys()):
+      document.close()
+    else:
+      self.document = document
+    self.dataFilePath = os.path.abspath(files)
+    self.requireFileName = False
+    self.applyValuesFromData()
+    for key in changes:
+      self.dirty.mark(key)
+    RecentFiles.instance().add(self.dataFilePath)
+    return True
+
+  def readDocument(self):
+    """Reads the keys of the opened document not read yet into the
+    instance data variable and closes the document. Saves copying from
+    the document are written first."""
+    self.saver.flush()
+    document, self.document = self.document, None
+    if document is not None:
+      with document:
+        for key in document.keys():
+          if key not in self.data:
+            self.data[key] = document.read(key)
+
+  def closeDocument(self):
+    """Writes the running and pending saves of the current document and
+    closes the opened document without reading its remaining keys. Called
+    before a new or another document replaces the current one."""
+    self.saver.flush()
+    document, self.document = self.document, None
+    if document is not None:
+      document.close()
 
   def selectDir(self):
     """The method opens the disk allowing the user to select an existing
     folder."""
-    files = self.openFileDialog = FileDialog.loadFile(self)
+    return self.loadDirDialog()
 
   def preSetup(self):
     """This function is triggered prior to the setupWidgets function. It
@@ -237,40 +539,198 @@ class BaseWindow(QMainWindow):
 
   def setupActions(self):
     """Connects actions to their relevant methods. This method is called
-    automatically as part of the show event. It should also be called
-    after changes are made to actions and menus."""
-    self.saveAction.triggered.connect(self.saveFunc)
-    self.saveAsAction.triggered.connect(self.saveAsFunc)
-    self.newAction.triggered.connect(self.newFunc)
-    self.openAction.triggered.connect(self.openFunc)
-    self.propAction.triggered.connect(self.docFunc)
-    self.docAction.triggered.connect(self.propFunc)
-    self.aboutQtAction.triggered.connect(self.aboutQtFunc)
-
-    for (key, val) in self.__dict__.items():
-      if isinstance(val, QAction):
-        val.setStatusTip(val.text())
-        val.setWhatsThis(val.text())
-        val.setToolTip(val.text())
-        val.setIconText(val.__str__())
+    automatically when the window is built. It should also be called
+    after changes are made to actions and menus. Connections already made
+    are not repeated."""
+    self.connectAction(self.saveAction, 'saveFunc')
+    self.connectAction(self.saveAsAction, 'saveAsFunc')
+    self.connectAction(self.newAction, 'newFunc')
+    self.connectAction(self.openAction, 'openFunc')
+    self.connectAction(self.propAction, 'propFunc')
+    self.connectAction(self.docAction, 'docFunc')
+    self.connectAction(self.aboutQtAction, 'aboutQtFunc')
+
+  def connectAction(self, action: QAction, name: str):
+    """Connects the triggered signal of the action to the named method of
+    the window. The method is looked up when the action triggers, so
+    methods replaced on the instance, such as by the profiler, are
+    respected. Connecting the same action and method again does
+    nothing. Shared actions are not connected, since the resources pass
+    them to the active window, which calls the method."""
+    if name in self._actionSlots.setdefault(action, set()):
+      return
+    self._actionSlots[action].add(name)
+    if not self.resources.owns(action):
+      action.triggered.connect(lambda *_: getattr(self, name)())
+
+  def triggerAction(self, action: QAction):
+    """Calls the methods connected to the shared action in this window.
+    Actions not connected in this window call the slot of their
+    command."""
+    names = self._actionSlots.get(action)
+    if names:
+      for name in list(names):
+        getattr(self, name)()
+      return
+    slot = self.resources.slot(action)
+    if callable(slot):
+      slot(self)
+    elif slot is not None and hasattr(self, slot):
+      getattr(self, slot)()
+
+  def showCommandPalette(self):
+    """Opens the command palette of the window, created on first use"""
+    if self._commandPalette is None:
+      from palette import CommandPalette
+      self._commandPalette = CommandPalette(self)
+    self._commandPalette.popup()
+
+  @property
+  def clicker(self) -> ClickEvent:
+    """The recognizer of the clicks on the window, created on first use"""
+    if self._clicker is None:
+      self._clicker = ClickEvent(self)
+    return self._clicker
+
+  def changeEvent(self, event: QEvent):
+    """Records the window as the receiver of the shared actions when it
+    becomes active"""
+    QMainWindow.changeEvent(self, event)
+    if event.type() == QEvent.Type.ActivationChange and \
+        self.isActiveWindow():
+      self.resources.activate(self)
 
   def loadUi(self):
     """This method replaces setupWidgets when window is created from a ui
-    file. If reimplemented, setupWidgets should point to this function."""
-    self.ui.setupUi(self)
+    file. If reimplemented, setupWidgets should point to this function.
+    The form is set up in a widget of its own placed in the base layout.
+    For a QMainWindow form, this is the central widget of the form."""
+    self.uiWidget = self.setupForm(self.ui)
+    self.baseLayout.addWidget(self.uiWidget, 0, 0)
+    QMetaObject.connectSlotsByName(self)
+
+  @staticmethod
+  def setupForm(ui) -> QWidget:
+    """Sets up the form of the Ui instance in a new widget"""
+    if getattr(ui, 'formClass', 'QWidget') == 'QMainWindow':
+      host = QMainWindow()
+      ui.setupUi(host)
+      out = host.takeCentralWidget()
+      host.deleteLater()
+      return out
+    out = QWidget()
+    ui.setupUi(out)
+    return out
+
+  def reloadUi(self) -> bool:
+    """Rebuilds the form from the current contents of the ui file of the
+    window, replacing only the widget of the form. The data is kept:
+    fields bound to widgets of the form are bound to the widgets of the
+    same names in the new form, which are loaded from the data, and
+    unsaved edits are carried over. The module of the replaced form is
+    released from the ui cache. Returns False if the file could not be
+    loaded, in which case the window is unchanged."""
+    if self.uiFid is None or self.uiWidget is None:
+      return False
+    start = time.perf_counter()
+    try:
+      uiClass = UiCache.instance().load(self.uiFid)
+      if isinstance(self.ui, uiClass):
+        return True
+      ui = uiClass()
+      new = self.setupForm(ui)
+    except Exception as e:
+      self.stBar.post('ui', 'Reloading %s failed: %s' % (
+        os.path.basename(self.uiFid), str(e).strip().splitlines()[0]),
+                      priority=1, timeout=5000)
+      return False
+    edits = {key: self.getters[key]() for key in self.dirty.keys()}
+    UiCache.instance().release(type(self.ui))
+    old, self.ui, self.uiWidget = self.uiWidget, ui, new
+    updates = self.updatesEnabled()
+    self.setUpdatesEnabled(False)
+    try:
+      self.baseLayout.replaceWidget(old, new)
+      self.bindings.rebind(old, new)
+      old.hide()
+      old.deleteLater()
+      QMetaObject.connectSlotsByName(self)
+      self.uiReloaded()
+      self.bindings.apply(self.data)
+      for (key, val) in edits.items():
+        if key in self.setters:
+          self.setters[key](val)
+    finally:
+      self.setUpdatesEnabled(updates)
+    self.stBar.post('ui', 'Reloaded %s in %.0f ms' % (
+      os.path.basename(self.uiFid), 1000 * (time.perf_counter() - start)),
+                    priority=1, timeout=3000)
+    return True
+
+  def uiReloaded(self):
+    """This function is triggered by reloadUi once the new form is in
+    place, before the data is loaded into it. Subclasses may reimplement
+    it to set up the widgets of the form again. It is empty by default."""
+    pass
 
   def postSetup(self):
     """This function is triggered after the setupWidgets function. It
     is empty by default, and subclasses may reimplement it."""
     pass
 
-  def showEvent(self, *event):
-    """The showEvent runs preSetup, setupWidgets and postSetup in that
-    order."""
-    self.preSetup()
-    self.setupWidgets()
-    self.setupActions()
-    self.postSetup()
+  def build(self):
+    """Runs preSetup, setupWidgets, trackFields, setupActions and
+    postSetup in that order. The phases run once only, and later calls
+    do nothing. The show event builds the window if not already built."""
+    if self._lifecycle != Lifecycle.CREATED:
+      return
+    self._lifecycle = Lifecycle.BUILDING
+    try:
+      self.preSetup()
+      self.setupWidgets()
+      self.trackFields()
+      self.setupActions()
+      self.postSetup()
+    except BaseException:
+      self._lifecycle = Lifecycle.CREATED
+      raise
+    self._lifecycle = Lifecycle.BUILT
+
+  def firstShow(self):
+    """This function is triggered by the first show event, after the
+    window is built. It is empty by default, and subclasses may
+    reimplement it."""
+    pass
+
+  def reShow(self):
+    """This function is triggered by every later show event, such as when
+    the window is restored after being minimized or hidden. It should be
+    cheap. It is empty by default, and subclasses may reimplement it."""
+    pass
+
+  def showEvent(self, event: QShowEvent):
+    """The showEvent builds the window on the first show, then runs
+    firstShow. Later show events run only reShow."""
+    QMainWindow.showEvent(self, event)
+    if self._lifecycle == Lifecycle.SHOWN:
+      return self.reShow()
+    self.build()
+    self._lifecycle = Lifecycle.SHOWN
+    self.resources.activate(self)
+    self.firstShow()
+
+  def closeEvent(self, event: QCloseEvent):
+    """Asks about unsaved changes first, and cancelling keeps the window
+    open. Waits for running and pending saves before the window closes,
+    closes the opened document and remembers the geometry of the window.
+    Running tasks are cancelled and waited for."""
+    if not self.askSaveChanges():
+      event.ignore()
+      return
+    self.tasks.shutdown()
+    self.closeDocument()
+    self.settings[self.geometryKey] = self.saveGeometry()
+    QMainWindow.closeEvent(self, event)
 
   def mousePressEvent(self, event: QMouseEvent):
     """The event functions include a filter on their events, greatly
@@ -283,11 +743,14 @@ class BaseWindow(QMainWindow):
     self.clicker(event)
 
   def mouseReleaseEvent(self, event: QMouseEvent) -> NoReturn:
-    """If timer has not run out, triggers"""
-    if not self.clicker.active:
-      return
+    """If timer has not run out, the click event triggers singleClick. A
+    release ending a drag triggers dragRelease instead."""
+    self.clicker(event)
+
+  def mouseMoveEvent(self, event: QMouseEvent) -> NoReturn:
+    """Moving the mouse with a button held beyond the drag distance
+    triggers dragMove."""
     self.clicker(event)
-    self.singleClick(self.clicker)
 
   def singleClick(self, e: ClickEvent) -> NoReturn:
     """This function should be reimplemented by subclasses as needed. """
@@ -296,12 +759,43 @@ class BaseWindow(QMainWindow):
     """This function should be reimplemented by subclasses as needed. """
     pass
 
+  def longPress(self, e: ClickEvent) -> NoReturn:
+    """Triggered once a button is held in place for longPressTime seconds
+    of the click event. This function should be reimplemented by
+    subclasses as needed. """
+
+  def dragMove(self, e: ClickEvent) -> NoReturn:
+    """Triggered by each move of a drag. The click event holds the press
+    position in xPress and yPress and the current position in x and y.
+    This function should be reimplemented by subclasses as needed. """
+
+  def dragRelease(self, e: ClickEvent) -> NoReturn:
+    """Triggered by the release ending a drag. This function should be
+    reimplemented by subclasses as needed. """
+
   def mouseDoubleClickEvent(self, event: QMouseEvent) -> NoReturn:
     """The event functions include a filter on their events, greatly
     simplifying their use. """
     self.clicker(event)
-    self.doubleClick(self.clicker)
 
   def keyPressEvent(self, event: QKeyEvent) -> NoReturn:
     """The event functions include a filter on their events, greatly
-    simplifying their use. """
+    simplifying their use. Key presses go to the key dispatcher, which
+    calls the methods bound to the keys with bindKey or in the global
+    keymap. Keys not bound are passed on to QMainWindow."""
+    if not self.keys.dispatch(event):
+      QMainWindow.keyPressEvent(self, event)
+
+  @property
+  def keys(self) -> KeyDispatcher:
+    """The key dispatcher of the window, created on first use"""
+    if self._keys is None:
+      self._keys = KeyDispatcher(self)
+    return self._keys
+
+  def bindKey(self, keys: str, slot: Callable | str, name=None) -> Binding:
+    """Binds the keys, such as 'Ctrl+K, Ctrl+D', to the named method of
+    the window or to a callable taking the window. Bindings of the window
+    take precedence over those of the global keymap. Raises ValueError if
+    a shortcut of the window takes any of the key presses."""
+    return self.keys.bind(keys, slot, name)
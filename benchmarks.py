@@ -0,0 +1,1269 @@
+"""The benchmarks measure the performance of the framework. Run them
+without a display by setting QT_QPA_PLATFORM=offscreen, for example:
+QT_QPA_PLATFORM=offscreen python benchmarks.py fromUI
+Each benchmark returns a dictionary of measurements in seconds unless the
+name of the measurement says otherwise. With --json the results are
+written to a file, and with --baseline they are compared with the file
+written by an earlier run."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+from PySide6.QtWidgets import QApplication
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+os.environ.setdefault('QTYNOTPY_SETTINGS', os.path.join(
+  tempfile.gettempdir(), 'qtynotpy-benchmarks.ini'))
+
+benchmarks = {}
+
+
+def benchmark(func):
+  """Registers the decorated function as a benchmark"""
+  benchmarks[func.__name__[5].lower() + func.__name__[6:]] = func
+  return func
+
+
+def _rss() -> int:
+  """The current resident set size of the process in bytes"""
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except OSError:
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _timed(func, *args, **kwargs) -> float:
+  """Returns the time spent by func"""
+  start = time.perf_counter()
+  func(*args, **kwargs)
+  return time.perf_counter() - start
+
+
+@benchmark
+def benchFromUI(uiFid=None, repeat=5) -> dict:
+  """Times BaseWindow.fromUI with an empty ui cache, with the compiled
+  module on disk only as on a later start of the application, and with
+  the module already imported."""
+  from basewindow import BaseWindow
+  from uicache import UiCache
+  uiFid = os.path.join(_here, 'uis', 'Welcome.ui') if uiFid is None \
+    else uiFid
+  cache = UiCache.instance()
+  cold, warm, hot = [], [], []
+  for _ in range(repeat):
+    cache.clear()
+    cold.append(_timed(BaseWindow.fromUI, uiFid))
+    cache.clear(memoryOnly=True)
+    warm.append(_timed(BaseWindow.fromUI, uiFid))
+    hot.append(_timed(BaseWindow.fromUI, uiFid))
+  return {'cold': min(cold), 'warm': min(warm), 'hot': min(hot)}
+
+
+_menuBarScript = """
+import json, sys, time
+sys.path.insert(0, %r)
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from basewindow import BaseWindow
+from icons import IconRegistry
+registry = IconRegistry.instance()
+windows = []
+start = time.perf_counter()
+windows.append(BaseWindow())
+first = time.perf_counter() - start
+stats = [registry.stats]
+later = []
+for _ in range(int(sys.argv[1])):
+  start = time.perf_counter()
+  windows.append(BaseWindow())
+  later.append(time.perf_counter() - start)
+stats.append(registry.stats)
+print(json.dumps({'first': first, 'later': min(later), 'stats': stats}))
+"""
+
+
+@benchmark
+def benchMenuBar(windows=20) -> dict:
+  """Creates the first window with its menu bar in a new process, which
+  decodes the icons of the shared actions, and then the given number of
+  further windows. Reports the time of the first window with the count
+  and time of its icon decodes and registry misses, and the fastest of
+  the further windows with the decodes, misses and hits they added. The
+  further windows share the actions of the first and with them its
+  icons, so they are expected to neither decode nor look up any icon."""
+  env = dict(os.environ)
+  env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+  result = subprocess.run(
+    [sys.executable, '-c', _menuBarScript % _here, str(windows)],
+    capture_output=True, text=True, env=env, check=True, timeout=120)
+  run = json.loads(result.stdout.splitlines()[-1])
+  first, last = run['stats']
+  return {'first': run['first'], 'firstDecoded': first['decoded'],
+          'firstDecodeTime': first['decodeTime'],
+          'firstMisses': first['misses'], 'later': run['later'],
+          'laterDecoded': last['decoded'] - first['decoded'],
+          'laterMisses': last['misses'] - first['misses'],
+          'laterHits': last['hits'] - first['hits']}
+
+
+@benchmark
+def benchWindows(count=50) -> dict:
+  """Times the construction of BaseWindows and reports the growth of the
+  resident set size per window. The construction of the sample MainWindow
+  is timed as well."""
+  from basewindow import BaseWindow
+  from mainwindow import MainWindow
+  BaseWindow()
+  windows = []
+  rss = _rss()
+  start = time.perf_counter()
+  for _ in range(count):
+    windows.append(BaseWindow())
+  elapsed = time.perf_counter() - start
+  rssPerWindow = (_rss() - rss) // count
+  start = time.perf_counter()
+  for _ in range(count):
+    windows.append(MainWindow())
+  return {'perWindow': elapsed / count,
+          'perMainWindow': (time.perf_counter() - start) / count,
+          'rssPerWindowBytes': rssPerWindow}
+
+
+@benchmark
+def benchManyWindows(counts=(1, 10, 50, 100)) -> dict:
+  """Creates and builds growing numbers of MainWindows, as when one window
+  is open per document. Reports the construction time, the number of
+  QObjects created per window and the growth of the resident set size
+  per window, at each count. QObjects are counted by their Python
+  wrappers, which includes parentless menus and actions."""
+  import gc
+  from PySide6.QtCore import QObject
+
+  def objects() -> int:
+    """The number of live QObjects created from Python"""
+    gc.collect()
+    return sum(1 for obj in gc.get_objects() if isinstance(obj, QObject))
+
+  from mainwindow import MainWindow
+  app = QApplication.instance()
+  MainWindow().build()
+  out = {}
+  for count in counts:
+    windows = []
+    before = objects()
+    rss = _rss()
+    start = time.perf_counter()
+    for _ in range(count):
+      window = MainWindow()
+      window.build()
+      windows.append(window)
+    elapsed = time.perf_counter() - start
+    out['perWindow%d' % count] = elapsed / count
+    out['rssPerWindowBytes%d' % count] = (_rss() - rss) // count
+    out['objectsPerWindow%d' % count] = (objects() - before) // count
+    for window in windows:
+      window.deleteLater()
+    app.processEvents()
+  return out
+
+
+def _boundWindow(count: int):
+  """Creates a BaseWindow with count line edits bound to its data"""
+  from PySide6.QtWidgets import QLineEdit
+  from basewindow import BaseWindow
+  main = BaseWindow()
+  main.fields = []
+  for i in range(count):
+    key = 'field%05d' % i
+    lineEdit = QLineEdit(main.baseWidget)
+    main.fields.append(lineEdit)
+    main.data[key] = ''
+    main.getters[key] = lineEdit.text
+    main.setters[key] = lineEdit.setText
+  main.trackFields()
+  return main
+
+
+@benchmark
+def benchUnsavedChanges(counts=(10, 100, 1000, 10000)) -> dict:
+  """Times unsavedChanges and changedKeys on windows with a growing
+  number of bound fields, one of which has been edited."""
+  out = {}
+  for count in counts:
+    main = _boundWindow(count)
+    main.fields[-1].setText('edited')
+    out['unsaved%d' % count] = min(
+      _timed(main.unsavedChanges) for _ in range(100))
+    out['changedKeys%d' % count] = min(
+      _timed(main.changedKeys) for _ in range(100))
+  return out
+
+
+@benchmark
+def benchApplyValues(count=500) -> dict:
+  """Times loading values into a window with count bound line edits,
+  setting them one by one against applying them as one batch."""
+  from PySide6.QtWidgets import QLineEdit
+  app = QApplication.instance()
+  main = _boundWindow(0)
+  for i in range(count):
+    lineEdit = QLineEdit(main.baseWidget)
+    main.baseLayout.addWidget(lineEdit, i // 10, i % 10)
+    main.bind('field%05d' % i, lineEdit, 'text', str, '')
+  main.show()
+  app.processEvents()
+
+  def load(batch: bool, text: str):
+    """Loads the text into every field and paints the window"""
+    for key in main.data:
+      main.data[key] = text
+    if batch:
+      main.applyValuesFromData()
+    else:
+      for (key, val) in main.data.items():
+        main.setters[key](val)
+        app.processEvents()
+    app.processEvents()
+
+  out = {'oneByOne': _timed(load, False, 'a'),
+         'batched': _timed(load, True, 'b')}
+  main.close()
+  return out
+
+
+_openScript = """
+import json, pickle, resource, sys, time
+sys.path.insert(0, %r)
+from document import Document
+method, fid = sys.argv[1:3]
+start = time.perf_counter()
+if method == 'pickle':
+  with open(fid, 'rb') as f:
+    data = pickle.load(f)
+  title = data['title']
+else:
+  doc = Document.open(fid)
+  title = doc.read('title')
+  if method == 'documentAll':
+    data = doc.readAll()
+elapsed = time.perf_counter() - start
+try:
+  with open('/proc/self/status') as f:
+    peak = [int(line.split()[1]) * 1024 for line in f
+            if line.startswith('VmHWM')][0]
+except OSError:
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({'time': elapsed, 'peakRss': peak}))
+"""
+
+
+_arrayScript = """
+import json, pickle, sys, time
+sys.path.insert(0, %r)
+import numpy
+from document import Document
+
+def rss(field):
+  with open('/proc/self/status') as f:
+    return [int(line.split()[1]) * 1024 for line in f
+            if line.startswith(field)][0]
+
+method, action, fid, count, size = sys.argv[1:6]
+count, size = int(count), int(size)
+if action == 'save':
+  data = {'array%%d' %% i: numpy.random.random(size // 8)
+          for i in range(int(count))}
+base = rss('VmRSS')
+start = time.perf_counter()
+if action == 'save' and method == 'pickle':
+  with open(fid, 'wb') as f:
+    pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+elif action == 'save':
+  Document.write(fid, data)
+elif method == 'pickle':
+  with open(fid, 'rb') as f:
+    data = pickle.load(f)
+else:
+  data = Document.load(fid)
+total = float(sum(val[::4096].sum() for val in data.values()))
+elapsed = time.perf_counter() - start
+print(json.dumps({'time': elapsed, 'peakRss': rss('VmHWM') - base,
+                  'anonRss': rss('RssAnon')}))
+"""
+
+
+def _childOpen(method: str, fid: str) -> dict:
+  """Opens the file in a separate interpreter, such that the peak
+  resident set size belongs to the opening alone. The peak is read from
+  VmHWM where available, since ru_maxrss survives exec on Linux."""
+  result = subprocess.run(
+    [sys.executable, '-c', _openScript % _here, method, fid],
+    capture_output=True, check=True)
+  return json.loads(result.stdout)
+
+
+@benchmark
+def benchOpenDocument(sizes=(10 << 20, 100 << 20, 1 << 30)) -> dict:
+  """Compares opening a document in the sectioned format against a plain
+  pickle of the same data. The data holds a small title and a blob of the
+  given size. 'document' reads the title only, as when showing the
+  document, while 'documentAll' reads every key."""
+  from document import Document
+  out = {}
+  with tempfile.TemporaryDirectory() as tempDir:
+    for size in sizes:
+      data = {'title': 'benchmark', 'blob': os.urandom(size)}
+      pickleFid = os.path.join(tempDir, 'data.pkl')
+      documentFid = os.path.join(tempDir, 'data.doc')
+      with open(pickleFid, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+      Document.write(documentFid, data)
+      del data
+      label = '%dMB' % (size >> 20)
+      for (method, fid) in [('pickle', pickleFid),
+                            ('document', documentFid),
+                            ('documentAll', documentFid)]:
+        for (key, val) in _childOpen(method, fid).items():
+          out['%s.%s.%s' % (method, label, key)] = val
+  return out
+
+
+@benchmark
+def benchJournal(counts=(100, 10000), blob=50 << 20) -> dict:
+  """Times a journal flush after one edit on documents with a growing
+  number of fields and a large blob, against saving the whole
+  document."""
+  from document import Document
+  out = {}
+  with tempfile.TemporaryDirectory() as tempDir:
+    for count in counts:
+      main = _boundWindow(count)
+      main.data['blob'] = os.urandom(blob)
+      main.dataFilePath = os.path.join(tempDir, 'journal%d.doc' % count)
+      main.requireFileName = False
+      journal = main.enableJournal()
+      journal.stop()
+      main.fields[0].setText('edited')
+      out['flush%d' % count] = _timed(journal.flushChanges)
+      out['save%d' % count] = _timed(
+        Document.write, main.dataFilePath, main.data)
+  return out
+
+
+@benchmark
+def benchArrayDocument(count=4, size=100 << 20) -> dict:
+  """Compares saving and loading a document of count NumPy arrays of the
+  given size in bytes as a plain pickle and as a document with
+  out-of-band buffers. Each step runs in its own interpreter, and
+  peakRss is the growth of the peak resident set size during the step,
+  including clean pages of the mapped file. anonRss is the private memory
+  of the interpreter after the step. The loaded arrays are touched
+  sparsely, as when browsing."""
+  out = {}
+  with tempfile.TemporaryDirectory() as tempDir:
+    for method in ['pickle', 'document']:
+      fid = os.path.join(tempDir, 'arrays.%s' % method)
+      for action in ['save', 'load']:
+        result = subprocess.run(
+          [sys.executable, '-c', _arrayScript % _here, method, action, fid,
+           str(count), str(size)], capture_output=True, check=True)
+        for (key, val) in json.loads(result.stdout).items():
+          out['%s.%s.%s' % (method, action, key)] = val
+  return out
+
+
+@benchmark
+def benchShowCycles(cycles=100) -> dict:
+  """Hides and shows a MainWindow repeatedly. Reports the latency of the
+  first and later shows and the number of widgets in the base layout
+  afterwards. Raises RuntimeError if the cycles connect any action again
+  or if triggering the save action does not call saveFunc exactly
+  once."""
+  from PySide6.QtCore import SIGNAL
+  from mainwindow import MainWindow
+  app = QApplication.instance()
+  main = MainWindow()
+
+  def show():
+    """Shows the window and processes the show event"""
+    main.show()
+    app.processEvents()
+
+  def receivers() -> dict:
+    """The number of receivers of the triggered signal of each action"""
+    return {action: action.receivers(SIGNAL('triggered(bool)'))
+            for action in main._actionSlots}
+
+  first = _timed(show)
+  connected = receivers()
+  widgets = main.baseLayout.count()
+  later = []
+  for _ in range(cycles):
+    main.hide()
+    app.processEvents()
+    later.append(_timed(show))
+  if receivers() != connected or main.baseLayout.count() != widgets:
+    raise RuntimeError('Showing the window again connected actions or '
+                       'added widgets!')
+  calls = []
+  main.saveFunc = lambda: calls.append(None)
+  main.saveAction.trigger()
+  if len(calls) != 1:
+    raise RuntimeError('Triggering save called saveFunc %d times!' % len(
+      calls))
+  out = {'firstShow': first, 'reShow': sum(later) / cycles,
+         'saveCalls': len(calls), 'layoutWidgets': main.baseLayout.count()}
+  main.close()
+  return out
+
+
+@benchmark
+def benchSaveOpen(sizes=(1 << 10, 1 << 20, 100 << 20)) -> dict:
+  """Times saveFunc until the document is on the disk and openFunc on a
+  MainWindow whose data holds a blob of each size next to its bound line
+  edit. The file dialog of openFunc is replaced by the saved file. Then
+  times the part of saveFunc on the GUI thread after an edit of the
+  opened document, whose blob is copied by the saver unread."""
+  from mainwindow import MainWindow
+  out = {}
+  with tempfile.TemporaryDirectory() as tempDir:
+    for size in sizes:
+      fid = os.path.join(tempDir, 'saveOpen%d.doc' % size)
+      main = MainWindow()
+      main.data['blob'] = os.urandom(size)
+      main.dataFilePath = fid
+      main.requireFileName = False
+      main.lineEdit.setText('edited')
+
+      def save():
+        """Saves the window and waits for the file"""
+        main.saveFunc()
+        main.saver.waitForDone()
+
+      out['save%d' % size] = _timed(save)
+      QApplication.instance().processEvents()
+      main.close()
+      main = MainWindow()
+      main.openFileDialog = lambda: fid
+      out['open%d' % size] = _timed(main.openFunc)
+      main.lineEdit.setText('edited again')
+      out['resave%d' % size] = _timed(main.saveFunc)
+      main.saver.waitForDone()
+      QApplication.instance().processEvents()
+      main.close()
+  return out
+
+
+@benchmark
+def benchSettings(count=100000) -> dict:
+  """Times reading a setting through the timeLimit property of a window
+  and through the settings, and changing a setting count times in a
+  burst, reporting the number of writes to the file the burst caused."""
+  from basewindow import BaseWindow
+  from settings import Settings
+  app = QApplication.instance()
+  main = BaseWindow()
+  settings = Settings.instance()
+  settings.sync()
+  writes = settings.writes
+  read = _timed(lambda: [main.timeLimit for _ in range(count)])
+  lookup = _timed(lambda: [settings['mouse/timeLimit']
+                           for _ in range(count)])
+  change = _timed(lambda: [settings.set('mouse/timeLimit', 1 + i % 2)
+                           for i in range(count)])
+  deadline = time.monotonic() + settings.writeDelay / 1000 + 1
+  while settings.writes == writes and time.monotonic() < deadline:
+    app.processEvents()
+  writes = settings.writes - writes
+  settings.reset('mouse/timeLimit')
+  settings.sync()
+  return {'timeLimit': read / count, 'lookup': lookup / count,
+          'set': change / count, 'burstWrites': writes}
+
+
+@benchmark
+def benchRecentFiles(count=10, size=10 << 20) -> dict:
+  """Fills the recent files with count documents of the given size and
+  times revalidating them, populating the Recent menu from scratch and,
+  for comparison, loading a single one of the documents."""
+  from document import Document
+  from menu import RecentMenu
+  from recentfiles import RecentFiles
+  from mainwindow import MainWindow
+  recent = RecentFiles.instance()
+  entries = recent.entries
+  main = MainWindow()
+  menu = RecentMenu(main)
+  with tempfile.TemporaryDirectory() as tempDir:
+    for i in range(count):
+      fid = os.path.join(tempDir, 'recent%d.doc' % i)
+      Document.write(fid, {'title': 'Recent %d' % i,
+                           'blob': os.urandom(size)})
+      recent.add(fid)
+
+    def populate():
+      """Builds the entries of the menu again"""
+      menu.generation = None
+      menu.populate()
+
+    out = {'validate': min(_timed(recent.validate) for _ in range(10)),
+           'populate': min(_timed(populate) for _ in range(10)),
+           'load': _timed(Document.load, fid)}
+  recent.entries = entries
+  recent.store()
+  return out
+
+
+@benchmark
+def benchInspector(sizes=(10000, 100000, 1000000), pages=20) -> dict:
+  """Docks the data inspector into MainWindows holding a growing number
+  of keys. Times docking and showing, scrolling a page, and filtering the
+  keys until the first matches show and until the filter is done. Reports
+  the growth of the resident set size caused by the inspector."""
+  from mainwindow import MainWindow
+  app = QApplication.instance()
+  out = {}
+  for size in sizes:
+    main = MainWindow()
+    main.data.update({'key%07d' % i: list(range(i % 50))
+                      for i in range(size)})
+    main.show()
+    app.processEvents()
+    rss = _rss()
+    inspector = None
+
+    def dock():
+      """Docks the inspector and paints the window"""
+      nonlocal inspector
+      inspector = main.dockInspector()
+      app.processEvents()
+
+    out['dock%d' % size] = _timed(dock)
+    bar = inspector.view.verticalScrollBar()
+
+    def scroll():
+      """Scrolls down by pages and paints each"""
+      for _ in range(pages):
+        bar.setValue(bar.value() + bar.pageStep())
+        app.processEvents()
+
+    out['scrollPage%d' % size] = _timed(scroll) / pages
+    model = inspector.model
+    start = time.perf_counter()
+    model.setFilter('7')
+    while not model.keys and not model.done:
+      app.processEvents()
+    out['filterFirst%d' % size] = time.perf_counter() - start
+    while not model.done:
+      app.processEvents()
+    out['filterDone%d' % size] = time.perf_counter() - start
+    out['rssBytes%d' % size] = _rss() - rss
+    main.close()
+    main.deleteLater()
+    app.processEvents()
+  return out
+
+
+def _spin(n: int) -> int:
+  """Keeps a processor busy, holding the interpreter lock"""
+  return sum(i * i for i in range(n))
+
+
+@benchmark
+def benchTasks(count=1000, work=3000000) -> dict:
+  """Times submitting empty tasks until their results arrive, and the
+  longest gap between ticks of a 10 ms timer while a CPU bound function
+  runs inline on the GUI thread, as a thread task and as a process
+  task."""
+  from PySide6.QtCore import QTimer
+  from mainwindow import MainWindow
+  app = QApplication.instance()
+  main = MainWindow()
+  results = []
+  start = time.perf_counter()
+  for i in range(count):
+    main.submit(int, i).result.connect(results.append)
+  submitted = time.perf_counter() - start
+  while len(results) < count:
+    app.processEvents()
+  out = {'submit': submitted / count,
+         'roundTrip': (time.perf_counter() - start) / count}
+  ticks = []
+  timer = QTimer()
+  timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+  main.submit(_spin, 1, process=True).wait(10)
+
+  def gap(run) -> float:
+    """The longest gap between ticks while run is running. Run returns
+    the task it submits, if any."""
+    timer.start(10)
+    ticks[:] = [time.perf_counter()]
+    task = run()
+    while task is not None and not task.done:
+      app.processEvents()
+    app.processEvents()
+    timer.stop()
+    return max(b - a for (a, b) in zip(ticks, ticks[1:]))
+
+  def inline():
+    """Runs the function on the GUI thread"""
+    _spin(work)
+
+  out['gapInline'] = gap(inline)
+  out['gapThread'] = gap(lambda: main.submit(_spin, work))
+  out['gapProcess'] = gap(lambda: main.submit(_spin, work, process=True))
+  main.close()
+  return out
+
+
+@benchmark
+def benchThemes(count=500, windows=20) -> dict:
+  """Times creating and polishing count status bars styled by a
+  stylesheet of their own and by the class palette of the theme, and
+  switching between two themes with the given number of windows shown,
+  compared with setting the palettes of the themes on each window."""
+  from PySide6.QtWidgets import QStatusBar, QWidget
+  from mainwindow import MainWindow
+  from themes import ThemeEngine
+  app = QApplication.instance()
+  engine = ThemeEngine.instance()
+  engine.install()
+  engine._compiled.clear()
+  out = {'compile': _timed(engine.compile, 'classic'),
+         'compileCached': _timed(engine.compile, 'classic')}
+  sheet = 'QStatusBar { background: rgb(63, 63, 63); color: white; }'
+
+  def build(own: bool):
+    """Creates the status bars and polishes them"""
+    parent = QWidget()
+    for _ in range(count):
+      bar = QStatusBar(parent)
+      if own:
+        bar.setStyleSheet(sheet)
+      bar.ensurePolished()
+    parent.deleteLater()
+
+  engine.apply('light')
+  out['buildPerWidget'] = _timed(build, True) / count
+  engine.apply('classic')
+  out['buildTheme'] = _timed(build, False) / count
+  app.processEvents()
+  mains = [MainWindow() for _ in range(windows)]
+  for main in mains:
+    main.show()
+  app.processEvents()
+
+  def switch(name: str):
+    """Applies the theme and processes the resulting events"""
+    engine.apply(name)
+    app.processEvents()
+
+  out['switchTheme'] = (_timed(switch, 'dark') +
+                        _timed(switch, 'classic')) / 2
+  engine.apply('light')
+  app.processEvents()
+
+  def restyle(name: str):
+    """Sets the palettes of the theme on each window"""
+    palette, classes, _ = engine.compile(name)
+    for main in mains:
+      main.setPalette(palette)
+      main.stBar.setPalette(classes['QStatusBar'])
+    app.processEvents()
+
+  out['switchPerWindow'] = (_timed(restyle, 'dark') +
+                            _timed(restyle, 'classic')) / 2
+  for main in mains:
+    main.close()
+  engine.apply('classic')
+  return out
+
+
+@benchmark
+def benchCommandPalette(counts=(1000, 5000, 20000), limit=50) -> dict:
+  """Registers growing numbers of commands of made up words, as plugins
+  would, and times registering a command, the slowest of a set of
+  searches of the registry and filling the command palette."""
+  import random
+  from mainwindow import MainWindow
+  app = QApplication.instance()
+  main = MainWindow()
+  main.show()
+  app.processEvents()
+  resources = main.resources
+  rng = random.Random(0)
+  syllables = ['ba', 'co', 'de', 'fi', 'gu', 'ha', 'ki', 'lo', 'me', 'nu',
+               'pa', 're', 'si', 'to', 'va', 'xe', 'ran', 'tor', 'ple', 'ing']
+  vocabulary = [''.join(rng.choice(syllables) for _ in range(rng.randint(
+    2, 4))) for _ in range(500)]
+  queries = ['s', 'sa', 'save', 'open file', 'doc', 'ing', 'dera', 'xyz',
+             'pal com', 'documntation'] + rng.sample(vocabulary, 10)
+  out = {}
+  registered = []
+  for count in counts:
+    before = len(registered)
+    start = time.perf_counter()
+    for i in range(before, count):
+      id_ = 'plugin%d.%s' % (i % 50, i)
+      resources.register(id_, ' '.join(rng.sample(vocabulary, 3)),
+                         category='Plugin %d' % (i % 50), slot='newFunc')
+      registered.append(id_)
+    out['register%d' % count] = (time.perf_counter() - start) / \
+      (count - before)
+    out['search%d' % count] = max(
+      min(_timed(resources.index.search, query, limit) for _ in range(5))
+      for query in queries)
+    main.showCommandPalette()
+    palette = main._commandPalette
+    out['palette%d' % count] = max(
+      _timed(palette.search, query) for query in queries)
+    palette.hide()
+  for id_ in registered:
+    resources.unregister(id_)
+  main.close()
+  return out
+
+
+@benchmark
+def benchKeyDispatch(count=1000, presses=100000) -> dict:
+  """Binds count keys and chords not taken by shortcuts to a window and
+  times compiling the keymap and dispatching key presses, against a chain
+  of comparisons over the same keys as in an if/elif keyPressEvent.
+  Reports the memory still allocated after the presses as well."""
+  import tracemalloc
+  from PySide6.QtCore import QEvent, QKeyCombination
+  from PySide6.QtGui import QKeyEvent
+  from basewindow import BaseWindow
+  from keymap import parse
+  main = BaseWindow()
+  keys = main.keys
+  taken = {shortcut[0] for (shortcut, _) in keys.shortcuts()}
+  letters = [chr(c) for c in range(ord('A'), ord('Z') + 1)]
+  firsts = [first for first in ['Ctrl+' + c for c in letters] +
+            ['Ctrl+Shift+' + c for c in letters]
+            if parse(first)[0] not in taken]
+  seconds = [second for second in letters + ['Ctrl+' + c for c in letters]
+             if parse(second)[0] not in taken]
+  bindings = [keys.bind('Alt+' + c, 'update') for c in letters]
+  for i in range(count - len(bindings)):
+    bindings.append(keys.bind('%s, %s' % (
+      firsts[i % len(firsts)], seconds[i // len(firsts) % len(seconds)]),
+                              'update'))
+  out = {'compile': _timed(keys.compile)}
+  chain = [binding.sequence[0] for binding in bindings]
+  events = []
+  for binding in bindings[-4:] + bindings[:4]:
+    for code in binding.sequence:
+      combination = QKeyCombination.fromCombined(code)
+      events.append(QKeyEvent(QEvent.Type.KeyPress, combination.key(),
+                              combination.keyboardModifiers()))
+  rounds = presses // len(events)
+
+  def ifChain(event: QKeyEvent) -> bool:
+    """Compares the key press with the first key of each binding in
+    turn"""
+    code = event.key() | event.modifiers().value
+    for first in chain:
+      if code == first:
+        return True
+    return False
+
+  def run(func):
+    """Passes the key presses of the events in turn"""
+    for _ in range(rounds):
+      for event in events:
+        func(event)
+
+  out['ifChain'] = _timed(run, ifChain) / (rounds * len(events))
+  out['dispatch'] = _timed(run, keys.dispatch) / (rounds * len(events))
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  run(keys.dispatch)
+  out['retainedBytes'] = tracemalloc.get_traced_memory()[0] - before
+  tracemalloc.stop()
+  out['dispatched'] = keys.dispatched
+  return out
+
+
+def _formSource(rows: int, title: str) -> str:
+  """A .ui form of a QWidget holding rows labels and line edits"""
+  items = ''.join('''
+   <item row="%d" column="0">
+    <widget class="QLabel" name="label%d">
+     <property name="text"><string>%s %d</string></property>
+    </widget>
+   </item>
+   <item row="%d" column="1">
+    <widget class="QLineEdit" name="edit%d"/>
+   </item>''' % (i, i, title, i, i, i) for i in range(rows))
+  return '''<?xml version="1.0" encoding="UTF-8"?>
+<ui version="4.0">
+ <class>Form</class>
+ <widget class="QWidget" name="Form">
+  <layout class="QGridLayout" name="gridLayout">%s
+  </layout>
+ </widget>
+ <resources/>
+ <connections/>
+</ui>
+''' % items
+
+
+_formScript = """
+import sys, time
+sys.path.insert(0, %r)
+from PySide6.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from basewindow import BaseWindow
+main = BaseWindow.fromUI(sys.argv[1])
+main.show()
+app.processEvents()
+print('shown', flush=True)
+"""
+
+
+@benchmark
+def benchUiReload(rows=60, repeat=3) -> dict:
+  """Creates a window from a form of rows labels and line edits bound to
+  the data and times reloading the form after an edit, with uic compiling
+  the new contents and with the new contents compiled beforehand, and
+  from saving the file to the reload through the watcher. Reports the
+  modules and compiled files of the form left after the reloads, which
+  release the replaced forms. For comparison, the time to start a new
+  process showing the same window is reported as restart."""
+  from basewindow import BaseWindow
+  from uicache import UiCache
+  from uiwatcher import UiWatcher
+  app = QApplication.instance()
+  out = {}
+  with tempfile.TemporaryDirectory() as tempDir:
+    uiFid = os.path.join(tempDir, 'form.ui')
+    with open(uiFid, 'w') as f:
+      f.write(_formSource(rows, 'Field'))
+    main = BaseWindow.fromUI(uiFid)
+    main.show()
+    app.processEvents()
+    for i in range(rows):
+      main.bind('edit%d' % i, getattr(main.ui, 'edit%d' % i), 'text', str,
+                '')
+      main.data['edit%d' % i] = 'value %d' % i
+    main.applyValuesFromData()
+    cache = UiCache.instance()
+    compiled, cached = [], []
+    modules = len(sys.modules)
+    files = len(os.listdir(cache.cacheDir))
+    for i in range(repeat):
+      with open(uiFid, 'w') as f:
+        f.write(_formSource(rows, 'Field %s %d' % (time.time(), i)))
+      compiled.append(_timed(main.reloadUi))
+      source = _formSource(rows, 'Cached %s %d' % (time.time(), i))
+      with open(uiFid, 'w') as f:
+        f.write(source)
+      cache.compile(uiFid, cache.modulePath(uiFid, source.encode()))
+      cached.append(_timed(main.reloadUi))
+    out['reloadCompiled'] = min(compiled)
+    out['reloadCached'] = min(cached)
+    out['dataKept'] = int(main.ui.edit7.text() == 'value 7')
+    out['modulesAdded'] = len(sys.modules) - modules
+    out['filesAdded'] = len(os.listdir(cache.cacheDir)) - files
+    watcher = UiWatcher.instance()
+    watcher.watch(main, uiFid)
+    reloads = watcher.reloads
+    start = time.perf_counter()
+    with open(uiFid, 'w') as f:
+      f.write(_formSource(rows, 'Field %s' % time.time()))
+    while watcher.reloads == reloads and time.perf_counter() - start < 10:
+      app.processEvents()
+    out['watched'] = time.perf_counter() - start
+    watcher.unwatch(main)
+    main.close()
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    restarts = []
+    for _ in range(repeat):
+      start = time.perf_counter()
+      subprocess.run([sys.executable, '-c', _formScript % _here, uiFid],
+                     capture_output=True, env=env, check=True, timeout=60)
+      restarts.append(time.perf_counter() - start)
+    out['restart'] = min(restarts)
+  return out
+
+
+def _scanEnumId(enum: int, grp: any) -> any:
+  """The linear scan used by enumId before the reverse index"""
+  for (key, val) in grp.__dict__.items():
+    if val and key != 'values':
+      try:
+        if enum == val.__hash__():
+          return val
+      except Exception:
+        pass
+
+
+@benchmark
+def benchEnumId(count=100000) -> dict:
+  """Times decoding an integer into a QMessageBox.StandardButton with the
+  former linear scan, with enumId, and per integer when decoding count
+  integers at once with enumIds. Also times splitting a combination of
+  flags with enumFlags."""
+  from PySide6.QtWidgets import QMessageBox
+  from enumtype import enumFlags, enumId, enumIds
+  grp = QMessageBox.StandardButton
+  value = grp.Abort.value
+  values = [member.value for member in grp] * (count // len(grp))
+
+  def perCall(func, *args, repeat=10000) -> float:
+    """The time of a single call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+      func(*args)
+    return (time.perf_counter() - start) / repeat
+
+  return {'scan': perCall(_scanEnumId, value, grp, repeat=1000),
+          'enumId': perCall(enumId, value, grp),
+          'enumIdsPerValue': _timed(enumIds, values, grp) / len(values),
+          'enumFlags': perCall(enumFlags, value | grp.Save.value, grp)}
+
+
+@benchmark
+def benchGestures(count=100000) -> dict:
+  """Feeds press, move and release events to a ClickEvent. Reports the
+  time per event and the number of memory blocks still allocated by the
+  recognizer afterwards, which should not grow with the number of
+  events."""
+  import tracemalloc
+  from PySide6.QtCore import QEvent, QPointF, Qt
+  from PySide6.QtGui import QMouseEvent
+  from basewindow import BaseWindow
+  main = BaseWindow()
+  left, none = Qt.MouseButton.LeftButton, Qt.MouseButton.NoButton
+  modifiers = Qt.KeyboardModifier.NoModifier
+  point = QPointF(10, 10)
+  far = QPointF(60, 10)
+  events = [
+    QMouseEvent(QEvent.Type.MouseButtonPress, point, point, left, left,
+                modifiers),
+    QMouseEvent(QEvent.Type.MouseMove, far, far, none, left, modifiers),
+    QMouseEvent(QEvent.Type.MouseButtonRelease, far, far, left, none,
+                modifiers),
+  ]
+  clicker = main.clicker
+  for event in events * 100:
+    clicker(event)
+  start = time.perf_counter()
+  for _ in range(count // len(events)):
+    for event in events:
+      clicker(event)
+  elapsed = time.perf_counter() - start
+  tracemalloc.start()
+  before = tracemalloc.take_snapshot()
+  for _ in range(count // len(events) // 10):
+    for event in events:
+      clicker(event)
+  after = tracemalloc.take_snapshot()
+  tracemalloc.stop()
+  growth = sum(stat.count_diff for stat in after.compare_to(
+    before, 'filename') if stat.traceback[0].filename.endswith(
+    'mousefilter.py'))
+  return {'perEvent': elapsed / count, 'retainedBlocks': growth}
+
+
+@benchmark
+def benchProfiler(count=100000) -> dict:
+  """Times recording a latency and the overhead a profiled handler adds
+  to a call."""
+  from PySide6.QtCore import QEvent
+  from profiler import LatencyProfiler
+  profiler = LatencyProfiler()
+  eventType = QEvent.Type.MouseMove
+
+  def handler():
+    """An empty handler"""
+
+  timed = profiler.wrap('handler', handler)
+  record = _timed(lambda: [profiler.recordEvent(eventType, 1500)
+                           for _ in range(count)])
+  plain = _timed(lambda: [handler() for _ in range(count)])
+  wrapped = _timed(lambda: [timed() for _ in range(count)])
+  return {'recordEvent': record / count,
+          'handlerOverhead': (wrapped - plain) / count}
+
+
+@benchmark
+def benchStatusChannel(count=100000) -> dict:
+  """Posts messages from a worker thread as fast as possible and counts
+  how often the status bar is actually updated."""
+  import threading
+  from PySide6.QtWidgets import QMainWindow
+  from statusbar import StatusBar
+  app = QApplication.instance() or QApplication([])
+  window = QMainWindow()
+  bar = StatusBar(window)
+  window.setStatusBar(bar)
+  shown = []
+  bar.messageChanged.connect(shown.append)
+
+  def worker():
+    """Posts count messages with progress"""
+    for i in range(count):
+      bar.post('worker', 'message %d' % i, progress=(i, count))
+    bar.post('worker', 'done', progress=False)
+
+  thread = threading.Thread(target=worker)
+  start = time.perf_counter()
+  thread.start()
+  while thread.is_alive():
+    app.processEvents()
+  elapsed = time.perf_counter() - start
+  thread.join()
+  deadline = time.monotonic() + 1
+  while bar.currentMessage() != 'done' and time.monotonic() < deadline:
+    app.processEvents()
+  out = {'post': elapsed / count,
+         'updates': len(shown),
+         'updatesPerSecond': len(shown) / elapsed,
+         'last': bar.currentMessage(),
+         'progressVisible': bar.progressBar.isVisibleTo(window)}
+  window.deleteLater()
+  return out
+
+
+_startupFid = os.path.join(_here, 'startup.json')
+
+
+def _importTimes(stderr: str) -> tuple:
+  """Parses the output of python -X importtime into the total import time
+  and the cumulative time of each module imported by main.py itself.
+  Modules imported before site belong to the start of the interpreter."""
+  total = 0
+  direct = {}
+  started = False
+  for line in stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    own, cumulative, name = line[12:].split('|')
+    total += int(own)
+    if name.startswith('  '):
+      continue
+    if started:
+      direct[name.strip()] = int(cumulative) * 1e-6
+    started = started or name.strip() == 'site'
+  return total * 1e-6, direct
+
+
+@benchmark
+def benchStartup(repeat=5, record=False) -> dict:
+  """Starts main.py with python -X importtime until its window is first
+  painted and reports the medians of the total import time, the time to
+  first paint from starting the interpreter, and the import time of each
+  module imported by main.py. The results are compared with startup.json,
+  where record stores them as the new reference:
+  python -c "import benchmarks; benchmarks.benchStartup(record=True)"
+  """
+  env = dict(os.environ, QTYNOTPY_STARTUP='1')
+  env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+  runs = []
+  for _ in range(repeat + 1):
+    start = time.time()
+    result = subprocess.run(
+      [sys.executable, '-X', 'importtime', os.path.join(_here, 'main.py')],
+      capture_output=True, text=True, env=env, cwd=_here, check=True,
+      timeout=60)
+    paint = [float(line.split()[1]) for line in result.stdout.splitlines()
+             if line.startswith('firstPaint')]
+    if not paint:
+      raise RuntimeError('main.py reported no paint: %s' % result.stderr)
+    runs.append((paint[0] - start,) + _importTimes(result.stderr))
+  runs = runs[1:]
+
+  def median(values: list) -> float:
+    """The median of the values"""
+    return sorted(values)[len(values) // 2]
+
+  out = {'firstPaint': median([run[0] for run in runs]),
+         'imports': median([run[1] for run in runs])}
+  for name in runs[0][2]:
+    out['import:%s' % name] = median([run[2].get(name, 0) for run in runs])
+  reference = {}
+  if os.path.exists(_startupFid):
+    with open(_startupFid) as f:
+      reference = json.load(f)
+  for key in ('firstPaint', 'imports'):
+    if key in reference:
+      out['%sChange' % key] = out[key] / reference[key] - 1
+  if record:
+    with open(_startupFid, 'w') as f:
+      json.dump({key: val for (key, val) in out.items()
+                 if not key.endswith('Change')}, f, indent=2, sort_keys=True)
+      f.write('\n')
+  return out
+
+
+def _isTime(key: str, val: any) -> bool:
+  """Flag indicating that the measurement is a time in seconds. Times are
+  the floats whose names do not give another unit."""
+  return isinstance(val, float) and not key.endswith(('PerSecond',
+                                                      'Change'))
+
+
+def best(runs: any) -> dict:
+  """Combines the measurements of several runs of a benchmark, keeping
+  the fastest of each time and the last value of other measurements"""
+  out = {}
+  for measurements in runs:
+    for (key, val) in measurements.items():
+      if _isTime(key, val) and key in out:
+        val = min(val, out[key])
+      out[key] = val
+  return out
+
+
+# The times of first uses, such as the first window of a process or the
+# first show of a window, and of starting processes depend on the state of
+# the machine more than on the code. They are reported but not gated.
+ungated = {
+  'fromUI': ('cold', 'warm', 'hot'),
+  'menuBar': ('first', 'firstDecodeTime'),
+  'showCycles': ('firstShow',),
+  'uiReload': ('watched', 'restart'),
+}
+
+# Times including writes synced to the disk vary with the disk by
+# milliseconds, and their benchmarks are gated with a larger floor.
+floors = {'arrayDocument': 5e-3, 'journal': 5e-3, 'saveOpen': 5e-3}
+
+
+def _gated(results: dict, baseline: dict) -> list:
+  """The benchmark, measurement, baseline and result of each gated time
+  present in both"""
+  out = []
+  for (name, measurements) in results.items():
+    for (key, val) in measurements.items():
+      reference = baseline.get(name, {}).get(key)
+      if _isTime(key, val) and isinstance(reference, float) and \
+          key not in ungated.get(name, ()):
+        out.append((name, key, reference, val))
+  return out
+
+
+def drift(results: dict, baseline: dict, minBenchmarks=5) -> float:
+  """The factor by which the machine as a whole ran slower than when the
+  baseline was written, taken as the median over the benchmarks of the
+  median ratio of their gated times. Runs of fewer than minBenchmarks
+  benchmarks give 1, since a single benchmark slower throughout would
+  otherwise hide its own regression."""
+  ratios = {}
+  for (name, _, reference, val) in _gated(results, baseline):
+    if reference > 0 and val > 0:
+      ratios.setdefault(name, []).append(val / reference)
+  if len(ratios) < minBenchmarks:
+    return 1.
+  medians = sorted(sorted(values)[len(values) // 2]
+                   for values in ratios.values())
+  return medians[len(medians) // 2]
+
+
+def compare(results: dict, baseline: dict, tolerance=.5, floor=1e-4,
+            factor=None) -> list:
+  """Compares the results with the baseline, both mapping benchmark names
+  to measurements. Returns the benchmark, measurement, baseline, result
+  and ratio of each gated time present in both, and a flag indicating
+  that the result is slower than the baseline. The results are divided
+  by factor first, by default the drift of the run. A result is slower
+  if it then exceeds the baseline by more than the tolerance and by more
+  than floor seconds, or the floor of its benchmark in floors if larger,
+  such that times of a few microseconds, whose noise is large compared
+  with their size, do not fail the gate alone."""
+  factor = drift(results, baseline) if factor is None else factor
+  out = []
+  for (name, key, reference, val) in _gated(results, baseline):
+    val /= factor
+    ratio = val / reference if reference else float('inf')
+    slower = ratio > 1 + tolerance and \
+      val - reference > max(floor, floors.get(name, 0.))
+    out.append((name, key, reference, val, ratio, slower))
+  return out
+
+
+def missing(results: dict, baseline: dict) -> list:
+  """The benchmark and measurement of each gated time in the results that
+  has no entry in the baseline, which therefore cannot be compared"""
+  return [(name, key) for (name, measurements) in results.items()
+          for (key, val) in measurements.items()
+          if _isTime(key, val) and key not in ungated.get(name, ()) and
+          not isinstance(baseline.get(name, {}).get(key), float)]
+
+
+def main(argv=None):
+  """Runs the benchmarks named on the command line or all of them. The
+  results may be written to a JSON file and compared with the results of
+  an earlier run, for example:
+  python benchmarks.py --json baseline.json
+  python benchmarks.py --baseline baseline.json --json results.json
+  Timings vary between runs, so each benchmark runs --repeat times,
+  keeping the fastest of each time, by default three times when compared
+  with a baseline. Returns 1 if any gated time is slower than the
+  baseline, as decided by compare, or has no entry in the baseline."""
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('names', nargs='*', help=', '.join(benchmarks))
+  parser.add_argument('--json', help='file receiving the results')
+  parser.add_argument('--baseline', help='results of an earlier run')
+  parser.add_argument('--tolerance', type=float, default=.5,
+                      help='allowed slowdown as a fraction (default .5)')
+  parser.add_argument('--floor', type=float, default=1e-4,
+                      help='allowed slowdown in seconds (default 1e-4)')
+  parser.add_argument('--repeat', type=int,
+                      help='runs of each benchmark, keeping the fastest '
+                           '(default 3 with --baseline, otherwise 1)')
+  args = parser.parse_args(argv)
+  if args.repeat is None:
+    args.repeat = 3 if args.baseline else 1
+  for name in args.names:
+    if name not in benchmarks:
+      parser.error('unknown benchmark: %s' % name)
+  baseline = {}
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)['results']
+  app = QApplication.instance() or QApplication(sys.argv[:1])
+  results = {}
+  for name in args.names or benchmarks:
+    results[name] = best(benchmarks[name]() for _ in range(args.repeat))
+    for (key, val) in results[name].items():
+      print('%-24s %-24s %s' % (name, key, val))
+  if args.json:
+    with open(args.json, 'w') as f:
+      json.dump({'python': sys.version.split()[0],
+                 'platform': sys.platform,
+                 'qtPlatform': app.platformName(),
+                 'time': time.time(),
+                 'results': results}, f, indent=2, sort_keys=True)
+      f.write('\n')
+  regressions = 0
+  if baseline:
+    factor = drift(results, baseline)
+    print('\ndrift %.2fx, results below are divided by it' % factor)
+    for (name, key, reference, val, ratio, slower) in compare(
+        results, baseline, args.tolerance, args.floor, factor):
+      regressions += slower
+      print('%-24s %-24s %10.3g %10.3g %6.2fx%s' % (
+        name, key, reference, val, ratio, '  SLOWER' if slower else ''))
+    for (name, key) in missing(results, baseline):
+      regressions += 1
+      print('%-24s %-24s %10s %10.3g          MISSING' % (
+        name, key, '-', results[name][key]))
+  return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,130 @@
+"""Bindings declare the fields of a window once. A field connects a key in
+the data of the window to a property of a widget, along with the type and
+default of the value. Binding a field fills in the data, getters and
+setters of the window and connects the field to the dirty tracker.
+Loading values through the bindings happens as a single batch: signals
+of the bound widgets are blocked and updates of the window are suspended
+until every value is set, after which the window emits modelLoaded once.
+"""
+from __future__ import annotations
+
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QWidget
+
+
+def notifySignal(obj: QObject, prop: str) -> any:
+  """Returns the signal notifying changes of the named property of obj, or
+  None if the property has no such signal."""
+  meta = obj.metaObject()
+  metaProp = meta.property(meta.indexOfProperty(prop))
+  if not (metaProp.isValid() and metaProp.hasNotifySignal()):
+    return None
+  return getattr(obj, metaProp.notifySignal().name().data().decode(), None)
+
+
+class Field:
+  """Field binds a key to a property of a widget. The get and set methods
+  read and write the property, converting values to the type of the
+  field."""
+
+  def __init__(self, key: str, widget: QObject, prop=None, type_=None,
+               default=None):
+    self.key = key
+    self.widget = widget
+    self.prop = widget.metaObject().userProperty().name() if prop is None \
+      else prop
+    if not self.prop:
+      raise ValueError('%s has no user property to bind %s to!' % (
+        type(widget).__name__, key))
+    self.type = type_
+    self.default = default
+    self.signal = notifySignal(widget, self.prop)
+
+  def get(self) -> any:
+    """Reads the value from the widget"""
+    value = self.widget.property(self.prop)
+    return value if self.type is None else self.type(value)
+
+  def set(self, value: any):
+    """Writes the value to the widget. None writes the default."""
+    value = self.default if value is None else value
+    if value is not None and self.type is not None:
+      value = self.type(value)
+    self.widget.setProperty(self.prop, value)
+
+
+class Bindings:
+  """Bindings is the registry of fields of a main window. Fields declared
+  with bind take part in the data, getters and setters of the window like
+  any hand written entry."""
+
+  def __init__(self, main):
+    self.main = main
+    self.fields = {}
+
+  def bind(self, key: str, widget: QObject, prop=None, type_=None,
+           default=None) -> Field:
+    """Declares the field of the key"""
+    field = Field(key, widget, prop, type_, default)
+    self.fields[key] = field
+    self.main.data[key] = default
+    self.main.getters[key] = field.get
+    self.main.setters[key] = field.set
+    self.main.dirty.track(key, field.get, field.signal)
+    return field
+
+  def __contains__(self, key: str) -> bool:
+    return key in self.fields
+
+  def rebind(self, old: QWidget, new: QWidget) -> list:
+    """Moves the fields bound to widgets inside old to the widgets of the
+    same object names inside new, keeping the data. Fields finding no
+    such widget lose their getter and setter. Returns their keys."""
+    main = self.main
+    lost = []
+    for (key, field) in list(self.fields.items()):
+      widget = field.widget
+      if not isinstance(widget, QWidget) or not old.isAncestorOf(widget):
+        continue
+      name = widget.objectName()
+      widget = new.findChild(type(widget), name) if name else None
+      if widget is None:
+        del self.fields[key]
+        main.getters.pop(key, None)
+        main.setters.pop(key, None)
+        main.dirty.untrack(key)
+        lost.append(key)
+        continue
+      field = Field(key, widget, field.prop, field.type, field.default)
+      self.fields[key] = field
+      main.getters[key] = field.get
+      main.setters[key] = field.set
+      main.dirty.track(key, field.get, field.signal)
+    return lost
+
+  def apply(self, values: dict):
+    """Sets the values as one batch. Signals of the widgets behind the
+    setters are blocked and updates of the main window are suspended
+    until every value has been set. The main window then emits
+    modelLoaded once. Keys without a setter are skipped."""
+    main = self.main
+    values = {key: val for (key, val) in values.items()
+              if key in main.setters}
+    widgets = {}
+    for key in values:
+      field = self.fields.get(key)
+      obj = field.widget if field is not None \
+        else getattr(main.setters[key], '__self__', None)
+      if isinstance(obj, QObject) and obj not in widgets:
+        widgets[obj] = obj.blockSignals(True)
+    updates = main.updatesEnabled()
+    main.setUpdatesEnabled(False)
+    try:
+      for (key, val) in values.items():
+        main.setters[key](val)
+    finally:
+      for (obj, blocked) in widgets.items():
+        obj.blockSignals(blocked)
+      main.setUpdatesEnabled(updates)
+    main.dirty.clear()
+    main.modelLoaded.emit()
@@ -9,7 +9,7 @@ class Question(QMessageBox):
   """Creates a new question"""
 
   @classmethod
-  def saveChanges(cls, slot):
+  def saveChanges(cls, slot=None):
     """Standard question for unsaved changes. """
     out = cls(slot, 'Unsaved Changes Found', 'Save Changes?')
     out.addButton(QMessageBox.Save)
@@ -17,13 +17,15 @@ class Question(QMessageBox):
     out.addButton(QMessageBox.Cancel)
     return out
 
-  def __init__(self, slot: Callable[..., any], title=None, text=None):
+  def __init__(self, slot: Callable[..., any] = None, title=None,
+               text=None):
     QMessageBox.__init__(self)
     self._title = 'Question' if title is None else title
     self._text = 'Please Confirm' if text is None else text
     self.setWindowTitle(self.title)
     self.setText(self.text)
-    self.finished.connect(slot)
+    if slot is not None:
+      self.finished.connect(slot)
 
   def __call__(self) -> int:
     """Calling the question raises it"""
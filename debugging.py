@@ -0,0 +1,52 @@
+"""Debugging helpers. Importing icecream takes a noticeable part of the
+start up time, so it is imported on the first call to ic and only when
+debugging is enabled, either by setting the environment variable
+QTYNOTPY_DEBUG before the application starts or by calling enableDebug.
+While debugging is disabled, ic returns its arguments as icecream does
+without printing anything."""
+from __future__ import annotations
+
+import os
+import sys
+
+_enabled = bool(os.environ.get('QTYNOTPY_DEBUG'))
+_ic = None
+
+
+def debugEnabled() -> bool:
+  """Flag indicating that ic prints its arguments"""
+  return _enabled
+
+
+def enableDebug(flag=True):
+  """Enables or disables the output of ic"""
+  global _enabled
+  _enabled = bool(flag)
+
+
+def _icecream():
+  """The icecream ic, imported on first use"""
+  global _ic
+  if _ic is None:
+    from icecream import ic as ic_
+    _ic = ic_
+  return _ic
+
+
+def ic(*args, force=False) -> any:
+  """Prints the arguments with icecream if debugging is enabled or force
+  is set. Returns the argument, the arguments as a tuple or None if no
+  argument is given. The output names the file, line and function of the
+  caller, as ic does with includeContext."""
+  if _enabled or force:
+    ic_ = _icecream()
+    frame = sys._getframe(1)
+    prefix = ic_.prefix() if callable(ic_.prefix) else ic_.prefix
+    context = '%s:%d in %s()' % (os.path.basename(frame.f_code.co_filename),
+                                 frame.f_lineno, frame.f_code.co_name)
+    values = ', '.join(ic_.argToStringFunction(arg) for arg in args)
+    ic_.outputFunction('%s%s%s' % (prefix, context,
+                                   '- ' + values if args else ''))
+  if not args:
+    return None
+  return args[0] if len(args) == 1 else args
@@ -0,0 +1,120 @@
+"""The dirty tracker records which data keys of a window have changed since
+the data was last saved or loaded. Each key is connected to the change
+signal of the widget behind its getter, such that the widget marks the
+key itself when edited. Asking whether anything is unsaved is then a
+matter of checking the size of a set, rather than calling every getter
+and comparing the values."""
+from __future__ import annotations
+
+from functools import partial
+from typing import Callable
+
+from PySide6.QtCore import QObject, Signal
+
+from bindings import notifySignal
+
+
+class DirtyTracker(QObject):
+  """DirtyTracker holds the set of changed keys of a main window. The
+  countChanged signal is emitted whenever the number of changed keys
+  changes."""
+
+  countChanged = Signal(int)
+
+  @staticmethod
+  def changeSignal(getter: Callable) -> any:
+    """Finds the signal notifying changes of the value returned by the
+    getter. The getter must be a method bound to a QObject. The property
+    named as the getter is preferred, falling back to the user property
+    of the object. Returns None if no signal is found."""
+    obj = getattr(getter, '__self__', None)
+    if not isinstance(obj, QObject):
+      return None
+    signal = notifySignal(obj, getter.__name__)
+    if signal is None:
+      signal = notifySignal(obj, obj.metaObject().userProperty().name())
+    return signal
+
+  def __init__(self, main):
+    QObject.__init__(self, main)
+    self.main = main
+    self._dirty = set()
+    self._stamps = {}
+    self.stamp = 0
+    self._tracked = {}
+    self._polled = {}
+
+  def track(self, key: str, getter: Callable, signal=None) -> bool:
+    """Connects the change signal of the getter to mark the key. If no
+    signal is given, it is found with changeSignal. Keys without a signal
+    are compared against the data of the main window when queried. Returns
+    True if the key is signal-driven. Tracking the same getter again does
+    nothing."""
+    if self._tracked.get(key, (None,))[0] == getter:
+      return self._tracked[key][1] is not None
+    self.untrack(key)
+    signal = self.changeSignal(getter) if signal is None else signal
+    if signal is None:
+      self._polled[key] = getter
+      self._tracked[key] = (getter, None, None)
+      return False
+    slot = partial(self.mark, key)
+    signal.connect(slot)
+    self._tracked[key] = (getter, signal, slot)
+    return True
+
+  def untrack(self, key: str):
+    """Disconnects the key"""
+    getter, signal, slot = self._tracked.pop(key, (None, None, None))
+    self._polled.pop(key, None)
+    if signal is not None:
+      signal.disconnect(slot)
+    self.discard(key)
+
+  def mark(self, key: str, *_):
+    """Marks the key as changed. Every change of the key advances its
+    stamp, which changedSince compares against."""
+    self.stamp += 1
+    self._stamps[key] = self.stamp
+    if key not in self._dirty:
+      self._dirty.add(key)
+      self.countChanged.emit(len(self._dirty))
+
+  def discard(self, key: str):
+    """Marks the key as unchanged"""
+    self._stamps.pop(key, None)
+    if key in self._dirty:
+      self._dirty.discard(key)
+      self.countChanged.emit(len(self._dirty))
+
+  def clear(self):
+    """Marks every key as unchanged. Used after saving or loading."""
+    self._stamps = {}
+    if self._dirty:
+      self._dirty = set()
+      self.countChanged.emit(0)
+
+  def keys(self) -> set:
+    """The changed keys. Only keys without a change signal are compared
+    by value."""
+    if not self._polled:
+      return set(self._dirty)
+    data = self.main.data
+    return self._dirty | {key for (key, getter) in self._polled.items()
+                          if getter() != data.get(key)}
+
+  def changedSince(self, stamp: int) -> set:
+    """The keys changed after the given stamp. Keys without a change
+    signal are included when their value differs from the data."""
+    out = {key for (key, val) in self._stamps.items() if val > stamp}
+    if self._polled:
+      out |= self.keys() - self._dirty
+    return out
+
+  def __len__(self) -> int:
+    """The number of changed keys"""
+    return len(self.keys()) if self._polled else len(self._dirty)
+
+  def __bool__(self) -> bool:
+    """True if any key has changed"""
+    return bool(self._dirty) or bool(self._polled and self.keys())
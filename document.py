@@ -0,0 +1,321 @@
+"""The document format stores the data of a window in sections, one per
+key, behind a fixed header pointing to an index of the sections. Opening
+a document reads only the header and the index, after which each key is
+read on its own when asked for. Large sections are read through a memory
+map of the file rather than into a separate buffer. Files written by
+earlier versions with a plain pickle.dump of the whole data dictionary
+are recognized and loaded as a whole.
+Values are pickled with protocol 5. Large buffers exposed through
+PickleBuffer, such as NumPy arrays, are written out-of-band as raw
+segments aligned to 64 bytes directly after the pickle of their value,
+without first being copied into the pickle. When read, these segments
+are handed to pickle as views of a copy-on-write memory map of the file,
+so the arrays share the pages of the file until written to.
+
+Layout, all integers little endian:
+  magic         8 bytes  b'QYNPDOC\\x00'
+  version       uint32
+  reserved      uint32
+  indexOffset   uint64
+  indexLength   uint64
+  sections      each section is a pickled value followed by the aligned
+                out-of-band buffers of the value
+  index         pickled dictionary of key -> (offset, length, buffers)
+                with buffers a list of (offset, length). Version 1 files
+                have no buffers in their index.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from typing import Callable
+
+_header = struct.Struct('<8sIIQQ')
+
+
+def _umask() -> int | None:
+  """The umask of the process as reported by Linux, which is read without
+  setting it, unlike os.umask. None where the system does not report
+  it."""
+  try:
+    with open('/proc/self/status') as f:
+      for line in f:
+        if line.startswith('Umask:'):
+          return int(line.split()[1], 8)
+  except (OSError, ValueError, IndexError):
+    pass
+  return None
+
+
+class Document:
+  """Use the class method open to read a document and the class method
+  write to write one. Instances give access to the keys of an opened
+  document and read their values on demand."""
+
+  magic = b'QYNPDOC\x00'
+  version = 2
+  mmapThreshold = 1 << 20
+  bufferThreshold = 1 << 16
+  alignment = 64
+
+  @classmethod
+  def isDocument(cls, fid: str) -> bool:
+    """Checks if the file is in the document format, rather than a legacy
+    pickle file."""
+    with open(fid, 'rb') as f:
+      return f.read(len(cls.magic)) == cls.magic
+
+  @classmethod
+  def open(cls, fid: str) -> Document:
+    """Opens the file, which may also be a legacy pickle file."""
+    if cls.isDocument(fid):
+      return cls(fid)
+    return LegacyDocument(fid)
+
+  @classmethod
+  def load(cls, fid: str) -> dict:
+    """Reads every key of the file"""
+    with cls.open(fid) as doc:
+      return doc.readAll()
+
+  @classmethod
+  def write(cls, fid: str, data: dict, progress: Callable = None):
+    """Writes the data to the file. If given, progress is called with the
+    number of sections written and the total after each section. The
+    data is written and synced to a temporary file in the same folder,
+    which then replaces the file, such that a crash during the write
+    leaves the previous file intact. The file keeps its permissions. A
+    new file gets the permissions of the umask where the system reports
+    the umask, and is private to the user otherwise."""
+    folder, name = os.path.split(os.path.abspath(fid))
+    handle, tempFid = tempfile.mkstemp(prefix='.%s.' % name, suffix='.tmp',
+                                       dir=folder)
+    try:
+      if os.path.exists(fid):
+        os.chmod(tempFid, os.stat(fid).st_mode & 0o7777)
+      else:
+        umask = _umask()
+        if umask is not None:
+          os.chmod(tempFid, 0o666 & ~umask)
+      with os.fdopen(handle, 'wb') as f:
+        cls.writeTo(f, data, progress)
+        f.flush()
+        os.fsync(f.fileno())
+      os.replace(tempFid, fid)
+    except BaseException:
+      if os.path.exists(tempFid):
+        os.remove(tempFid)
+      raise
+    if hasattr(os, 'O_DIRECTORY'):
+      handle = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+      try:
+        os.fsync(handle)
+      finally:
+        os.close(handle)
+
+  @classmethod
+  def writeTo(cls, f, data: dict, progress: Callable = None):
+    """Writes the data to the open binary file object. Values given as a
+    Section are copied from their document as stored."""
+    f.write(_header.pack(cls.magic, cls.version, 0, 0, 0))
+    index = {}
+    total = len(data)
+    for (i, (key, val)) in enumerate(data.items()):
+      if isinstance(val, Section):
+        index[key] = val.document.copyTo(val.key, f)
+        if progress is not None:
+          progress(i + 1, total)
+        continue
+      buffers = []
+      payload = pickle.dumps(val, protocol=5,
+                             buffer_callback=cls._inBand(buffers))
+      offset = f.tell()
+      f.write(payload)
+      segments = []
+      for buffer in buffers:
+        with buffer.raw() as raw:
+          f.write(bytes(-f.tell() % cls.alignment))
+          segments.append((f.tell(), raw.nbytes))
+          f.write(raw)
+      index[key] = (offset, len(payload), segments)
+      if progress is not None:
+        progress(i + 1, total)
+    indexOffset = f.tell()
+    payload = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(payload)
+    f.seek(0)
+    f.write(_header.pack(cls.magic, cls.version, 0, indexOffset,
+                         len(payload)))
+    f.seek(0, os.SEEK_END)
+
+  @classmethod
+  def _inBand(cls, buffers: list):
+    """Returns the buffer callback for pickle.dumps. Buffers smaller than
+    bufferThreshold stay in the pickle, while larger buffers are appended
+    to the list to be written out-of-band."""
+
+    def callback(buffer: pickle.PickleBuffer) -> bool:
+      """Returns True for buffers kept in the pickle"""
+      try:
+        with buffer.raw() as raw:
+          if raw.nbytes < cls.bufferThreshold:
+            return True
+      except BufferError:
+        return True
+      buffers.append(buffer)
+      return False
+
+    return callback
+
+  def __init__(self, fid: str):
+    self.fid = fid
+    self._file = open(fid, 'rb')
+    self._mmap = None
+    try:
+      magic, version, _, indexOffset, indexLength = _header.unpack(
+        self._file.read(_header.size))
+      if magic != self.magic:
+        raise ValueError('%s is not a document!' % fid)
+      if version > self.version:
+        raise ValueError('%s has unsupported version %d!' % (fid, version))
+      self.fileVersion = version
+      self._file.seek(indexOffset)
+      self.index = pickle.loads(self._file.read(indexLength))
+    except Exception:
+      self._file.close()
+      raise
+
+  def keys(self) -> list:
+    """The keys of the document in the order they were written"""
+    return list(self.index)
+
+  def __contains__(self, key: str) -> bool:
+    return key in self.index
+
+  def __len__(self) -> int:
+    return len(self.index)
+
+  def size(self, key: str) -> int:
+    """The size of the section of the key in bytes, including its
+    out-of-band buffers"""
+    offset, length, *buffers = self.index[key]
+    return length + sum(n for (_, n) in (buffers[0] if buffers else []))
+
+  def _map(self) -> mmap.mmap:
+    """The memory map of the file, created on first use. The map is
+    copy-on-write, such that values built on top of it may be modified
+    without changing the file."""
+    if self._mmap is None:
+      self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+    return self._mmap
+
+  def _view(self, offset: int, length: int) -> memoryview:
+    """A view of the memory mapped file"""
+    return memoryview(self._map())[offset:offset + length]
+
+  def section(self, key: str) -> Section:
+    """The stored section of the key, to be written to another document
+    without reading its value. The memory map is created at once, such
+    that a writer on another thread only reads from it."""
+    self._map()
+    return Section(self, key)
+
+  def copyTo(self, key: str, f) -> tuple:
+    """Writes the section of the key as stored to the open binary file
+    object, aligning its out-of-band buffers. Returns the index entry of
+    the copy."""
+    offset, length, *buffers = self.index[key]
+    out = f.tell()
+    with self._view(offset, length) as view:
+      f.write(view)
+    segments = []
+    for (o, n) in (buffers[0] if buffers else []):
+      f.write(bytes(-f.tell() % self.alignment))
+      segments.append((f.tell(), n))
+      with self._view(o, n) as view:
+        f.write(view)
+    return out, length, segments
+
+  def read(self, key: str) -> any:
+    """Reads the value of the key. Out-of-band buffers are passed to
+    pickle as views of the memory map without copying."""
+    offset, length, *buffers = self.index[key]
+    buffers = [self._view(o, n) for (o, n) in buffers[0]] if buffers \
+      else []
+    if buffers or length >= self.mmapThreshold:
+      with self._view(offset, length) as view:
+        return pickle.loads(view, buffers=buffers)
+    self._file.seek(offset)
+    return pickle.loads(self._file.read(length))
+
+  def readAll(self) -> dict:
+    """Reads every key"""
+    return {key: self.read(key) for key in self.index}
+
+  def close(self):
+    """Closes the file. The memory map stays open for as long as values
+    read from it are alive."""
+    if self._mmap is not None:
+      try:
+        self._mmap.close()
+      except BufferError:
+        pass
+      self._mmap = None
+    self._file.close()
+
+  def __enter__(self) -> Document:
+    return self
+
+  def __exit__(self, *_):
+    self.close()
+
+
+class Section:
+  """Section stands for the stored value of a key of an open document.
+  Writing a Section copies the bytes of the section as they are, without
+  reading the value, so its document must stay open until the write has
+  finished."""
+
+  __slots__ = ('document', 'key')
+
+  def __init__(self, document: Document, key: str):
+    self.document = document
+    self.key = key
+
+  def __repr__(self) -> str:
+    return 'Section(%r, %r)' % (self.document.fid, self.key)
+
+
+class LegacyDocument(Document):
+  """LegacyDocument reads files written with a plain pickle.dump of the
+  data dictionary. Since such files have no index, the whole file is
+  loaded when opened."""
+
+  def __init__(self, fid: str):
+    self.fid = fid
+    self.fileVersion = 0
+    with open(fid, 'rb') as f:
+      self._data = pickle.load(f)
+    if not isinstance(self._data, dict):
+      raise ValueError('%s holds no data dictionary!' % fid)
+    self.index = dict.fromkeys(self._data)
+
+  def size(self, key: str) -> int:
+    """Sizes are unknown for legacy files"""
+    return -1
+
+  def read(self, key: str) -> any:
+    """Returns the value of the key"""
+    return self._data[key]
+
+  def section(self, key: str) -> any:
+    """Legacy files have no sections, and the value, which is in memory
+    already, is written instead."""
+    return self._data[key]
+
+  def close(self):
+    """Releases the data"""
+    self._data = {}
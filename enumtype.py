@@ -3,20 +3,129 @@ specific is expected. The enumId function identifies the expected value
 from an integer and the possible expected values. For example:
 enumId(262144, QMessageBox.StandardButton) returns ...Abort
 with ... indicating the group, here: QMessageBox.StandardButton
-"""
-from icecream import ic as ic_
+The names of the members of each group are collected once into a reverse
+index from integer to name, which is kept in a weak dictionary for as
+long as the group exists. The index holds names rather than members,
+since members refer to their group and would keep it alive. Lookups are
+then two dictionary accesses and a getattr. enumIds decodes a sequence
+or NumPy array of integers at once, and enumFlags splits a combination
+of flags into its members."""
+from __future__ import annotations
 
-ic_.configureOutput(includeContext=True)
+import weakref
+from enum import Enum
+
+from debugging import ic
+
+_caches = weakref.WeakKeyDictionary()
+_fallback = {}
+
+
+def _intValue(member: any) -> int:
+  """The integer of the member. Python enums use their value, while other
+  members use int or, failing that, __hash__ as Qt enums used to."""
+  if isinstance(member, Enum):
+    return int(member.value)
+  try:
+    return int(member)
+  except (TypeError, ValueError):
+    return member.__hash__()
+
+
+def _cache(grp: any) -> dict:
+  """The cache of grp. Groups are weakly referenced, such that the cache
+  holds no reference keeping grp alive and is collected along with it.
+  Groups refusing weak references are cached by id instead, along with
+  the group itself to tell it apart from later objects of the same id."""
+  try:
+    return _caches.setdefault(grp, {})
+  except TypeError:
+    pass
+  cache = _fallback.get(id(grp))
+  if cache is None or cache['owner'] is not grp:
+    cache = _fallback[id(grp)] = {'owner': grp}
+  return cache
+
+
+def _names(grp: any) -> dict:
+  """The reverse index of grp mapping integers to the names of members,
+  built on first use. If several members share an integer, the canonical
+  member is preferred."""
+  try:
+    return _caches[grp]['names']
+  except (KeyError, TypeError):
+    pass
+  cache = _cache(grp)
+  names = cache.get('names')
+  if names is not None:
+    return names
+  names = {}
+  if isinstance(grp, type) and issubclass(grp, Enum):
+    members = [(member.name, member) for member in grp]
+    members += list(grp.__members__.items())
+  else:
+    members = [(key, val) for (key, val) in grp.__dict__.items()
+               if val and key != 'values' and not key.startswith('_')]
+  for (name, member) in members:
+    try:
+      names.setdefault(_intValue(member), name)
+    except Exception:
+      continue
+  cache['names'] = names
+  return names
+
+
+def enumIndex(grp: any) -> dict:
+  """Returns the reverse index of grp mapping integers to members. If
+  several members share an integer, the canonical member is preferred.
+  The index is made from the cached names on each call."""
+  return {value: getattr(grp, name) for (value, name) in _names(grp).items()}
 
 
 def enumId(enum: int, grp: any, debug=False) -> any:
-  """Finds the member of grp with __hash__ equal to enum"""
-  ic = ic_ if debug else lambda *args: None
-  for (key, val) in grp.__dict__.items():
-    if val and key != 'values':
-      try:
-        if enum == val.__hash__():
-          ic(val.__repr__())
-          return val
-      except Exception as e:
-        ic(key)
+  """Finds the member of grp with the integer value enum. Returns None if
+  no member has that value."""
+  try:
+    name = _caches[grp]['names'].get(enum)
+  except (KeyError, TypeError):
+    name = _names(grp).get(enum)
+  out = None if name is None else getattr(grp, name)
+  if debug:
+    ic(enum, out, force=True)
+  return out
+
+
+def enumIds(enums: any, grp: any) -> list:
+  """Finds the members of grp for each integer in enums, which may be a
+  sequence or a NumPy array. Integers without a member give None."""
+  get = enumIndex(grp).get
+  if hasattr(enums, 'tolist'):
+    enums = enums.tolist()
+  return [get(enum) for enum in enums]
+
+
+def _flagBits(grp: any) -> list:
+  """The values and names of the members of grp having a single bit set,
+  in order of the bits"""
+  try:
+    return _caches[grp]['flags']
+  except (KeyError, TypeError):
+    pass
+  names = _names(grp)
+  cache = _cache(grp)
+  bits = cache.get('flags')
+  if bits is None:
+    bits = sorted(((value, name) for (value, name) in names.items()
+                   if value > 0 and not value & (value - 1)),
+                  key=lambda item: item[0])
+    cache['flags'] = bits
+  return bits
+
+
+def enumFlags(enum: int, grp: any) -> list:
+  """Splits a combination of flags into the members of grp with a single
+  bit each. The combination may be given as an integer or as a member.
+  Bits without a member are left out."""
+  enum = enum if isinstance(enum, int) else _intValue(enum)
+  return [getattr(grp, name) for (value, name) in _flagBits(grp)
+          if enum & value]
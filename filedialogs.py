@@ -3,9 +3,14 @@
  directory. However, they are sufficiently similarly that they may share a
  class being instantiated by each their own class method. Thus, FileDialog
  is a subclass of QFileDialog taking settings from their function and from
- the main window on which they are instantiated."""
+ the main window on which they are instantiated.
+ Constructing a QFileDialog is expensive and most windows never open one.
+ Windows therefore hold a LazyFileDialog instead, which borrows a dialog
+ from a small pool shared by all windows when called. The pool is keyed
+ by the mode and the filters of the dialog."""
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
 from PySide6.QtWidgets import QFileDialog
@@ -20,42 +25,105 @@ class FileDialog(QFileDialog):
   the dialog and returning the file or directory chosen by the user,
   or returning None if no selection is made. """
 
+  modes = ['loadFile', 'saveFile', 'loadDir']
+  poolSize = 6
+  _pool = OrderedDict()
+
   @classmethod
-  def loadFile(cls, main: BaseWindow):
+  def loadFile(cls, main: BaseWindow = None, filters=None):
     """This class method creates a file loading dialog on the provided
     main window."""
-    out = cls(main)
+    out = cls(main, filters)
     out.setFileMode(QFileDialog.ExistingFile)
     out.setAcceptMode(QFileDialog.AcceptOpen)
     return out
 
   @classmethod
-  def saveFile(cls, main: BaseWindow):
+  def saveFile(cls, main: BaseWindow = None, filters=None):
     """This class method creates a file loading dialog on the provided
     main window."""
-    out = cls(main)
+    out = cls(main, filters)
     out.setFileMode(QFileDialog.AnyFile)
     out.setAcceptMode(QFileDialog.AcceptSave)
     return out
 
   @classmethod
-  def loadDir(cls, main: BaseWindow):
+  def loadDir(cls, main: BaseWindow = None, filters=None):
     """This class method creates a file dialog letting a user choose a
     directory with only folders being visible."""
-    out = cls(main)
+    out = cls(main, filters)
     out.setFileMode(QFileDialog.Directory)
     out.setAcceptMode(QFileDialog.AcceptOpen)
     out.setOption(QFileDialog.ShowDirsOnly, True)
     return out
 
-  def __init__(self, main: BaseWindow):
+  @classmethod
+  def lazy(cls, main: BaseWindow, mode: str) -> LazyFileDialog:
+    """Returns a callable standing in for the dialog of the given mode.
+    No dialog is created before it is called."""
+    if mode not in cls.modes:
+      raise ValueError('Unknown file dialog mode: %s' % mode)
+    return LazyFileDialog(main, mode)
+
+  @classmethod
+  def borrow(cls, mode: str, filters) -> FileDialog:
+    """Takes the dialog of the mode and filters from the pool, creating
+    it if the pool has none. The dialog is owned by the caller until
+    returned with giveBack."""
+    key = (mode, tuple(filters))
+    out = cls._pool.pop(key, None)
+    if out is None:
+      out = getattr(cls, mode)(None, list(filters))
+    out.poolKey = key
+    return out
+
+  @classmethod
+  def giveBack(cls, dialog: FileDialog):
+    """Returns a borrowed dialog to the pool. The least recently used
+    dialog is deleted if the pool grows beyond poolSize."""
+    if dialog.poolKey in cls._pool:
+      return dialog.deleteLater()
+    cls._pool[dialog.poolKey] = dialog
+    while len(cls._pool) > cls.poolSize:
+      cls._pool.popitem(last=False)[1].deleteLater()
+
+  @classmethod
+  def clearPool(cls):
+    """Deletes every pooled dialog"""
+    while cls._pool:
+      cls._pool.popitem()[1].deleteLater()
+
+  def __init__(self, main: BaseWindow = None, filters=None):
     QFileDialog.__init__(self, main)
     self.main = main
+    self.poolKey = None
     self.setViewMode(QFileDialog.Detail)
-    self.setNameFilters(self.main.filters)
+    self.setNameFilters(self.main.filters if filters is None else filters)
 
   def __call__(self):
     """Opens the dialog"""
     if self.exec():
       return self.selectedFiles()[0]
     return False
+
+
+class LazyFileDialog:
+  """LazyFileDialog is called in place of a FileDialog. On each call it
+  borrows a pooled dialog matching its mode and the current filters of
+  the main window, centers it on the window and opens it."""
+
+  def __init__(self, main: BaseWindow, mode: str):
+    self.main = main
+    self.mode = mode
+
+  def __call__(self):
+    """Opens the dialog"""
+    dialog = FileDialog.borrow(self.mode, self.main.filters)
+    try:
+      dialog.main = self.main
+      dialog.selectFile('')
+      dialog.move(self.main.geometry().center() - dialog.rect().center())
+      return dialog()
+    finally:
+      dialog.main = None
+      FileDialog.giveBack(dialog)
@@ -0,0 +1,129 @@
+"""The icon registry decodes each icon the first time it is used and then
+shares it between all windows. Paths are resolved relative to the package
+rather than the working directory. Decoding to QImage is permitted off
+the GUI thread, so the registry may preload the images in the
+background, while the conversion to QPixmap and QIcon always happens on
+the GUI thread on first use."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+from PySide6.QtCore import QThreadPool
+from PySide6.QtGui import QIcon, QImage, QPixmap
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+class IconRegistry:
+  """Use the class method instance to access the registry shared by the
+  application. Icons are then retrieved by key with the icon method."""
+
+  _instance = None
+
+  files = {
+    'save': 'filesave.png',
+    'open': 'fileopen.png',
+    'new': 'filenew.png',
+    'docs': 'docs.png',
+    'props': 'props.png',
+    'qt': 'qt.png',
+  }
+
+  @classmethod
+  def instance(cls) -> IconRegistry:
+    """The process-wide registry"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def __init__(self, iconDir=None):
+    self.iconDir = os.path.join(_here, 'icons') if iconDir is None \
+      else iconDir
+    self.files = dict(self.files)
+    self._lock = threading.Lock()
+    self._images = {}
+    self._pixmaps = {}
+    self._icons = {}
+    self.hits = 0
+    self.misses = 0
+    self.decodeTime = 0.
+
+  def register(self, key: str, fileName: str):
+    """Adds or replaces the file used for the key. File names are relative
+    to the icon directory unless absolute."""
+    self.files[key] = fileName
+    with self._lock:
+      self._images.pop(key, None)
+    self._pixmaps.pop(key, None)
+    self._icons.pop(key, None)
+
+  def path(self, key: str) -> str:
+    """The absolute path to the file of the key"""
+    return os.path.join(self.iconDir, self.files[key])
+
+  def _decode(self, key: str) -> QImage:
+    """Decodes the image of the key, unless already decoded. Safe to call
+    from any thread."""
+    with self._lock:
+      image = self._images.get(key)
+    if image is not None:
+      return image
+    start = time.perf_counter()
+    image = QImage(self.path(key))
+    elapsed = time.perf_counter() - start
+    with self._lock:
+      self.decodeTime += elapsed
+      return self._images.setdefault(key, image)
+
+  def pixmap(self, key: str) -> QPixmap:
+    """The pixmap of the key. Must be called on the GUI thread."""
+    pixmap = self._pixmaps.get(key)
+    if pixmap is None:
+      pixmap = QPixmap.fromImage(self._decode(key))
+      self._pixmaps[key] = pixmap
+    return pixmap
+
+  def icon(self, key: str) -> QIcon:
+    """The icon of the key. Must be called on the GUI thread."""
+    icon = self._icons.get(key)
+    if icon is not None:
+      self.hits += 1
+      return icon
+    self.misses += 1
+    icon = QIcon(self.pixmap(key))
+    self._icons[key] = icon
+    return icon
+
+  def preload(self, keys=None, background=True):
+    """Decodes the images of the keys, by default every registered key.
+    Unless background is False, the decoding runs on the global thread
+    pool and the method returns immediately."""
+    keys = list(self.files) if keys is None else list(keys)
+    if not background:
+      for key in keys:
+        self._decode(key)
+      return
+    QThreadPool.globalInstance().start(
+      lambda: [self._decode(key) for key in keys])
+
+  @property
+  def stats(self) -> dict:
+    """Hits, misses and the total time spent decoding images"""
+    return {'hits': self.hits, 'misses': self.misses,
+            'decodeTime': self.decodeTime, 'decoded': len(self._images)}
+
+  @stats.setter
+  def stats(self, *_):
+    raise TypeError('stats is read-only!')
+
+  def clear(self):
+    """Forgets every decoded image and the statistics"""
+    with self._lock:
+      self._images = {}
+      self.decodeTime = 0.
+    self._pixmaps = {}
+    self._icons = {}
+    self.hits = 0
+    self.misses = 0
@@ -0,0 +1,268 @@
+"""The inspector shows the data of a main window as a table of keys, types
+and values, regardless of the number of keys. The model holds the list of
+keys matching the filter, but exposes them to the view in batches as the
+view scrolls towards the end, through canFetchMore and fetchMore. Values
+are formatted when the view asks for them, which it does for the visible
+rows only, and a bounded number of formatted values is kept.
+
+Filtering runs on the global thread pool. The worker matches the keys in
+chunks and hands each chunk of matches to the model as it goes, such
+that the first matches show at once. The matches travel through a relay
+living as long as the application, so a model deleted while its filter
+runs simply receives nothing more. Changing the filter abandons the
+running filter. A filter extending the previous one searches the matches
+of the previous filter only."""
+from __future__ import annotations
+
+import reprlib
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, \
+  QRunnable, Qt, QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QLabel, \
+  QLineEdit, QTableView, QVBoxLayout, QWidget
+
+from tasks import CancelToken
+
+_repr = reprlib.Repr()
+_repr.maxstring = 120
+_repr.maxother = 120
+_repr.maxlist = _repr.maxtuple = _repr.maxdict = _repr.maxset = 8
+
+
+class FilterRelay(QObject):
+  """FilterRelay carries the matches of the filter jobs to their models.
+  The relay lives as long as the application, while each model connects
+  to it as the receiver, such that Qt drops the connections of a deleted
+  model and matches arriving after the model are never delivered. Use
+  the class method instance to access the relay."""
+
+  found = Signal(object, list)
+  finished = Signal(object)
+
+  _instance = None
+
+  @classmethod
+  def instance(cls) -> FilterRelay:
+    """The relay of the application, created on the GUI thread on first
+    use"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+
+class FilterJob(QRunnable):
+  """FilterJob matches the keys against the filter text in chunks,
+  reporting the matches of each chunk through the relay along with the
+  token of the filter. The job stops once the token is cancelled, as the
+  model moves on to another filter."""
+
+  chunkSize = 8192
+
+  def __init__(self, token: CancelToken, keys: list, text: str):
+    QRunnable.__init__(self)
+    self.relay = FilterRelay.instance()
+    self.token = token
+    self.keys = keys
+    self.text = text.lower()
+
+  def run(self):
+    """Filters the keys on the worker thread"""
+    text, relay, token = self.text, self.relay, self.token
+    for start in range(0, len(self.keys), self.chunkSize):
+      if token.cancelled:
+        return
+      chunk = self.keys[start:start + self.chunkSize]
+      found = [key for key in chunk if text in str(key).lower()]
+      if found:
+        relay.found.emit(token, found)
+    relay.finished.emit(token)
+
+
+class DataModel(QAbstractTableModel):
+  """DataModel presents the keys of the data with their types and values.
+  Call refresh after replacing the data and setFilter to filter the keys
+  by a case insensitive substring."""
+
+  filtering = Signal(bool)
+
+  headers = ['Key', 'Type', 'Value']
+  batchSize = 256
+  formatCacheSize = 4096
+
+  def __init__(self, data: dict, parent: QObject = None):
+    QAbstractTableModel.__init__(self, parent)
+    self.source = data
+    self.text = ''
+    self.keys = []
+    self.loaded = 0
+    self.done = True
+    self._formatted = {}
+    self._token = CancelToken()
+    relay = FilterRelay.instance()
+    relay.found.connect(self._found)
+    relay.finished.connect(self._finished)
+    self.refresh()
+
+  def rowCount(self, parent=QModelIndex()) -> int:
+    return 0 if parent.isValid() else self.loaded
+
+  def columnCount(self, parent=QModelIndex()) -> int:
+    return 0 if parent.isValid() else len(self.headers)
+
+  def headerData(self, section: int, orientation: Qt.Orientation,
+                 role=Qt.ItemDataRole.DisplayRole) -> any:
+    if role == Qt.ItemDataRole.DisplayRole and \
+        orientation == Qt.Orientation.Horizontal:
+      return self.headers[section]
+    return None
+
+  def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole) -> any:
+    """Formats the cell when the view shows it"""
+    if role not in (Qt.ItemDataRole.DisplayRole,
+                    Qt.ItemDataRole.ToolTipRole) or not index.isValid():
+      return None
+    key = self.keys[index.row()]
+    column = index.column()
+    if column == 0:
+      return str(key)
+    value = self.source.get(key)
+    if column == 1:
+      try:
+        return '%s [%d]' % (type(value).__name__, len(value))
+      except TypeError:
+        return type(value).__name__
+    return self.format(key, value)
+
+  def format(self, key: any, value: any) -> str:
+    """The short representation of the value, cached by key"""
+    out = self._formatted.get(key)
+    if out is None:
+      if len(self._formatted) >= self.formatCacheSize:
+        self._formatted.clear()
+      try:
+        out = _repr.repr(value)
+      except Exception as e:
+        out = '<%s>' % type(e).__name__
+      self._formatted[key] = out
+    return out
+
+  def canFetchMore(self, parent=QModelIndex()) -> bool:
+    return not parent.isValid() and self.loaded < len(self.keys)
+
+  def fetchMore(self, parent=QModelIndex()):
+    """Exposes the next batch of rows to the view"""
+    if parent.isValid():
+      return
+    count = min(self.batchSize, len(self.keys) - self.loaded)
+    if count <= 0:
+      return
+    self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+    self.loaded += count
+    self.endInsertRows()
+
+  def refresh(self, data: dict = None):
+    """Shows the keys of the data again, applying the current filter"""
+    if data is not None:
+      self.source = data
+    self._formatted = {}
+    self._restart(list(self.source), self.text)
+
+  def setFilter(self, text: str):
+    """Shows the keys containing the text. A filter extending the current
+    filter searches the keys shown already, once the current filter has
+    finished."""
+    if text == self.text:
+      return
+    if self.done and self.text and text.startswith(self.text):
+      keys = self.keys
+    else:
+      keys = list(self.source)
+    self._restart(keys, text)
+
+  def _restart(self, keys: list, text: str):
+    """Abandons any running filter and shows the keys matching text"""
+    self._token.cancel()
+    self._token = CancelToken()
+    self.text = text
+    self.beginResetModel()
+    self.loaded = 0
+    if text:
+      self.keys = []
+      self.done = False
+      self.filtering.emit(True)
+      QThreadPool.globalInstance().start(
+        FilterJob(self._token, keys, text))
+    else:
+      self.keys = keys
+      self.done = True
+    self.endResetModel()
+    self.fetchMore()
+
+  def _found(self, token: CancelToken, keys: list):
+    """Appends matches of the current filter"""
+    if token is not self._token:
+      return
+    self.keys.extend(keys)
+    if self.loaded < self.batchSize:
+      self.fetchMore()
+
+  def _finished(self, token: CancelToken):
+    """The current filter has searched every key"""
+    if token is self._token:
+      self.done = True
+      self.filtering.emit(False)
+
+
+class Inspector(QWidget):
+  """Inspector is the panel holding the filter and the table of the data
+  of the main window. The table is refreshed when the window loads new
+  data and after saving."""
+
+  filterDelay = 150
+
+  def __init__(self, main):
+    QWidget.__init__(self, main.baseWidget)
+    self.main = main
+    self.model = DataModel(main.data, self)
+    self.filterEdit = QLineEdit(self)
+    self.filterEdit.setPlaceholderText('Filter keys')
+    self.filterEdit.setClearButtonEnabled(True)
+    self.countLabel = QLabel(self)
+    self.view = QTableView(self)
+    self.view.setModel(self.model)
+    self.view.setSelectionBehavior(
+      QAbstractItemView.SelectionBehavior.SelectRows)
+    self.view.setWordWrap(False)
+    self.view.verticalHeader().setSectionResizeMode(
+      QHeaderView.ResizeMode.Fixed)
+    self.view.verticalHeader().hide()
+    self.view.horizontalHeader().setStretchLastSection(True)
+    self.view.setHorizontalScrollMode(
+      QAbstractItemView.ScrollMode.ScrollPerPixel)
+    layout = QVBoxLayout(self)
+    layout.setContentsMargins(0, 0, 0, 0)
+    layout.addWidget(self.filterEdit)
+    layout.addWidget(self.view)
+    layout.addWidget(self.countLabel)
+    self.filterTimer = QTimer(self)
+    self.filterTimer.setSingleShot(True)
+    self.filterTimer.setInterval(self.filterDelay)
+    self.filterTimer.timeout.connect(
+      lambda: self.model.setFilter(self.filterEdit.text()))
+    self.filterEdit.textChanged.connect(self.filterTimer.start)
+    self.model.modelReset.connect(self.showCount)
+    self.model.rowsInserted.connect(self.showCount)
+    self.model.filtering.connect(self.showCount)
+    main.modelLoaded.connect(self.refresh)
+    main.saver.saved.connect(self.refresh)
+    self.showCount()
+
+  def refresh(self, *_):
+    """Shows the current data of the main window"""
+    self.model.refresh(self.main.data)
+
+  def showCount(self, *_):
+    """Shows the number of matching keys"""
+    model = self.model
+    self.countLabel.setText('%d of %d keys%s' % (
+      len(model.keys), len(model.source), '' if model.done else ', filtering'))
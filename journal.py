@@ -0,0 +1,161 @@
+"""The journal keeps unsaved changes safe between saves. When enabled on a
+window, the keys changed since the previous flush are read from their
+getters on a timer and appended to a sidecar file next to the document,
+named as the document with the suffix .journal. The cost of a flush
+depends on the edits only, not on the size of the document. Opening a
+document replays its journal on top of the saved data, restoring the
+changes made before a crash. When the journal grows beyond its limit,
+the window saves the document in the background, after which the
+journal is emptied.
+
+Each record in the journal holds the length and crc32 of its payload and
+the stamp of the document, followed by the payload, a pickled dictionary
+of the changed keys. The stamp is the inode and modification time of the
+document when the record was written, both of which change whenever a
+save replaces the document. Records whose stamp differs from the current
+document were written before its latest save and are skipped when
+replaying, as is a record cut short by a crash. The saver empties the
+journal right after replacing the document, and Saver.flush after its
+synchronous write."""
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import zlib
+
+from PySide6.QtCore import QObject, QTimer
+
+_record = struct.Struct('<IIQq')
+
+
+class Journal(QObject):
+  """Journal appends the changes of a main window to the journal of its
+  document. Use the class method replay to read the changes back."""
+
+  suffix = '.journal'
+  compactSize = 4 << 20
+
+  @classmethod
+  def pathOf(cls, fid: str) -> str:
+    """The journal belonging to the document"""
+    return fid + cls.suffix
+
+  @staticmethod
+  def stamp(fid: str) -> tuple:
+    """The inode and modification time of the document, or zeros if it
+    does not exist"""
+    try:
+      stat = os.stat(fid)
+    except OSError:
+      return 0, 0
+    return stat.st_ino, stat.st_mtime_ns
+
+  @classmethod
+  def replay(cls, fid: str) -> dict:
+    """Reads the changes recorded in the journal of the document. Later
+    records replace earlier values of the same key. Records written
+    before the latest save of the document are skipped. Reading stops at
+    the first incomplete or damaged record."""
+    out = {}
+    try:
+      f = open(cls.pathOf(fid), 'rb')
+    except FileNotFoundError:
+      return out
+    stamp = cls.stamp(fid)
+    with f:
+      while True:
+        head = f.read(_record.size)
+        if len(head) < _record.size:
+          break
+        length, crc, *written = _record.unpack(head)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+          break
+        if tuple(written) == stamp:
+          out.update(pickle.loads(payload))
+    return out
+
+  @classmethod
+  def discard(cls, fid: str):
+    """Removes the journal of the document. Safe to call from any
+    thread."""
+    try:
+      os.remove(cls.pathOf(fid))
+    except FileNotFoundError:
+      pass
+
+  def __init__(self, main, interval=5000):
+    QObject.__init__(self, main)
+    self.main = main
+    self.fid = None
+    self._stamp = -1
+    self.timer = QTimer(self)
+    self.timer.setInterval(interval)
+    self.timer.timeout.connect(self.flushChanges)
+
+  def start(self):
+    """Starts the periodic flushes"""
+    self.timer.start()
+
+  def stop(self):
+    """Stops the periodic flushes"""
+    self.timer.stop()
+
+  def size(self) -> int:
+    """The size of the journal in bytes"""
+    try:
+      return os.path.getsize(self.pathOf(self.fid))
+    except (OSError, TypeError):
+      return 0
+
+  def append(self, changes: dict):
+    """Appends a record of the changes, stamped with the current document,
+    and syncs it to the disk"""
+    payload = pickle.dumps(changes, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(self.pathOf(self.fid), 'ab') as f:
+      f.write(_record.pack(len(payload), zlib.crc32(payload),
+                           *self.stamp(self.fid)))
+      f.write(payload)
+      f.flush()
+      os.fsync(f.fileno())
+
+  def flushChanges(self) -> int:
+    """Appends the keys changed since the previous flush. Documents
+    without a file name are skipped. Returns the number of keys written.
+    Starts a background save of the document when the journal has grown
+    beyond compactSize."""
+    main = self.main
+    if main.requireFileName or not main.dataFilePath:
+      return 0
+    if main.dataFilePath != self.fid:
+      self.reset()
+      self.fid = main.dataFilePath
+    stamp = main.dirty.stamp
+    keys = main.dirty.changedSince(self._stamp)
+    self._stamp = stamp
+    if not keys:
+      return 0
+    self.append({key: main.getters[key]() for key in keys})
+    if self.size() > self.compactSize and not main.saver.busy:
+      self.compact()
+    return len(keys)
+
+  def compact(self):
+    """Saves the document in the background. The journal is emptied when
+    the saver reports the document as saved."""
+    self.main.saver.save(self.main.dataFilePath, self.main.snapshotData)
+
+  def documentSaved(self, fid: str, *_):
+    """Writes the keys still changed again with the next flush once the
+    document has been saved. The saver has emptied the journal already,
+    and records written since are kept."""
+    if fid == self.fid:
+      self._stamp = -1
+
+  def reset(self):
+    """Removes the journal. Keys still changed are written again by the
+    next flush."""
+    self._stamp = -1
+    if self.fid is not None:
+      self.discard(self.fid)
@@ -0,0 +1,285 @@
+"""The keymap simplifies the handling of key presses. Keys are bound to
+methods of the window in a keymap, either the global keymap shared by
+every window or the keymap of a single window, and a binding may be a
+chord of several key presses, such as 'Ctrl+K, Ctrl+D'. The key press
+events of a window are fed to its KeyDispatcher, which calls the bound
+method once the last key of a binding is pressed.
+
+The bindings are compiled into a trie, whose nodes are dictionaries from
+the combined modifiers and key of a press to the next node or to the
+binding. A key press is a single dictionary lookup from the current node,
+so dispatching takes constant time whatever the number of bindings, and
+creates no containers. The trie is rebuilt on the next key press after
+any keymap changes. A chord is abandoned when its next key does not
+arrive within timeout seconds of the monotonic clock.
+
+Bindings of the window take precedence over global bindings, and within a
+keymap a binding takes precedence over longer bindings it starts. The
+bindings losing out are reported by conflicts, along with bindings
+holding a key press taken by the shortcut of a command or action. Qt
+handles that press before it reaches the window, such that the binding
+can never complete, and binding such keys to a window raises
+ValueError."""
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QKeyEvent, QKeySequence
+
+_modifierMask = (Qt.KeyboardModifier.ControlModifier.value |
+                 Qt.KeyboardModifier.ShiftModifier.value |
+                 Qt.KeyboardModifier.AltModifier.value |
+                 Qt.KeyboardModifier.MetaModifier.value)
+
+_modifierKeys = frozenset(key.value for key in (
+  Qt.Key.Key_Control, Qt.Key.Key_Shift, Qt.Key.Key_Alt, Qt.Key.Key_Meta,
+  Qt.Key.Key_AltGr, Qt.Key.Key_CapsLock, Qt.Key.Key_unknown))
+
+
+def parse(keys: str) -> tuple:
+  """The combined modifiers and key of each press of the keys, given in
+  the portable text format of QKeySequence"""
+  sequence = QKeySequence(keys)
+  out = tuple(sequence[i].toCombined() for i in range(sequence.count()))
+  if not out:
+    raise ValueError('Invalid key sequence %r!' % keys)
+  return out
+
+
+def describe(sequence: tuple) -> str:
+  """The portable text of the presses"""
+  return QKeySequence(*sequence).toString()
+
+
+class Binding:
+  """Binding ties a sequence of key presses to a slot, which is either the
+  name of a method of the window or a callable taking the window."""
+
+  __slots__ = ('sequence', 'slot', 'name', 'scope')
+
+  def __init__(self, sequence: tuple, slot: any, name: str, scope: str):
+    self.sequence = sequence
+    self.slot = slot
+    self.name = name
+    self.scope = scope
+
+  @property
+  def keys(self) -> str:
+    """The portable text of the key presses"""
+    return describe(self.sequence)
+
+  def __repr__(self) -> str:
+    return 'Binding(%r, %r, scope=%r)' % (self.keys, self.name, self.scope)
+
+
+class KeyMap:
+  """KeyMap holds the bindings of a scope. Use the class method globalMap
+  for the bindings shared by every window."""
+
+  _global = None
+
+  changes = 0
+
+  @classmethod
+  def globalMap(cls) -> KeyMap:
+    """The keymap shared by every window"""
+    if cls._global is None:
+      cls._global = cls('global')
+    return cls._global
+
+  def __init__(self, scope: str):
+    self.scope = scope
+    self.bindings = {}
+
+  def __len__(self) -> int:
+    return len(self.bindings)
+
+  def bind(self, keys: str, slot: any, name=None) -> Binding:
+    """Binds the keys to the slot, replacing any binding of the same
+    keys in this keymap"""
+    sequence = parse(keys)
+    if name is None:
+      name = slot if isinstance(slot, str) else getattr(slot, '__name__',
+                                                        'slot')
+    out = self.bindings[sequence] = Binding(sequence, slot, name,
+                                            self.scope)
+    KeyMap.changes += 1
+    return out
+
+  def unbind(self, keys: str):
+    """Removes the binding of the keys from this keymap"""
+    if self.bindings.pop(parse(keys), None) is not None:
+      KeyMap.changes += 1
+
+  def clear(self):
+    """Removes every binding of this keymap"""
+    if self.bindings:
+      self.bindings = {}
+      KeyMap.changes += 1
+
+
+class KeyDispatcher:
+  """KeyDispatcher calls the bindings of the window and the global
+  bindings as their keys are pressed. The bindings of the window are kept
+  in local."""
+
+  timeout = 1.5
+
+  def __init__(self, main):
+    self.main = main
+    self.local = KeyMap('window')
+    self.dispatched = 0
+    self._root = {}
+    self._node = self._root
+    self._deadline = 0.
+    self._conflicts = []
+    self._changes = -1
+
+  def compile(self):
+    """Builds the trie of the bindings, window bindings first and shorter
+    bindings first within each keymap"""
+    root = {}
+    conflicts = []
+    for keymap in (self.local, KeyMap.globalMap()):
+      for sequence in sorted(keymap.bindings, key=len):
+        binding = keymap.bindings[sequence]
+        node = root
+        for code in sequence[:-1]:
+          child = node.setdefault(code, {})
+          if isinstance(child, Binding):
+            conflicts.append((binding, child))
+            break
+          node = child
+        else:
+          other = node.get(sequence[-1])
+          if other is None:
+            node[sequence[-1]] = binding
+          else:
+            conflicts.append((binding, other if isinstance(
+              other, Binding) else self._first(other)))
+    self._root = self._node = root
+    self._conflicts = conflicts
+    self._changes = KeyMap.changes
+
+  @staticmethod
+  def _first(node: dict) -> Binding:
+    """A binding reached from the node"""
+    while not isinstance(node, Binding):
+      node = next(iter(node.values()))
+    return node
+
+  def dispatch(self, event: QKeyEvent) -> bool:
+    """Advances the chord by the key press, calling the binding it
+    completes. Returns False if the key is not bound, such that the event
+    may be passed on."""
+    key = event.key()
+    if key in _modifierKeys:
+      return False
+    if self._changes != KeyMap.changes:
+      self.compile()
+    code = key | (event.modifiers().value & _modifierMask)
+    node = self._node
+    self._node = root = self._root
+    if node is not root and time.monotonic() > self._deadline:
+      node = root
+    child = node.get(code)
+    if child is None and node is not root:
+      child = root.get(code)
+    if child is None:
+      return False
+    if type(child) is dict:
+      self._node = child
+      self._deadline = time.monotonic() + self.timeout
+      return True
+    self.dispatched += 1
+    slot = child.slot
+    if type(slot) is str:
+      getattr(self.main, slot)()
+    else:
+      slot(self.main)
+    return True
+
+  @property
+  def pending(self) -> bool:
+    """Flag indicating that a chord is in progress"""
+    return self._node is not self._root and \
+      time.monotonic() <= self._deadline
+
+  def reset(self):
+    """Abandons the chord in progress"""
+    self._node = self._root
+
+  def effective(self) -> list:
+    """The bindings reached by some key presses, ordered by keys"""
+    if self._changes != KeyMap.changes:
+      self.compile()
+    out = []
+    nodes = [self._root]
+    while nodes:
+      for child in nodes.pop().values():
+        if isinstance(child, Binding):
+          out.append(child)
+        else:
+          nodes.append(child)
+    return sorted(out, key=lambda binding: binding.sequence)
+
+  def dump(self) -> str:
+    """The effective keymap as text, one binding per line"""
+    return '\n'.join('%-24s %-8s %s' % (binding.keys, binding.scope,
+                                        binding.name)
+                     for binding in self.effective())
+
+  def shortcuts(self, commands=None) -> list:
+    """The pairs of the key presses of each shortcut Qt handles in the
+    window and the command or action owning it. Commands default to
+    those of the resources of the window, and the shortcuts of the other
+    actions of the window follow."""
+    from PySide6.QtGui import QAction
+    if commands is None:
+      commands = self.main.resources.commands.values()
+    out = [(parse(command.shortcut), command) for command in commands
+           if command.shortcut]
+    seen = {shortcut for (shortcut, _) in out}
+    actions = dict.fromkeys(self.main.actions() +
+                            self.main.findChildren(QAction))
+    for action in actions:
+      for sequence in action.shortcuts():
+        shortcut = tuple(sequence[i].toCombined()
+                         for i in range(sequence.count()))
+        if shortcut and shortcut not in seen:
+          seen.add(shortcut)
+          out.append((shortcut, action))
+    return out
+
+  @staticmethod
+  def clashes(sequence: tuple, shortcut: tuple) -> bool:
+    """Flag indicating that the shortcut takes a key press of the
+    sequence. Qt takes the first key of a shortcut wherever it is
+    pressed, also while waiting for the rest of a longer shortcut."""
+    return shortcut[0] in sequence
+
+  def conflicts(self, commands=None) -> list:
+    """The pairs of bindings losing out and the binding, command or
+    action taking precedence. Commands default to those of the resources
+    of the window."""
+    if self._changes != KeyMap.changes:
+      self.compile()
+    out = list(self._conflicts)
+    shortcuts = self.shortcuts(commands)
+    for binding in self.effective():
+      out.extend((binding, owner) for (shortcut, owner) in shortcuts
+                 if self.clashes(binding.sequence, shortcut))
+    return out
+
+  def bind(self, keys: str, slot: Callable | str, name=None) -> Binding:
+    """Binds the keys in the keymap of the window. Raises ValueError if a
+    shortcut of the window takes any of the key presses."""
+    sequence = parse(keys)
+    for (shortcut, owner) in self.shortcuts():
+      if self.clashes(sequence, shortcut):
+        name = owner.id if hasattr(owner, 'id') else owner.text()
+        raise ValueError('%s is taken by the shortcut %s of %s!' % (
+          keys, describe(shortcut), name))
+    return self.local.bind(keys, slot, name)
@@ -1,14 +1,32 @@
 """The main file runs the code imported from other files. """
 from __future__ import annotations
 
+import os
 import sys
 
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QApplication
 
+from icons import IconRegistry
 from mainwindow import MainWindow
+from profiler import FirstPaint, LatencyProfiler, ProfiledApplication
 
 if __name__ == "__main__":
-  app = QApplication(sys.argv)
+  if LatencyProfiler.enabled():
+    app = ProfiledApplication(sys.argv)
+  else:
+    app = QApplication(sys.argv)
+  IconRegistry.instance().preload()
   widget = MainWindow('QtYnotPy')
+  if os.environ.get('QTYNOTPY_STARTUP'):
+    def firstPaint(t: float):
+      """Reports the first paint and quits once it is done"""
+      print('firstPaint %.6f' % t, flush=True)
+      QTimer.singleShot(0, app.quit)
+    FirstPaint(widget, firstPaint)
   widget.show()
-  sys.exit(app.exec())
+  code = app.exec()
+  target = os.environ.get('QTYNOTPY_PROFILE', '')
+  if LatencyProfiler.enabled() and target.lower().endswith(('.json', '.csv')):
+    LatencyProfiler.instance().export(target)
+  sys.exit(code)
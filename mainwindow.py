@@ -2,12 +2,9 @@
 look like. """
 
 from PySide6.QtWidgets import QLabel, QLineEdit
-from icecream import ic
 
 from basewindow import BaseWindow
 
-ic.configureOutput(includeContext=True)
-
 
 class MainWindow(BaseWindow):
   """Inherits from BaseWindow class"""
@@ -19,13 +16,7 @@ class MainWindow(BaseWindow):
     self.label.setText('Hello World!')
     self.lineEdit = QLineEdit(self)
     self.lineEdit.setPlaceholderText('Test line edit')
-    self.data = {'text': None}
-    self.getters = {
-      'text': self.lineEdit.text
-    }
-    self.setters = {
-      'text': self.lineEdit.setText
-    }
+    self.bind('text', self.lineEdit, 'text', str, '')
 
   def setupWidgets(self):
     """Reimplementation of setupWidgets"""
@@ -1,81 +1,149 @@
 """The menu subclass of QMenu is used by the menubar class."""
-from PySide6.QtGui import QIcon, QPixmap
+import os
+import time
+
+from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QMenu
 
+from icons import IconRegistry
+from recentfiles import RecentFiles
+from resources import AppResources
+
 
 class Menu(QMenu):
   """The menu bar uses this class to create the files, edit and other
   members of the menubar"""
 
   @staticmethod
-  def getIcon(key):
-    iconFromFile = lambda fid: QIcon(QPixmap(fid))
-    Icons = {
-      'save': iconFromFile('./icons/filesave.png'),
-      'open': iconFromFile('./icons/fileopen.png'),
-      'new': iconFromFile('./icons/filenew.png'),
-      'docs': iconFromFile('./icons/docs.png'),
-      'props': iconFromFile('./icons/props.png'),
-      'qt': iconFromFile('./icons/qt.png'),
-    }
-    return Icons[key]
+  def getIcon(key) -> QIcon:
+    """Returns the icon of the key from the shared icon registry"""
+    return IconRegistry.instance().icon(key)
 
   @classmethod
-  def files(cls, main):
-    """Class method creating a file menu containing items like new, save,
-    save as and open actions configured as appropriate to the parent base
-    window."""
+  def files(cls, main=None):
+    """Class method creating a file menu containing the shared new, save,
+    save as and open actions and the recent files. Without a main
+    window, the menu is shared by every window, and its actions reach
+    the active window."""
+    resources = AppResources.instance()
     out = cls(main)
     out.setTitle('Files')
     out.setStatusTip('Files')
     out.setToolTip('Files')
     out.setWhatsThis('Files')
-    main.saveAction = out.addAction(cls.getIcon('save'), 'Save')
-    main.saveAsAction = out.addAction(cls.getIcon('save'), 'Save As')
-    main.newAction = out.addAction(cls.getIcon('new'), 'New')
-    main.openAction = out.addAction(cls.getIcon('open'), 'Open')
-    main.addAction(main.saveAction)
-    main.addAction(main.saveAsAction)
-    main.addAction(main.newAction)
-    main.addAction(main.openAction)
+    out.addAction(resources.action('save'))
+    out.addAction(resources.action('saveAs'))
+    out.addAction(resources.action('new'))
+    out.addAction(resources.action('open'))
+    out.recentMenu = RecentMenu(main)
+    out.addMenu(out.recentMenu)
     return out
 
   @classmethod
-  def edit(cls, main):
+  def edit(cls, main=None):
     """Edit menu."""
     out = cls(main)
     out.setTitle('Edit')
     out.setStatusTip('Edit')
     out.setToolTip('Edit')
     out.setWhatsThis('Edit')
-    main.propAction = out.addAction(cls.getIcon('props'), 'Properties')
-    main.addAction(main.propAction)
+    out.addAction(AppResources.instance().action('props'))
+    out.addAction(AppResources.instance().action('palette'))
     return out
 
   @classmethod
-  def help(cls, main):
+  def help(cls, main=None):
     """The help menu"""
     out = cls(main)
     out.setTitle('Help')
     out.setStatusTip('Help')
     out.setToolTip('Help')
     out.setWhatsThis('Help')
-    main.docAction = out.addAction(cls.getIcon('docs'), 'Documentation')
-    main.addAction(main.docAction)
+    out.addAction(AppResources.instance().action('docs'))
     return out
 
   @classmethod
-  def about(cls, main):
+  def about(cls, main=None):
     """The about menu"""
     out = cls(main)
     out.setTitle('About')
     out.setStatusTip('About')
     out.setToolTip('About')
     out.setWhatsThis('About')
-    main.aboutQtAction = out.addAction(cls.getIcon('qt'), 'About Qt')
-    main.addAction(main.aboutQtAction)
+    out.addAction(AppResources.instance().action('aboutQt'))
     return out
 
-  def __init__(self, main):
+  def __init__(self, main=None):
     QMenu.__init__(self)
     self.main = main
+
+
+class RecentMenu(Menu):
+  """The submenu of the recent files. The entries are created from the
+  recent files in memory when the menu is about to show, after checking
+  the files by os.stat. Choosing an entry opens the file directly."""
+
+  def __init__(self, main=None):
+    Menu.__init__(self, main)
+    self.setTitle('Recent')
+    self.setIcon(self.getIcon('open'))
+    self.setStatusTip('Recent files')
+    self.setToolTip('Recent files')
+    self.setWhatsThis('Recent files')
+    self.generation = None
+    self.aboutToShow.connect(self.populate)
+
+  def open(self, fid: str):
+    """Opens the file in the main window of the menu or, if the menu is
+    shared, in the active window"""
+    main = self.main
+    if main is None:
+      main = AppResources.instance().window()
+    if main is not None:
+      main.openFunc(fid)
+
+  @staticmethod
+  def describe(entry: dict) -> str:
+    """The tool tip of the entry"""
+    summary = entry.get('summary') or {}
+    lines = [entry['path']]
+    if entry.get('missing'):
+      lines.append('File not found')
+    else:
+      lines.append('%.1f kB, modified %s' % (
+        entry['size'] / 1024,
+        time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['mtime']))))
+    if 'title' in summary:
+      lines.append(summary['title'])
+    if summary.get('legacy'):
+      lines.append('Saved by an earlier version')
+    elif 'count' in summary:
+      lines.append('%d keys: %s' % (summary['count'],
+                                    ', '.join(summary['keys'])))
+    return '\n'.join(lines)
+
+  def populate(self):
+    """Creates the entries unless they are up to date"""
+    recent = RecentFiles.instance()
+    recent.validate()
+    if self.generation == recent.generation:
+      return
+    self.generation = recent.generation
+    self.clear()
+    for (i, entry) in enumerate(recent):
+      summary = entry.get('summary') or {}
+      text = '&%d %s' % ((i + 1) % 10, os.path.basename(entry['path']))
+      if 'title' in summary:
+        text = '%s - %s' % (text, summary['title'])
+      action = self.addAction(text)
+      action.setToolTip(self.describe(entry))
+      action.setStatusTip(entry['path'])
+      action.setEnabled(not entry.get('missing'))
+      action.triggered.connect(
+        lambda *_, path=entry['path']: self.open(path))
+    self.setToolTipsVisible(True)
+    if recent:
+      self.addSeparator()
+    clear = self.addAction('Clear Recent Files')
+    clear.setEnabled(bool(len(recent)))
+    clear.triggered.connect(recent.clear)
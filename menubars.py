@@ -1,7 +1,7 @@
 """This class provides for the menubars and actions"""
 from PySide6.QtWidgets import QMenuBar
 
-from menu import Menu
+from resources import AppResources
 
 
 class MenuBar(QMenuBar):
@@ -10,12 +10,14 @@ class MenuBar(QMenuBar):
 
   @classmethod
   def Basic(cls, main):
-    """Creates a basic menu bar using basic menus"""
+    """Creates a basic menu bar holding the shared basic menus. The shared
+    actions are added to the window as well, such that their shortcuts
+    work in it."""
+    resources = AppResources.instance()
     out = cls(main)
-    out.addMenu(Menu.files(main))
-    out.addMenu(Menu.edit(main))
-    out.addMenu(Menu.help(main))
-    out.addMenu(Menu.about(main))
+    for name in ('files', 'edit', 'help', 'about'):
+      out.addMenu(resources.menu(name))
+    main.addActions(resources.actions())
     return out
 
   def __init__(self, main):
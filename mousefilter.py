@@ -1,14 +1,90 @@
 """The mouse filter provides a simplification of the handling of mouse
-click events. """
+click events. The press, release, double click and move events of a
+window are fed to its ClickEvent, which recognizes clicks, double clicks,
+long presses and drags and calls the matching methods on the window.
+Every event is recorded in a fixed size history of click records. The
+records are allocated once and overwritten in turn, and recognizing a
+gesture takes constant time per event. Times are taken from the
+monotonic clock, which is unaffected by changes to the wall clock."""
 from __future__ import annotations
 
 import time
 
-from PySide6.QtCore import QEvent
+from PySide6.QtCore import QEvent, Qt, QTimer
 from PySide6.QtGui import QMouseEvent
-from icecream import ic
+from PySide6.QtWidgets import QApplication
 
-ic.configureOutput(includeContext=True)
+PRESS = 1
+RELEASE = 2
+DOUBLE_CLICK = 3
+MOVE = 4
+
+_kinds = {
+  QEvent.Type.MouseButtonPress: PRESS,
+  QEvent.Type.MouseButtonRelease: RELEASE,
+  QEvent.Type.MouseButtonDblClick: DOUBLE_CLICK,
+  QEvent.Type.MouseMove: MOVE,
+}
+
+
+class ClickRecord:
+  """ClickRecord holds a single mouse event. The kind is one of PRESS,
+  RELEASE, DOUBLE_CLICK and MOVE, and the button is the Qt.MouseButton
+  flag as an integer."""
+
+  __slots__ = ('kind', 'button', 'x', 'y', 'time')
+
+  def __init__(self):
+    self.kind = 0
+    self.button = 0
+    self.x = 0.
+    self.y = 0.
+    self.time = 0.
+
+  def __repr__(self) -> str:
+    return 'ClickRecord(kind=%d, button=%d, x=%s, y=%s, time=%s)' % (
+      self.kind, self.button, self.x, self.y, self.time)
+
+
+class ClickHistory:
+  """ClickHistory is a ring buffer of the most recent click records.
+  Recording overwrites the oldest record in place."""
+
+  __slots__ = ('_records', '_size', '_next', '_count')
+
+  def __init__(self, size=64):
+    self._records = [ClickRecord() for _ in range(size)]
+    self._size = size
+    self._next = 0
+    self._count = 0
+
+  def record(self, kind: int, button: int, x: float, y: float,
+             t: float) -> ClickRecord:
+    """Overwrites the oldest record and returns it"""
+    out = self._records[self._next]
+    out.kind = kind
+    out.button = button
+    out.x = x
+    out.y = y
+    out.time = t
+    self._next = (self._next + 1) % self._size
+    if self._count < self._size:
+      self._count += 1
+    return out
+
+  def __len__(self) -> int:
+    return self._count
+
+  def __getitem__(self, i: int) -> ClickRecord:
+    """The record i places back, with 0 being the latest"""
+    if not 0 <= i < self._count:
+      raise IndexError('history holds %d records' % self._count)
+    return self._records[(self._next - 1 - i) % self._size]
+
+  def __iter__(self):
+    """Iterates from the latest record to the oldest"""
+    for i in range(self._count):
+      yield self[i]
 
 
 class ClickEvent:
@@ -18,12 +94,26 @@ class ClickEvent:
   mouse release event occurs before the time has run out, the instance
   created by the most recent mouse click is transmitted to it. Thus,
   each instance of ClickEvent should belong to a mainwindow constantly
-  being updated with mouse interaction. """
+  being updated with mouse interaction.
+  The main window receives singleClick for a release within timeLimit
+  seconds of the press, doubleClick for a double click, longPress once a
+  button has been held for longPressTime seconds without moving, and
+  dragMove and dragRelease while and after moving the mouse further than
+  the drag distance of the application with a button held."""
 
-  def __init__(self, main):
+  IDLE = 0
+  PRESSED = 1
+  LONG_PRESSED = 2
+  DRAGGING = 3
+  DOUBLE_CLICKED = 4
+
+  def __init__(self, main, historySize=64):
     self.main = main
-    self._active = 0
-    self.beginTime = 0
+    self.history = ClickHistory(historySize)
+    self.state = self.IDLE
+    self.longPressTime = 0.6
+    self.beginTime = 0.
+    self.button = 0
     self.left = False
     self.middle = False
     self.right = False
@@ -35,30 +125,82 @@ class ClickEvent:
     self.yRelease = None
     self.xDoubleClick = None
     self.yDoubleClick = None
+    self.x = None
+    self.y = None
+    self._longPressTimer = None
+
+  def _startLongPress(self):
+    """Restarts the single shot timer firing the long press"""
+    if self._longPressTimer is None:
+      self._longPressTimer = QTimer()
+      self._longPressTimer.setSingleShot(True)
+      self._longPressTimer.timeout.connect(self._longPress)
+    self._longPressTimer.start(int(self.longPressTime * 1000))
+
+  def _stopLongPress(self):
+    """Stops the long press timer"""
+    if self._longPressTimer is not None:
+      self._longPressTimer.stop()
+
+  def _longPress(self):
+    """The button has been held without moving"""
+    if self.state == self.PRESSED:
+      self.state = self.LONG_PRESSED
+      self.main.longPress(self)
 
   def __call__(self, event: QMouseEvent):
     """The call method extract the desired information from the
-    QMouseEvent. """
-    if event.type() == QEvent.MouseButtonPress:
-      self.beginTime = time.time()
-      self.left = event.button() == 0
-      self.middle = event.button() == 1
-      self.right = event.button() == 2
-      self.forward = event.button() == 3
-      self.backward = event.button() == 4
-      self.xPress = event.globalPosition().x()
-      self.yPress = event.globalPosition().y()
-    if event.type() == QEvent.MouseButtonDblClick:
-      self.xDoubleClick = event.globalPosition().x()
-      self.yDoubleClick = event.globalPosition().y()
-    if event.type() == QEvent.MouseButtonRelease:
-      self.xRelease = event.globalPosition().x()
-      self.yRelease = event.globalPosition().y()
+    QMouseEvent and advances the recognizer. """
+    kind = _kinds.get(event.type())
+    if kind is None:
+      return
+    now = time.monotonic()
+    pos = event.globalPosition()
+    x, y = pos.x(), pos.y()
+    button = event.button().value
+    self.history.record(kind, button, x, y, now)
+    self.x, self.y = x, y
+    if kind == PRESS:
+      self.beginTime = now
+      self.button = button
+      self.left = button == Qt.MouseButton.LeftButton.value
+      self.middle = button == Qt.MouseButton.MiddleButton.value
+      self.right = button == Qt.MouseButton.RightButton.value
+      self.forward = button == Qt.MouseButton.ForwardButton.value
+      self.backward = button == Qt.MouseButton.BackButton.value
+      self.xPress = x
+      self.yPress = y
+      self.state = self.PRESSED
+      self._startLongPress()
+    elif kind == MOVE:
+      if self.state == self.DRAGGING:
+        self.main.dragMove(self)
+      elif self.state in (self.PRESSED, self.LONG_PRESSED):
+        distance = abs(x - self.xPress) + abs(y - self.yPress)
+        if distance >= QApplication.startDragDistance():
+          self._stopLongPress()
+          self.state = self.DRAGGING
+          self.main.dragMove(self)
+    elif kind == DOUBLE_CLICK:
+      self._stopLongPress()
+      self.xDoubleClick = x
+      self.yDoubleClick = y
+      self.state = self.DOUBLE_CLICKED
+      self.main.doubleClick(self)
+    elif kind == RELEASE:
+      self._stopLongPress()
+      self.xRelease = x
+      self.yRelease = y
+      state, self.state = self.state, self.IDLE
+      if state == self.DRAGGING:
+        self.main.dragRelease(self)
+      elif state == self.PRESSED and self.active:
+        self.main.singleClick(self)
 
   @property
   def active(self):
     """Denotes whether or not the key released in time"""
-    return time.time() - self.beginTime < self.main.timeLimit
+    return time.monotonic() - self.beginTime < self.main.timeLimit
 
   @active.setter
   def active(self, *_):
@@ -66,6 +208,9 @@ class ClickEvent:
 
   def reset(self):
     """Resets the current values"""
+    self._stopLongPress()
+    self.state = self.IDLE
+    self.button = 0
     self.left = False
     self.middle = False
     self.right = False
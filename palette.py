@@ -0,0 +1,259 @@
+"""The command palette finds registered commands by typing part of their
+text or category. The commands are indexed as they are registered, so a
+search never scans the commands. Each word of a command is split into its
+trigrams, and the index maps each trigram to the commands holding it,
+along with each word prefix of up to three letters. Terms of up to three
+letters are answered by these tables alone. Longer terms intersect the
+commands of their trigrams and confirm the candidates by a substring
+test.
+When few commands contain a term, commands sharing most of its trigrams
+are found as well, which tolerates small typing errors.
+
+Matches at the start of a word rank above matches inside words, which
+rank above approximate matches. The matches are kept as sets by score,
+so only the commands of the lowest score shown are ordered among
+themselves: the commands run recently first, then the shorter texts."""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from itertools import islice
+
+from PySide6.QtCore import QEvent, QObject, QPoint, Qt
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import QApplication, QLineEdit, QListWidget, \
+  QListWidgetItem, QVBoxLayout, QWidget
+
+_words = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+
+_none = frozenset()
+
+
+class CommandIndex:
+  """CommandIndex finds the ids of the commands matching a search text"""
+
+  fuzziness = .6
+  fuzzyBelow = 20
+  recentSize = 100
+
+  def __init__(self):
+    self.texts = {}
+    self.lengths = {}
+    self._grams = {}
+    self._prefixes = {}
+    self._recent = {}
+    self._uses = 0
+
+  def __len__(self) -> int:
+    return len(self.texts)
+
+  @staticmethod
+  def words(*texts: str) -> list:
+    """The lower case words of the texts, splitting camel case"""
+    return [word.lower() for text in texts for word in _words.findall(text)]
+
+  @staticmethod
+  def _keys(words: list) -> tuple:
+    """The trigrams and the prefixes of up to three letters of the
+    words"""
+    grams = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+    prefixes = {word[:n] for word in words for n in (1, 2, 3)
+                if len(word) >= n}
+    return grams, prefixes
+
+  def add(self, id_: str, text: str, category=''):
+    """Indexes the command by its text, category and id"""
+    if id_ in self.texts:
+      self.remove(id_)
+    words = self.words(text, category, id_)
+    self.texts[id_] = ' ' + ' '.join(words)
+    self.lengths[id_] = len(text)
+    grams, prefixes = self._keys(words)
+    for gram in grams:
+      self._grams.setdefault(gram, set()).add(id_)
+    for prefix in prefixes:
+      self._prefixes.setdefault(prefix, set()).add(id_)
+
+  def remove(self, id_: str):
+    """Removes the command from the index"""
+    text = self.texts.pop(id_, None)
+    self.lengths.pop(id_, None)
+    self._recent.pop(id_, None)
+    if text is None:
+      return
+    grams, prefixes = self._keys(text.split())
+    for (table, keys) in ((self._grams, grams), (self._prefixes, prefixes)):
+      for key in keys:
+        ids = table.get(key)
+        if ids is not None:
+          ids.discard(id_)
+          if not ids:
+            del table[key]
+
+  def used(self, id_: str):
+    """Records that the command ran, which ranks it higher"""
+    if id_ in self.texts:
+      self._uses += 1
+      self._recent.pop(id_, None)
+      self._recent[id_] = self._uses
+      if len(self._recent) > self.recentSize:
+        del self._recent[next(iter(self._recent))]
+
+  def _match(self, term: str) -> dict:
+    """The commands matching the term as sets by score. The sets may be
+    those of the index and must not be changed."""
+    if len(term) < 3:
+      return {3.: self._prefixes.get(term, _none)}
+    starts = self._prefixes.get(term[:3], _none)
+    if len(term) == 3:
+      return {3.: starts, 2.: self._grams.get(term, _none) - starts}
+    grams = {term[i:i + 3] for i in range(len(term) - 2)}
+    sets = sorted((self._grams.get(gram, _none) for gram in grams), key=len)
+    out = {3.: set(), 2.: set()}
+    if sets[0]:
+      texts = self.texts
+      word = ' ' + term
+      for id_ in sets[0].intersection(*sets[1:]):
+        if id_ in starts and word in texts[id_]:
+          out[3.].add(id_)
+        elif term in texts[id_]:
+          out[2.].add(id_)
+    found = len(out[3.]) + len(out[2.])
+    if found < self.fuzzyBelow:
+      #  A command holding need of the trigrams is in one of the smallest
+      #  len(sets) - need + 1 sets
+      need = max(2, math.ceil(len(grams) * self.fuzziness))
+      for id_ in _none.union(*sets[:len(sets) - need + 1]):
+        if id_ not in out[3.] and id_ not in out[2.]:
+          count = sum(id_ in ids for ids in sets)
+          if count >= need:
+            out.setdefault(count / len(sets), set()).add(id_)
+    return out
+
+  def _ranked(self, ids: set, limit: int) -> list:
+    """At most limit of the ids of equal score, recent and short first"""
+    recent = self._recent
+    out = sorted((id_ for id_ in recent if id_ in ids), key=recent.get,
+                 reverse=True)[:limit]
+    if len(out) < limit:
+      rest = ids.difference(out) if out else ids
+      out += heapq.nsmallest(limit - len(out), rest,
+                             key=self.lengths.__getitem__)
+    return out
+
+  def search(self, text: str, limit=20) -> list:
+    """The ids of at most limit commands matching every word of the text,
+    best first. An empty text lists the recent commands first."""
+    terms = text.lower().split()
+    recent = self._recent
+    if not terms:
+      out = heapq.nlargest(limit, recent, key=recent.get)
+      rest = (id_ for id_ in self.texts if id_ not in recent)
+      return out + list(islice(rest, limit - len(out)))
+    scores = None
+    for term in terms:
+      matched = self._match(term)
+      if scores is None:
+        scores = matched
+      else:
+        merged = {}
+        for (score, ids) in scores.items():
+          for (other, otherIds) in matched.items():
+            both = ids & otherIds
+            if both:
+              merged.setdefault(score + other, set()).update(both)
+        scores = merged
+    out = []
+    for score in sorted(scores, reverse=True):
+      if scores[score]:
+        out += self._ranked(scores[score], limit - len(out))
+        if len(out) >= limit:
+          break
+    return out
+
+
+class CommandPalette(QWidget):
+  """CommandPalette is the popup listing the commands matching the text
+  typed into it. Enter runs the selected command in the main window."""
+
+  limit = 50
+
+  def __init__(self, main):
+    QWidget.__init__(self, main, Qt.WindowType.Popup)
+    self.main = main
+    self.resources = main.resources
+    self.lineEdit = QLineEdit(self)
+    self.lineEdit.setPlaceholderText('Type a command')
+    self.listWidget = QListWidget(self)
+    self.listWidget.setUniformItemSizes(True)
+    layout = QVBoxLayout(self)
+    layout.setContentsMargins(4, 4, 4, 4)
+    layout.addWidget(self.lineEdit)
+    layout.addWidget(self.listWidget)
+    self.lineEdit.textChanged.connect(self.search)
+    self.lineEdit.returnPressed.connect(self.runCurrent)
+    self.listWidget.itemActivated.connect(self.runItem)
+    self.lineEdit.installEventFilter(self)
+
+  def popup(self):
+    """Shows the palette at the top of the main window, listing the
+    recent commands"""
+    main = self.main
+    width = max(main.width() // 2, 320)
+    self.resize(width, 320)
+    self.move(main.mapToGlobal(QPoint((main.width() - width) // 2,
+                                      main.menuBar().height())))
+    self.lineEdit.blockSignals(True)
+    self.lineEdit.clear()
+    self.lineEdit.blockSignals(False)
+    self.search('')
+    self.show()
+    self.lineEdit.setFocus()
+
+  def search(self, text: str):
+    """Lists the commands matching the text. The items of the list are
+    reused, and those not needed are hidden."""
+    commands = self.resources.commands
+    listWidget = self.listWidget
+    ids = self.resources.index.search(text, self.limit)
+    for (row, id_) in enumerate(ids):
+      command = commands[id_]
+      label = '%s: %s' % (command.category, command.text)
+      if command.shortcut:
+        label = '%s\t%s' % (label, command.shortcut)
+      item = listWidget.item(row)
+      if item is None:
+        item = QListWidgetItem(listWidget)
+      elif item.data(Qt.ItemDataRole.UserRole) == id_:
+        item.setHidden(False)
+        continue
+      item.setText(label)
+      item.setData(Qt.ItemDataRole.UserRole, id_)
+      item.setIcon(self.resources.icon(command.icon) if command.icon
+                   else QIcon())
+      item.setHidden(False)
+    for row in range(len(ids), listWidget.count()):
+      listWidget.item(row).setHidden(True)
+    if ids:
+      listWidget.setCurrentRow(0)
+
+  def eventFilter(self, obj: QObject, event: QEvent) -> bool:
+    """Moves through the list with the arrow keys while typing"""
+    if event.type() == QEvent.Type.KeyPress and event.key() in (
+        Qt.Key.Key_Up, Qt.Key.Key_Down, Qt.Key.Key_PageUp,
+        Qt.Key.Key_PageDown):
+      QApplication.sendEvent(self.listWidget, event)
+      return True
+    return False
+
+  def runCurrent(self):
+    """Runs the selected command"""
+    item = self.listWidget.currentItem()
+    if item is not None:
+      self.runItem(item)
+
+  def runItem(self, item: QListWidgetItem):
+    """Closes the palette and runs the command of the item"""
+    self.hide()
+    self.resources.run(item.data(Qt.ItemDataRole.UserRole), self.main)
@@ -0,0 +1,243 @@
+"""The latency profiler records how long the event loop spends on each
+event and in each handler of the windows. It is opt-in: set the
+environment variable QTYNOTPY_PROFILE to enable it before the application
+starts, or call LatencyProfiler.enable. Events are timed by
+ProfiledApplication, which reimplements QApplication.notify, and the
+event handlers and slots of each BaseWindow are wrapped when the window
+is created. Latencies are collected in histograms with one bucket per
+power of two microseconds, so recording takes constant time and memory.
+Any dispatch taking longer than the budget is kept in a bounded list of
+slow dispatches. The data may be exported as JSON or CSV. If
+QTYNOTPY_PROFILE names a .json or .csv file, main.py exports to it on
+exit.
+
+FirstPaint reports the moment a widget is first painted. Setting the
+environment variable QTYNOTPY_STARTUP makes main.py print the time of the
+first paint of its window and quit, which the startup benchmark uses to
+measure the time to first paint."""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from collections import deque
+from functools import wraps
+
+from PySide6.QtCore import QEvent, QObject
+from PySide6.QtWidgets import QApplication
+
+
+class LatencyHistogram:
+  """LatencyHistogram counts latencies in buckets, with bucket i holding
+  latencies below 2**i microseconds."""
+
+  __slots__ = ('buckets', 'count', 'total', 'max')
+
+  def __init__(self):
+    self.buckets = [0] * 40
+    self.count = 0
+    self.total = 0
+    self.max = 0
+
+  def record(self, ns: int):
+    """Records a latency in nanoseconds"""
+    self.buckets[min((ns // 1000).bit_length(), 39)] += 1
+    self.count += 1
+    self.total += ns
+    if ns > self.max:
+      self.max = ns
+
+  def percentile(self, p: float) -> float:
+    """The upper bound in seconds of the bucket holding the percentile"""
+    target = p * self.count
+    seen = 0
+    for (i, n) in enumerate(self.buckets):
+      seen += n
+      if n and seen >= target:
+        return (1 << i) * 1e-6
+    return 0.
+
+  def summary(self) -> dict:
+    """Count, mean, percentiles and maximum in seconds"""
+    return {'count': self.count,
+            'mean': self.total / max(self.count, 1) * 1e-9,
+            'p50': self.percentile(.5),
+            'p99': self.percentile(.99),
+            'max': self.max * 1e-9}
+
+
+class LatencyProfiler:
+  """Use the class method instance to access the profiler of the
+  application. Events are recorded under 'event:' followed by the name of
+  the event type, and handlers under the name of the window class and the
+  handler."""
+
+  _instance = None
+  _enabled = bool(os.environ.get('QTYNOTPY_PROFILE'))
+
+  handlers = [
+    'event', 'showEvent', 'closeEvent', 'mousePressEvent',
+    'mouseReleaseEvent', 'mouseMoveEvent', 'mouseDoubleClickEvent',
+    'keyPressEvent', 'preSetup', 'setupWidgets', 'setupActions',
+    'postSetup', 'saveFunc', 'saveAsFunc', 'openFunc', 'newFunc',
+    'applyValuesFromData', 'saveChangesToData', 'singleClick',
+    'doubleClick',
+  ]
+
+  @classmethod
+  def instance(cls) -> LatencyProfiler:
+    """The process-wide profiler"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  @classmethod
+  def enabled(cls) -> bool:
+    """Flag indicating that windows should be instrumented"""
+    return cls._enabled
+
+  @classmethod
+  def enable(cls, budget=None) -> LatencyProfiler:
+    """Enables profiling of windows created from now on"""
+    cls._enabled = True
+    out = cls.instance()
+    if budget is not None:
+      out.budget = budget
+    return out
+
+  def __init__(self, budget=0.016, keep=256):
+    self.budget = budget
+    self.histograms = {}
+    self.slow = deque(maxlen=keep)
+    self._eventNames = {}
+
+  def record(self, name: str, ns: int):
+    """Records the latency of the named dispatch in nanoseconds"""
+    histogram = self.histograms.get(name)
+    if histogram is None:
+      histogram = self.histograms[name] = LatencyHistogram()
+    histogram.record(ns)
+    if ns > self.budget * 1e9:
+      self.slow.append((time.time(), name, ns * 1e-9))
+
+  def recordEvent(self, eventType: QEvent.Type, ns: int):
+    """Records the latency of an event of the given type"""
+    name = self._eventNames.get(eventType)
+    if name is None:
+      try:
+        name = 'event:%s' % QEvent.Type(eventType).name
+      except ValueError:
+        name = 'event:%d' % int(eventType)
+      self._eventNames[eventType] = name
+    self.record(name, ns)
+
+  def wrap(self, name: str, func):
+    """Returns func timed under the name"""
+    record = self.record
+    clock = time.perf_counter_ns
+
+    @wraps(func)
+    def timed(*args, **kwargs):
+      """Calls the wrapped function and records its latency"""
+      start = clock()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        record(name, clock() - start)
+
+    return timed
+
+  def instrument(self, window, handlers=None):
+    """Wraps the named handlers of the window, by default those listed in
+    handlers. Must be called before the window is built, since slots are
+    connected while building. Handlers replaced on the window afterwards
+    must be instrumented again."""
+    prefix = type(window).__name__
+    for handler in self.handlers if handlers is None else handlers:
+      func = getattr(window, handler, None)
+      if callable(func):
+        setattr(window, handler, self.wrap(
+          '%s.%s' % (prefix, handler), func))
+
+  def summary(self) -> dict:
+    """The summaries of every histogram by name"""
+    return {name: histogram.summary()
+            for (name, histogram) in sorted(self.histograms.items())}
+
+  def statusText(self) -> str:
+    """A single line summary for the status bar"""
+    events = [h for (name, h) in self.histograms.items()
+              if name.startswith('event:')]
+    count = sum(h.count for h in events)
+    worst = max((h.max for h in events), default=0) * 1e-6
+    return 'events: %d, max %.1f ms, %d over %.0f ms' % (
+      count, worst, len(self.slow), self.budget * 1e3)
+
+  def toJson(self, fid: str):
+    """Writes the summaries, histograms and slow dispatches as JSON"""
+    data = {'budget': self.budget,
+            'summary': self.summary(),
+            'buckets': {name: histogram.buckets
+                        for (name, histogram) in self.histograms.items()},
+            'slow': [{'time': t, 'name': name, 'latency': latency}
+                     for (t, name, latency) in self.slow]}
+    with open(fid, 'w') as f:
+      json.dump(data, f, indent=2)
+
+  def toCsv(self, fid: str):
+    """Writes one row per histogram with its summary"""
+    fields = ['name', 'count', 'mean', 'p50', 'p99', 'max']
+    with open(fid, 'w', newline='') as f:
+      writer = csv.DictWriter(f, fieldnames=fields)
+      writer.writeheader()
+      for (name, summary) in self.summary().items():
+        writer.writerow(dict(summary, name=name))
+
+  def export(self, fid: str):
+    """Writes CSV to files ending in .csv and JSON to any other file"""
+    if fid.lower().endswith('.csv'):
+      return self.toCsv(fid)
+    return self.toJson(fid)
+
+  def reset(self):
+    """Forgets every recorded latency"""
+    self.histograms = {}
+    self.slow.clear()
+
+
+class ProfiledApplication(QApplication):
+  """ProfiledApplication times the delivery of every event. Use it in
+  place of QApplication when profiling."""
+
+  def __init__(self, *args):
+    QApplication.__init__(self, *args)
+    self.profiler = LatencyProfiler.enable()
+
+  def notify(self, receiver, event: QEvent) -> bool:
+    """Delivers the event and records the time it took"""
+    eventType = event.type()
+    start = time.perf_counter_ns()
+    try:
+      return QApplication.notify(self, receiver, event)
+    finally:
+      self.profiler.recordEvent(eventType, time.perf_counter_ns() - start)
+
+
+class FirstPaint(QObject):
+  """FirstPaint calls the callback with the wall clock time of the first
+  paint event of the widget, after which it removes itself."""
+
+  def __init__(self, widget, callback):
+    QObject.__init__(self, widget)
+    self.callback = callback
+    self.time = None
+    widget.installEventFilter(self)
+
+  def eventFilter(self, watched, event: QEvent) -> bool:
+    """Catches the first paint event"""
+    if self.time is None and event.type() == QEvent.Type.Paint:
+      self.time = time.time()
+      watched.removeEventFilter(self)
+      self.callback(self.time)
+    return False
@@ -0,0 +1,171 @@
+"""The recent files are the documents most recently opened or saved by
+the application, most recent first. For each document the index keeps its
+path, size and modification time along with a short summary of its
+contents taken from the index of the document, without reading its
+values. The index is kept in memory and stored as JSON next to the
+settings of the application whenever it changes.
+
+Entries are revalidated by calling os.stat on their files. A file of
+unchanged size and modification time keeps its summary, a changed file
+has its summary taken again and a missing file is marked as missing
+until it reappears."""
+from __future__ import annotations
+
+import json
+import os
+
+from PySide6.QtCore import QObject, Signal
+
+from settings import Settings
+
+Settings.declare('files/recentCount', int, 10)
+
+
+class RecentFiles(QObject):
+  """Use the class method instance to access the recent files of the
+  application. Each entry is a dictionary with the keys path, size, mtime,
+  missing and summary."""
+
+  changed = Signal()
+
+  _instance = None
+
+  titleKeys = ('title', 'name')
+
+  @classmethod
+  def instance(cls) -> RecentFiles:
+    """The recent files of the application"""
+    if cls._instance is None:
+      settings = Settings.instance()
+      folder = os.path.dirname(os.path.abspath(settings.fileName()))
+      cls._instance = cls(os.path.join(folder, 'recent.json'))
+    return cls._instance
+
+  @classmethod
+  def summarize(cls, fid: str) -> dict:
+    """Summarizes the document from its index. Legacy pickle files would
+    have to be read in full and are summarized as legacy only. Damaged
+    files raise whatever unpickling their index raises, which callers
+    treat as a file without summary."""
+    from document import Document
+    if not Document.isDocument(fid):
+      return {'legacy': True}
+    with Document.open(fid) as doc:
+      keys = doc.keys()
+      out = {'count': len(keys), 'keys': keys[:8]}
+      for key in cls.titleKeys:
+        if key in doc and doc.size(key) <= 1024:
+          value = doc.read(key)
+          if isinstance(value, str):
+            out['title'] = value
+            break
+    return out
+
+  def __init__(self, fid: str):
+    QObject.__init__(self)
+    self.fid = fid
+    self.entries = []
+    self.generation = 0
+    try:
+      with open(fid) as f:
+        self.entries = [entry for entry in json.load(f)
+                        if isinstance(entry, dict) and 'path' in entry]
+    except (OSError, ValueError):
+      pass
+
+  @property
+  def maxCount(self) -> int:
+    """The number of entries kept"""
+    return Settings.instance().values['files/recentCount']
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def __iter__(self):
+    return iter(self.entries)
+
+  def add(self, fid: str, summary=None):
+    """Moves the file to the top of the index, summarizing it unless the
+    summary is given"""
+    path = os.path.abspath(fid)
+    try:
+      stat = os.stat(path)
+      summary = self.summarize(path) if summary is None else summary
+    except Exception:
+      return
+    entry = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime,
+             'missing': False, 'summary': summary}
+    self.entries = [entry] + [other for other in self.entries
+                              if other['path'] != path]
+    del self.entries[self.maxCount:]
+    self._changed()
+
+  def remove(self, fid: str):
+    """Removes the file from the index"""
+    path = os.path.abspath(fid)
+    count = len(self.entries)
+    self.entries = [entry for entry in self.entries if entry['path'] != path]
+    if len(self.entries) != count:
+      self._changed()
+
+  def clear(self):
+    """Removes every entry"""
+    if self.entries:
+      self.entries = []
+      self._changed()
+
+  def validate(self) -> bool:
+    """Compares each entry with the file by os.stat. Returns True if any
+    entry changed."""
+    changed = False
+    for entry in self.entries:
+      try:
+        stat = os.stat(entry['path'])
+      except OSError:
+        if not entry.get('missing'):
+          entry['missing'] = True
+          changed = True
+        continue
+      if entry.get('missing') or stat.st_size != entry['size'] or \
+          stat.st_mtime != entry['mtime']:
+        entry['missing'] = False
+        entry['size'] = stat.st_size
+        entry['mtime'] = stat.st_mtime
+        try:
+          entry['summary'] = self.summarize(entry['path'])
+        except Exception:
+          entry['summary'] = {}
+        changed = True
+    if changed:
+      self._changed()
+    return changed
+
+  def _changed(self):
+    """Stores the index and notifies the menus"""
+    self.generation += 1
+    self.store()
+    self.changed.emit()
+
+  def store(self):
+    """Writes the index to its file, replacing the file at once. The
+    index is not written if it fails to serialize, and the temporary file
+    is removed in any case."""
+    import tempfile
+    folder = os.path.dirname(self.fid)
+    try:
+      os.makedirs(folder, exist_ok=True)
+      handle, tempFid = tempfile.mkstemp(suffix='.tmp', dir=folder)
+    except OSError:
+      return
+    try:
+      with os.fdopen(handle, 'w') as f:
+        json.dump(self.entries, f, indent=1)
+      os.replace(tempFid, self.fid)
+    except (OSError, TypeError, ValueError):
+      pass
+    finally:
+      try:
+        if os.path.exists(tempFid):
+          os.remove(tempFid)
+      except OSError:
+        pass
@@ -0,0 +1,191 @@
+"""The resources of the application are shared by every window. Each
+action of the menus exists once, along with the menus holding them, and
+every window adds the same menus to its own menu bar. An action triggered
+from any window is dispatched to the window the user is working in, the
+active window, which calls the method connected to the action with
+connectAction. File dialogs and icons are pooled by FileDialog and
+IconRegistry, and are reached through the resources as well.
+
+The actions are registered as commands, each with an id, text, icon key,
+shortcut, category and the method of the window it calls. Registering a
+command is cheap and creates no QAction; the action of a command is
+created when first asked for, by a menu, by running the command or
+because the command has a shortcut. The registered commands are indexed
+for the command palette as they are registered."""
+from __future__ import annotations
+
+import weakref
+from functools import partial
+
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QApplication
+
+from icons import IconRegistry
+from palette import CommandIndex
+
+
+class Command:
+  """Command describes a registered action. The slot is either the name
+  of the method of the window called by the command or a callable taking
+  the window."""
+
+  __slots__ = ('id', 'text', 'icon', 'shortcut', 'category', 'slot')
+
+  def __init__(self, id_: str, text: str, icon=None, shortcut=None,
+               category='General', slot=None):
+    self.id = id_
+    self.text = text
+    self.icon = icon
+    self.shortcut = shortcut
+    self.category = category
+    self.slot = slot
+
+  def __repr__(self) -> str:
+    return 'Command(%r)' % self.id
+
+
+class AppResources:
+  """Use the class method instance to access the resources of the
+  application. The basic commands give the text, icon, shortcut and
+  category of each shared action and the method of the window it
+  triggers by default."""
+
+  _instance = None
+
+  basicCommands = [
+    ('save', 'Save', 'save', 'Ctrl+S', 'File', 'saveFunc'),
+    ('saveAs', 'Save As', 'save', 'Ctrl+Shift+S', 'File', 'saveAsFunc'),
+    ('new', 'New', 'new', 'Ctrl+N', 'File', 'newFunc'),
+    ('open', 'Open', 'open', 'Ctrl+O', 'File', 'openFunc'),
+    ('props', 'Properties', 'props', None, 'Edit', 'propFunc'),
+    ('docs', 'Documentation', 'docs', 'F1', 'Help', 'docFunc'),
+    ('aboutQt', 'About Qt', 'qt', None, 'Help', 'aboutQtFunc'),
+    ('palette', 'Command Palette', None, 'Ctrl+Shift+P', 'View',
+     'showCommandPalette'),
+  ]
+
+  @classmethod
+  def instance(cls) -> AppResources:
+    """The resources of the application"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def __init__(self):
+    self.commands = {}
+    self.index = CommandIndex()
+    self._actions = {}
+    self._menus = {}
+    self._current = None
+    for args in self.basicCommands:
+      self.register(*args)
+
+  def register(self, id_: str, text: str, icon=None, shortcut=None,
+               category='General', slot=None) -> Command:
+    """Registers the command, replacing any command of the same id. The
+    action of a command with a shortcut is created at once and added to
+    the open windows."""
+    if id_ in self.commands:
+      self.unregister(id_)
+    out = self.commands[id_] = Command(id_, text, icon, shortcut, category,
+                                      slot)
+    self.index.add(id_, text, category)
+    if shortcut:
+      action = self.action(id_)
+      for widget in QApplication.topLevelWidgets():
+        if hasattr(widget, 'triggerAction'):
+          widget.addAction(action)
+    return out
+
+  def unregister(self, id_: str):
+    """Removes the command and deletes its action"""
+    self.commands.pop(id_, None)
+    self.index.remove(id_)
+    action = self._actions.pop(id_, None)
+    if action is not None:
+      action.deleteLater()
+
+  def action(self, id_: str) -> QAction:
+    """The shared action of the command, created on first use"""
+    out = self._actions.get(id_)
+    if out is None:
+      command = self.commands[id_]
+      out = QAction(command.text)
+      if command.icon:
+        out.setIcon(IconRegistry.instance().icon(command.icon))
+      if command.shortcut:
+        out.setShortcut(command.shortcut)
+      out.setObjectName(id_)
+      out.setStatusTip(command.text)
+      out.setWhatsThis(command.text)
+      out.setToolTip(command.text)
+      out.triggered.connect(partial(self.dispatch, out))
+      self._actions[id_] = out
+    return out
+
+  def actions(self) -> list:
+    """The actions of the commands with shortcuts, which every window
+    adds such that the shortcuts work in it"""
+    return [self.action(command.id) for command in self.commands.values()
+            if command.shortcut]
+
+  def owns(self, action: QAction) -> bool:
+    """Flag indicating that the action is shared"""
+    return self._actions.get(action.objectName()) is action
+
+  def slot(self, action: QAction):
+    """The method name or callable the shared action triggers by
+    default"""
+    command = self.commands.get(action.objectName())
+    return None if command is None else command.slot
+
+  def run(self, id_: str, window=None):
+    """Runs the command in the window, by default the current window"""
+    window = self.window() if window is None else window
+    self.index.used(id_)
+    if window is not None:
+      window.triggerAction(self.action(id_))
+
+  def menu(self, name: str):
+    """The shared menu of the name, one of files, edit, help and about,
+    created on first use"""
+    out = self._menus.get(name)
+    if out is None:
+      from menu import Menu
+      out = self._menus[name] = getattr(Menu, name)()
+    return out
+
+  def activate(self, window):
+    """Records the window as the one the user works in"""
+    self._current = weakref.ref(window)
+
+  def window(self):
+    """The window receiving shared actions. This is the active window if
+    it is a main window, and otherwise the main window most recently
+    activated or shown."""
+    out = QApplication.activeWindow()
+    if out is not None and hasattr(out, 'triggerAction'):
+      return out
+    out = None if self._current is None else self._current()
+    try:
+      if out is not None and out.isVisible():
+        return out
+    except RuntimeError:
+      self._current = None
+    return None
+
+  def dispatch(self, action: QAction, *_):
+    """Passes the triggered shared action to the current window"""
+    window = self.window()
+    self.index.used(action.objectName())
+    if window is not None:
+      window.triggerAction(action)
+
+  def fileDialog(self, mode: str, filters):
+    """Borrows a pooled file dialog, see FileDialog.borrow"""
+    from filedialogs import FileDialog
+    return FileDialog.borrow(mode, filters)
+
+  def icon(self, key: str):
+    """The shared icon of the key"""
+    return IconRegistry.instance().icon(key)
@@ -0,0 +1,138 @@
+"""The saver writes documents on the global thread pool, such that the
+window stays responsive while saving. The data is copied on the GUI
+thread when the save is requested, after which the worker serializes the
+copy and replaces the file atomically. Requesting a save while one is
+running does not start another worker. Instead, the copy is held back
+until the current save finishes, keeping only the latest copy for each
+file. The held save starts from the event loop once the outcome
+of the finished save has been delivered to every receiver.
+
+Each save carries the keys it writes, which are passed along with the
+saved and failed signals, such that a failed save can mark exactly its
+own keys as changed again."""
+from __future__ import annotations
+
+import threading
+from typing import Callable
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+
+class SaveJob(QRunnable):
+  """SaveJob writes a snapshot of the data to the file. Progress and the
+  outcome are reported through the signals of the saver."""
+
+  def __init__(self, saver: Saver, fid: str, data: dict, keys: set):
+    QRunnable.__init__(self)
+    self.saver = saver
+    self.fid = fid
+    self.data = data
+    self.keys = keys
+    self._percent = -1
+
+  def progress(self, done: int, total: int):
+    """Reports progress whenever the percentage changes"""
+    percent = 100 * done // max(total, 1)
+    if percent != self._percent:
+      self._percent = percent
+      self.saver.progress.emit(done, total)
+
+  def run(self):
+    """Writes the data on the worker thread and empties the journal of
+    the file, whose records the data holds"""
+    from document import Document
+    from journal import Journal
+    try:
+      Document.write(self.fid, self.data, self.progress)
+      Journal.discard(self.fid)
+    except Exception as e:
+      self.saver.failed.emit(self.fid, str(e), self.keys)
+    else:
+      self.saver.saved.emit(self.fid, self.keys)
+    finally:
+      self.saver.written.set()
+
+
+class Saver(QObject):
+  """Saver runs the saves of a main window. Call save with the file and
+  a function returning the snapshot of the data along with the set of
+  keys changed since the previous save. The snapshot function is called
+  on the GUI thread when the save is requested, also if the save is held
+  back, such that later changes of the data never end up in it."""
+
+  started = Signal(str)
+  progress = Signal(int, int)
+  saved = Signal(str, object)
+  failed = Signal(str, str, object)
+
+  def __init__(self, main):
+    QObject.__init__(self, main)
+    self.main = main
+    self.written = threading.Event()
+    self.written.set()
+    self._running = False
+    self._pending = {}
+    self.saved.connect(self._finish)
+    self.failed.connect(self._finish)
+
+  @property
+  def busy(self) -> bool:
+    """Flag indicating that a save is running"""
+    return self._running
+
+  @busy.setter
+  def busy(self, *_):
+    raise TypeError('busy is read-only!')
+
+  def save(self, fid: str, snapshot: Callable[[], tuple]) -> bool:
+    """Saves the snapshot to the file. Returns True if the save started
+    and False if it is held back until the running save finishes. A held
+    back save replaces the one held for the same file, taking over its
+    keys."""
+    data, keys = snapshot()
+    if self.busy:
+      if fid in self._pending:
+        keys = keys | self._pending.pop(fid)[1]
+      self._pending[fid] = (data, keys)
+      return False
+    self._start(fid, data, keys)
+    return True
+
+  def _start(self, fid: str, data: dict, keys: set):
+    """Starts writing the data on the thread pool"""
+    self._running = True
+    self.written.clear()
+    self.started.emit(fid)
+    QThreadPool.globalInstance().start(SaveJob(self, fid, data, keys))
+
+  def _finish(self, *_):
+    """Starts the pending save, if any, after the other receivers of the
+    outcome of the finished save"""
+    self._running = False
+    if self._pending:
+      QTimer.singleShot(0, self, self._startPending)
+
+  def _startPending(self):
+    """Starts the oldest pending save unless another save is running"""
+    if self._pending and not self.busy:
+      fid = next(iter(self._pending))
+      self._start(fid, *self._pending.pop(fid))
+
+  def waitForDone(self, timeout=None) -> bool:
+    """Blocks until the running save has written the file. Pending saves
+    are not started while blocking, since they start from the event loop.
+    Returns False on timeout."""
+    return self.written.wait(timeout)
+
+  def flush(self):
+    """Waits for the running save and writes the pending saves on the
+    calling thread, reporting each through the signals like any other
+    save. Used when the window closes or replaces its document."""
+    self.waitForDone()
+    while self._pending:
+      fid = next(iter(self._pending))
+      data, keys = self._pending.pop(fid)
+      self._running = True
+      self.written.clear()
+      self.started.emit(fid)
+      SaveJob(self, fid, data, keys).run()
@@ -0,0 +1,154 @@
+"""The settings of the application are declared with a type and a default
+value and kept in memory. The file holding them is read once, when the
+settings are first used, after which reading a setting is a dictionary
+lookup. Changing a setting updates the memory at once and emits changed,
+while the file is written by a single-shot timer shortly after the last
+change, such that a burst of changes costs a single write. The settings
+are also written when the application quits.
+
+The file is a QSettings ini file in the user scope of the application.
+Setting the environment variable QTYNOTPY_SETTINGS to a file name before
+the application starts stores the settings in that file instead."""
+from __future__ import annotations
+
+import os
+
+from PySide6.QtCore import QByteArray, QCoreApplication, QObject, \
+  QSettings, QTimer, Signal
+
+
+def _coerce(value: any, type_: type) -> any:
+  """Converts a value read by QSettings to the type. The ini format reads
+  numbers and flags back as strings and lists of one item as the item."""
+  if type_ is bool and isinstance(value, str):
+    return value.lower() in ('true', '1', 'yes', 'on')
+  if type_ is list:
+    if isinstance(value, (list, tuple)):
+      return list(value)
+    return [] if value in (None, '') else [value]
+  if type_ is QByteArray and not isinstance(value, QByteArray):
+    return QByteArray(value or b'')
+  return type_(value)
+
+
+class Settings(QObject):
+  """Use the class method instance to access the settings of the
+  application. Settings are read with settings[key] and changed with
+  settings[key] = value. Only declared keys may be used."""
+
+  changed = Signal(str, object)
+
+  _instance = None
+
+  declarations = {
+    'mouse/timeLimit': (float, 1.),
+    'files/filters': (list, ['JPEG image (*.jpg *.jpeg *.jpe)']),
+  }
+
+  writeDelay = 500
+
+  @classmethod
+  def instance(cls) -> Settings:
+    """The settings of the application"""
+    if cls._instance is None:
+      cls._instance = cls(os.environ.get('QTYNOTPY_SETTINGS'))
+    return cls._instance
+
+  @classmethod
+  def declare(cls, key: str, type_: type, default: any):
+    """Declares the key with its type and default value. Declaring a key
+    already present in the loaded settings reads it from the file."""
+    cls.declarations[key] = (type_, default)
+    if cls._instance is not None:
+      cls._instance._load(key)
+
+  def __init__(self, fid=None):
+    QObject.__init__(self)
+    if fid is None:
+      self.store = QSettings(QSettings.Format.IniFormat,
+                             QSettings.Scope.UserScope, 'QtYnotPy',
+                             'QtYnotPy')
+    else:
+      self.store = QSettings(fid, QSettings.Format.IniFormat)
+    self.values = {}
+    self._changed = set()
+    self.writes = 0
+    self.timer = QTimer(self)
+    self.timer.setSingleShot(True)
+    self.timer.setInterval(self.writeDelay)
+    self.timer.timeout.connect(self.sync)
+    app = QCoreApplication.instance()
+    if app is not None:
+      app.aboutToQuit.connect(self.sync)
+    for key in self.declarations:
+      self._load(key)
+
+  def _load(self, key: str):
+    """Reads the key from the file, falling back to its default when
+    missing or of the wrong type"""
+    type_, default = self.declarations[key]
+    value = default
+    if self.store.contains(key):
+      try:
+        value = _coerce(self.store.value(key), type_)
+      except (TypeError, ValueError):
+        pass
+    self.values[key] = value
+
+  def fileName(self) -> str:
+    """The file holding the settings"""
+    return self.store.fileName()
+
+  def __getitem__(self, key: str) -> any:
+    return self.values[key]
+
+  def __setitem__(self, key: str, value: any):
+    self.set(key, value)
+
+  def __contains__(self, key: str) -> bool:
+    return key in self.values
+
+  def get(self, key: str, default=None) -> any:
+    """The value of the key or default if the key is not declared"""
+    return self.values.get(key, default)
+
+  def set(self, key: str, value: any):
+    """Changes the setting in memory and schedules writing it. Emits
+    changed unless the value is unchanged."""
+    if key not in self.declarations:
+      raise KeyError('Setting %s is not declared!' % key)
+    value = _coerce(value, self.declarations[key][0])
+    if self.values.get(key) == value:
+      return
+    self.values[key] = value
+    self._changed.add(key)
+    self.timer.start()
+    self.changed.emit(key, value)
+
+  def reset(self, key: str):
+    """Returns the setting to its default value"""
+    self.set(key, self.declarations[key][1])
+
+  def sync(self):
+    """Writes the changed settings to the file now"""
+    self.timer.stop()
+    if not self._changed:
+      return
+    for key in self._changed:
+      self.store.setValue(key, self.values[key])
+    self._changed = set()
+    self.store.sync()
+    self.writes += 1
+
+  def reload(self):
+    """Reads every setting from the file again, emitting changed for the
+    settings that differ, for example after editing the file by hand.
+    Settings not yet written keep their value in memory."""
+    self.store.sync()
+    for key in self.declarations:
+      if key in self._changed:
+        continue
+      value = self.values.get(key)
+      self._load(key)
+      if self.values[key] != value:
+        self.changed.emit(key, self.values[key])
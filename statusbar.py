@@ -1,17 +1,143 @@
-"""General status bar. """
-from PySide6.QtWidgets import QStatusBar
+"""General status bar. Messages are posted to the status bar through a
+channel rather than shown directly. Each message comes from a named
+source, and only the latest message of each source is kept until the
+status bar is next updated, which happens at most maxRate times per
+second. Among the messages of an update, the one with the highest
+priority is shown, and a message does not replace a visible message of
+higher priority from another source before that message times out. A
+source always replaces its own message. Posting may happen from any
+thread; the status bar itself is only touched on the GUI thread."""
+from __future__ import annotations
+
+import threading
+import time
+
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtWidgets import QLabel, QProgressBar, QStatusBar
 
 
 class StatusBar(QStatusBar):
   """StatusBar inherits from QStatusBar. """
 
+  _wake = Signal()
+
   def __init__(self, main):
     QStatusBar.__init__(self)
     self.main = main
-    self.setStyleSheet("""
-      QStatusBar {
-        background: rgb(63, 63, 63);
-        color: white;
-        border: 1px solid white;
-      }
-    """)
+    self.setAutoFillBackground(True)
+    self.dirtyLabel = QLabel(self)
+    self.addPermanentWidget(self.dirtyLabel)
+    self.busyLabel = QLabel(self)
+    self.addPermanentWidget(self.busyLabel)
+    self.progressBar = QProgressBar(self)
+    self.progressBar.setMaximumWidth(120)
+    self.progressBar.setTextVisible(False)
+    self.progressBar.hide()
+    self.addPermanentWidget(self.progressBar)
+    self.profileLabel = None
+    #  Message channel
+    self.maxRate = 30
+    self._lock = threading.Lock()
+    self._pending = {}
+    self._sequence = 0
+    self._progress = {}
+    self._shownPriority = None
+    self._shownSource = None
+    self._shownUntil = 0.
+    self._lastFlush = 0.
+    self._flushTimer = QTimer(self)
+    self._flushTimer.setSingleShot(True)
+    self._flushTimer.timeout.connect(self.flush)
+    self._wake.connect(self._schedule)
+    self.messageChanged.connect(self._messageChanged)
+
+  def post(self, source: str, text=None, priority=0, timeout=0,
+           progress=None):
+    """Posts a message from the source. Only the latest message of each
+    source is kept until the next update. The text is shown for timeout
+    milliseconds, or until replaced if timeout is 0; None leaves the
+    message unchanged. Progress is either a pair of done and total,
+    which shows the progress bar for the source, or False, which ends the
+    progress of the source. Safe to call from any thread."""
+    with self._lock:
+      self._sequence += 1
+      wake = not self._pending
+      previous = self._pending.get(source)
+      if progress is None and previous is not None:
+        progress = previous[4]
+      if text is None and previous is not None:
+        text, priority, timeout = previous[1:4]
+      self._pending[source] = (self._sequence, text, priority, timeout,
+                               progress)
+    if wake:
+      self._wake.emit()
+
+  def _schedule(self):
+    """Starts the timer of the next update, respecting maxRate"""
+    if self._flushTimer.isActive():
+      return
+    wait = self._lastFlush + 1. / self.maxRate - time.monotonic()
+    self._flushTimer.start(max(int(wait * 1000), 0))
+
+  def _messageChanged(self, text: str):
+    """Any message may replace the message once it is cleared"""
+    if not text:
+      self._shownPriority = None
+      self._shownSource = None
+
+  def flush(self):
+    """Shows the pending messages. Called by the channel at most maxRate
+    times per second."""
+    with self._lock:
+      pending, self._pending = self._pending, {}
+    self._lastFlush = time.monotonic()
+    best = None
+    for (source, (sequence, text, priority, timeout, progress)) in \
+        pending.items():
+      if progress is False:
+        self._progress.pop(source, None)
+      elif progress is not None:
+        self._progress[source] = (sequence, progress)
+      if text is not None and (best is None or (priority, sequence) > (
+          best[1], best[0])):
+        best = (sequence, priority, text, timeout, source)
+    if best is not None:
+      sequence, priority, text, timeout, source = best
+      if self._shownPriority is None or priority >= self._shownPriority \
+          or source == self._shownSource \
+          or self._lastFlush >= self._shownUntil:
+        self._shownPriority = priority
+        self._shownSource = source
+        self._shownUntil = self._lastFlush + timeout / 1000 if timeout \
+          else float('inf')
+        self.showMessage(text, timeout)
+    if self._progress:
+      done, total = max(self._progress.values())[1]
+      self.showProgress(done, total)
+    else:
+      self.hideProgress()
+
+  def showDirtyCount(self, count: int):
+    """Shows the number of fields with unsaved changes"""
+    self.dirtyLabel.setText('%d unsaved' % count if count else '')
+
+  def showBusy(self, count: int):
+    """Shows the number of running tasks"""
+    self.busyLabel.setText('%d running' % count if count else '')
+
+  def showProgress(self, done: int, total: int):
+    """Shows the progress bar at done out of total"""
+    self.progressBar.setMaximum(max(total, 1))
+    self.progressBar.setValue(done)
+    self.progressBar.show()
+
+  def hideProgress(self):
+    """Hides the progress bar"""
+    self.progressBar.hide()
+
+  def showProfile(self, text: str):
+    """Shows the summary of the latency profiler"""
+    if self.profileLabel is None:
+      self.profileLabel = QLabel(self)
+      self.insertPermanentWidget(0, self.profileLabel)
+    self.profileLabel.setText(text)
@@ -0,0 +1,295 @@
+"""Tasks run functions away from the GUI thread. Call submit on a window
+with the function and its arguments, which returns a Task at once. The
+function runs on a thread pool shared by every window or, with
+process=True, on a shared pool of processes for work holding the
+interpreter lock. Connect to the signals of the task to receive its
+progress, result or error on the GUI thread. The signals are emitted by
+the event loop, so connecting right after submit misses nothing.
+
+Functions running on threads may take the keyword arguments token and
+progress, which are then filled in by the task. The token is a
+CancelToken, which the function should check now and then, and progress
+is a callable taking the amount done and the total. Functions running in
+processes take neither, and a cancelled process task is only prevented
+from starting; if already running, its result is discarded.
+
+Closing a window cancels its tasks and waits for the running ones to
+finish."""
+from __future__ import annotations
+
+import inspect
+import os
+import threading
+import time
+import traceback
+import weakref
+from typing import Callable
+
+from PySide6.QtCore import QCoreApplication, QObject, QRunnable, \
+  QThreadPool, Signal
+
+
+class Cancelled(Exception):
+  """Raised by CancelToken.check once the task has been cancelled"""
+
+
+class CancelToken:
+  """CancelToken tells a running function that its task was cancelled"""
+
+  __slots__ = ('_event',)
+
+  def __init__(self):
+    self._event = threading.Event()
+
+  def cancel(self):
+    """Marks the task as cancelled"""
+    self._event.set()
+
+  @property
+  def cancelled(self) -> bool:
+    """Flag indicating that the task was cancelled"""
+    return self._event.is_set()
+
+  def check(self):
+    """Raises Cancelled if the task was cancelled"""
+    if self._event.is_set():
+      raise Cancelled()
+
+
+class Task(QObject):
+  """Task represents a submitted function. Exactly one of result, failed
+  and cancelled is emitted, followed by finished."""
+
+  started = Signal()
+  progress = Signal(int, int)
+  result = Signal(object)
+  failed = Signal(str)
+  cancelled = Signal()
+  finished = Signal()
+
+  _started = Signal()
+  _reported = Signal(int, int)
+  _completed = Signal()
+
+  def __init__(self, name: str, runner: TaskRunner = None):
+    QObject.__init__(self)
+    self.name = name
+    self.runner = runner
+    self.token = CancelToken()
+    self.value = None
+    self.error = None
+    self.future = None
+    self._percent = -1
+    self._done = threading.Event()
+    self._started.connect(self.started)
+    self._reported.connect(self._progressed)
+    self._completed.connect(self._deliver)
+
+  @property
+  def done(self) -> bool:
+    """Flag indicating that the function has returned"""
+    return self._done.is_set()
+
+  def cancel(self):
+    """Asks the function to stop. A process task that has not started is
+    not started at all."""
+    self.token.cancel()
+    if self.future is not None:
+      self.future.cancel()
+
+  def wait(self, timeout=None) -> bool:
+    """Waits for the function to return. Returns False on timeout."""
+    return self._done.wait(timeout)
+
+  def report(self, done: int, total: int):
+    """Reports progress whenever the percentage changes. Called by the
+    function from its thread."""
+    percent = 100 * done // max(total, 1)
+    if percent != self._percent:
+      self._percent = percent
+      self._reported.emit(done, total)
+
+  def complete(self, value=None, error=None):
+    """Records the outcome of the function, which is emitted on the GUI
+    thread. The public signals are only emitted there, such that signals
+    connected after submit returns receive them even if the function
+    finished first."""
+    self.value = value
+    self.error = error
+    self._done.set()
+    self._completed.emit()
+
+  def _progressed(self, done: int, total: int):
+    """Emits progress on the GUI thread"""
+    self.progress.emit(done, total)
+    if self.runner is not None:
+      self.runner.progress.emit(self, done, total)
+
+  def _deliver(self):
+    """Emits the outcome of the function on the GUI thread"""
+    error = self.error
+    if self.token.cancelled or isinstance(error, Cancelled):
+      self.cancelled.emit()
+    elif error is not None:
+      message = ''.join(
+        traceback.format_exception_only(type(error), error)).strip()
+      self.failed.emit(message)
+      if self.runner is not None:
+        self.runner.failed.emit(self, message)
+    else:
+      self.result.emit(self.value)
+    self.finished.emit()
+    if self.runner is not None:
+      self.runner.forget(self)
+
+
+class TaskJob(QRunnable):
+  """TaskJob runs the function of a task on the thread pool"""
+
+  def __init__(self, task: Task, fn: Callable, args: tuple, kwargs: dict):
+    QRunnable.__init__(self)
+    self.task = task
+    self.fn = fn
+    self.args = args
+    self.kwargs = kwargs
+
+  def run(self):
+    """Calls the function on the worker thread"""
+    task = self.task
+    if task.token.cancelled:
+      return task.complete()
+    task._started.emit()
+    try:
+      value = self.fn(*self.args, **self.kwargs)
+    except BaseException as e:
+      task.complete(error=e)
+    else:
+      task.complete(value)
+
+
+_injectedFlags = weakref.WeakKeyDictionary()
+
+
+def _injected(fn: Callable) -> tuple:
+  """Flags indicating that fn takes the token and progress arguments. The
+  flags are cached by the function behind a bound method, held weakly,
+  such that submitting a method does not keep its window alive."""
+  fn = getattr(fn, '__func__', fn)
+  try:
+    return _injectedFlags[fn]
+  except (KeyError, TypeError):
+    pass
+  try:
+    parameters = inspect.signature(fn).parameters
+    out = 'token' in parameters, 'progress' in parameters
+  except (TypeError, ValueError):
+    out = False, False
+  try:
+    _injectedFlags[fn] = out
+  except TypeError:
+    pass
+  return out
+
+
+class TaskRunner(QObject):
+  """TaskRunner keeps track of the tasks of a main window. The thread and
+  process pools are shared by every runner. The signals of the runner
+  repeat the progress, errors and completion of each of its tasks."""
+
+  busyChanged = Signal(int)
+  progress = Signal(object, int, int)
+  failed = Signal(object, str)
+  finished = Signal(object)
+
+  _threadPool = None
+  _processPool = None
+
+  @classmethod
+  def threadPool(cls) -> QThreadPool:
+    """The thread pool shared by the tasks of every window"""
+    if cls._threadPool is None:
+      cls._threadPool = QThreadPool()
+    return cls._threadPool
+
+  @classmethod
+  def processPool(cls):
+    """The process pool shared by the tasks of every window, created on
+    first use"""
+    if cls._processPool is None:
+      from concurrent.futures import ProcessPoolExecutor
+      cls._processPool = ProcessPoolExecutor(max_workers=os.cpu_count())
+      app = QCoreApplication.instance()
+      if app is not None:
+        app.aboutToQuit.connect(cls.shutdownPools)
+    return cls._processPool
+
+  @classmethod
+  def shutdownPools(cls):
+    """Stops the process pool, called when the application quits"""
+    if cls._processPool is not None:
+      cls._processPool.shutdown(wait=False, cancel_futures=True)
+      cls._processPool = None
+
+  def __init__(self, main):
+    QObject.__init__(self, main)
+    self.main = main
+    self.active = set()
+
+  def __len__(self) -> int:
+    return len(self.active)
+
+  def submit(self, fn: Callable, *args, name=None, process=False,
+             **kwargs) -> Task:
+    """Runs fn with the arguments on the thread pool or, if process is
+    set, on the process pool. Returns the task."""
+    task = Task(getattr(fn, '__name__', 'task') if name is None else name,
+                self)
+    self.active.add(task)
+    if process:
+      task.future = self.processPool().submit(fn, *args, **kwargs)
+      task._started.emit()
+      task.future.add_done_callback(lambda future: self._collect(task))
+    else:
+      token, progress = _injected(fn)
+      if token:
+        kwargs['token'] = task.token
+      if progress:
+        kwargs['progress'] = task.report
+      self.threadPool().start(TaskJob(task, fn, args, kwargs))
+    self.busyChanged.emit(len(self.active))
+    return task
+
+  @staticmethod
+  def _collect(task: Task):
+    """Completes a process task from the thread of its future"""
+    future = task.future
+    if future.cancelled():
+      return task.complete()
+    error = future.exception()
+    task.complete(None if error else future.result(), error)
+
+  def forget(self, task: Task):
+    """Forgets the finished task"""
+    if task in self.active:
+      self.active.discard(task)
+      self.finished.emit(task)
+      self.busyChanged.emit(len(self.active))
+
+  def cancelAll(self):
+    """Cancels every task of the window"""
+    for task in list(self.active):
+      task.cancel()
+
+  def drain(self, timeout=5.) -> bool:
+    """Waits up to timeout seconds in total for the running functions to
+    return. Returns False if some are still running."""
+    deadline = time.monotonic() + timeout
+    for task in list(self.active):
+      if not task.wait(max(deadline - time.monotonic(), 0)):
+        return False
+    return True
+
+  def shutdown(self, timeout=5.) -> bool:
+    """Cancels the tasks of the window and waits for them to return"""
+    self.cancelAll()
+    return self.drain(timeout)
@@ -0,0 +1,20 @@
+"""Shared fixtures of the tests. The tests run without a display and keep
+their settings in a temporary file."""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QTYNOTPY_SETTINGS', os.path.join(
+  tempfile.mkdtemp(prefix='qtynotpy-tests-'), 'settings.ini'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+  __file__))))
+
+import pytest
+from PySide6.QtWidgets import QApplication
+
+
+@pytest.fixture(scope='session')
+def app() -> QApplication:
+  """The application shared by the tests"""
+  return QApplication.instance() or QApplication([])
@@ -0,0 +1,33 @@
+"""Tests of the main window life cycle"""
+from PySide6.QtCore import SIGNAL
+
+
+def receivers(main) -> dict:
+  """The number of receivers of the triggered signal of each action of
+  the window"""
+  return {action.objectName(): action.receivers(SIGNAL('triggered(bool)'))
+          for action in main._actionSlots}
+
+
+def testShowCyclesConnectOnce(app):
+  """Hiding and showing the window again, or setting up its actions
+  again, connects no action again, and one trigger of the save action
+  runs saveFunc once."""
+  from mainwindow import MainWindow
+  main = MainWindow()
+  main.show()
+  app.processEvents()
+  before = receivers(main)
+  assert before
+  for _ in range(20):
+    main.hide()
+    app.processEvents()
+    main.show()
+    app.processEvents()
+  main.setupActions()
+  assert receivers(main) == before
+  calls = []
+  main.saveFunc = lambda: calls.append(None)
+  main.saveAction.trigger()
+  assert len(calls) == 1
+  main.close()
@@ -0,0 +1,25 @@
+"""Tests of the key bindings of a window"""
+import pytest
+
+
+def testBindingTakenByShortcut(app):
+  """Qt handles Ctrl+S as the Save shortcut before the window sees the
+  key press, such that a chord holding it never completes."""
+  from basewindow import BaseWindow
+  from keymap import KeyMap
+  main = BaseWindow()
+  with pytest.raises(ValueError):
+    main.bindKey('Ctrl+K, Ctrl+S', 'update')
+  with pytest.raises(ValueError):
+    main.bindKey('Ctrl+S, K', 'update')
+  binding = main.bindKey('Ctrl+K, Ctrl+D', 'update')
+  keymap = KeyMap.globalMap()
+  shadowed = keymap.bind('Ctrl+K, Ctrl+S', 'update')
+  try:
+    conflicts = main.keys.conflicts()
+  finally:
+    keymap.unbind('Ctrl+K, Ctrl+S')
+  owners = [owner for (other, owner) in conflicts if other is shadowed]
+  assert [owner.id for owner in owners] == ['save']
+  assert all(other is not binding for (other, _) in conflicts)
+  main.close()
@@ -0,0 +1,34 @@
+"""Tests of the saves of a main window"""
+import os
+
+from PySide6.QtWidgets import QMessageBox
+
+
+def testHeldSaveKeepsItsDocument(app, tmp_path):
+  """A save held back behind a large one writes the data of the document
+  it was requested for, also when a new document replaces that one
+  before the running save has finished."""
+  from document import Document
+  from mainwindow import MainWindow
+  fid = str(tmp_path / 'a.doc')
+  blob = os.urandom(200 << 20)
+  main = MainWindow()
+  main.data['blob'] = blob
+  main.dataFilePath = fid
+  main.requireFileName = False
+  main.lineEdit.setText('first')
+  assert main.saveFunc()
+  main.lineEdit.setText('edited')
+  main.saveFunc()
+  assert main.saver.busy
+  main.lineEdit.setText('discarded')
+  main.askSaveChanges = lambda: main.maybeSave(
+    QMessageBox.StandardButton.Discard)
+  assert main.newFunc()
+  main.lineEdit.setText('new doc text')
+  main.saver.flush()
+  app.processEvents()
+  data = Document.load(fid)
+  assert data == {'blob': blob, 'text': 'edited'}
+  main.dirty.clear()
+  main.close()
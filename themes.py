@@ -0,0 +1,198 @@
+"""Themes style every window of the application at once. A theme is a set
+of palette colors, optionally with colors for particular classes of
+widgets and with stylesheet rules. It is compiled the first time it is
+used into QPalettes and a single stylesheet, all kept for the rest of the
+session. Applying a theme sets the palettes and the stylesheet on the
+application rather than on individual widgets, such that widgets are
+styled as they are created and no widget carries a stylesheet of its own.
+
+Prefer palettes to rules. Any application stylesheet routes the painting
+of every widget through the stylesheet style, which makes each window
+slower to create and larger, so the themes shipped here use palettes only
+and leave the application stylesheet empty.
+
+The colors of a theme replace those of the palette the application had
+before the first theme was applied, which is the palette of the platform
+unless set otherwise. The classic theme gives no colors of its own and so
+keeps the look of the platform.
+
+Switching themes repolishes every widget once, with the updates of the
+windows suspended until the new palette and stylesheet are both in place.
+The current theme is kept in the setting appearance/theme."""
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QColor, QPalette
+from PySide6.QtWidgets import QApplication
+
+from settings import Settings
+
+Settings.declare('appearance/theme', str, 'classic')
+
+_statusBar = {
+  'Window': '#3f3f3f',
+  'WindowText': '#ffffff',
+}
+
+
+class ThemeEngine(QObject):
+  """Use the class method instance to access the themes of the
+  application. Each theme maps palette roles to colors under 'palette',
+  class names to such maps under 'classes' and selectors to properties
+  under 'rules'."""
+
+  changed = Signal(str)
+
+  _instance = None
+
+  defaultTheme = 'classic'
+
+  themes = {
+    'classic': {
+      'palette': {},
+      'classes': {'QStatusBar': _statusBar},
+      'rules': {},
+    },
+    'dark': {
+      'palette': {
+        'Window': '#353535',
+        'WindowText': '#f0f0f0',
+        'Base': '#2a2a2a',
+        'AlternateBase': '#383838',
+        'ToolTipBase': '#f0f0f0',
+        'ToolTipText': '#2a2a2a',
+        'Text': '#f0f0f0',
+        'Button': '#454545',
+        'ButtonText': '#f0f0f0',
+        'BrightText': '#ff5050',
+        'Highlight': '#2a82da',
+        'HighlightedText': '#ffffff',
+        'PlaceholderText': '#909090',
+      },
+      'classes': {'QStatusBar': {'Window': '#1f1f1f'}},
+      'rules': {},
+    },
+    'light': {
+      'palette': {
+        'Window': '#f5f5f5',
+        'WindowText': '#202020',
+        'Base': '#ffffff',
+        'AlternateBase': '#eeeeee',
+        'Text': '#202020',
+        'Button': '#e8e8e8',
+        'ButtonText': '#202020',
+        'Highlight': '#3070c0',
+        'HighlightedText': '#ffffff',
+      },
+      'classes': {},
+      'rules': {},
+    },
+  }
+
+  @classmethod
+  def instance(cls) -> ThemeEngine:
+    """The themes of the application"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def __init__(self):
+    QObject.__init__(self)
+    self.themes = dict(self.themes)
+    self.current = None
+    self.switches = 0
+    self._base = None
+    self._compiled = {}
+    Settings.instance().changed.connect(self._settingChanged)
+
+  def register(self, name: str, palette=None, classes=None, rules=None):
+    """Adds or replaces the theme. Replacing the current theme applies it
+    again."""
+    self.themes[name] = {'palette': dict(palette or {}),
+                         'classes': dict(classes or {}),
+                         'rules': dict(rules or {})}
+    self._compiled.pop(name, None)
+    if name == self.current:
+      self.current = None
+      self.apply(name)
+
+  def names(self) -> list:
+    """The names of the themes"""
+    return list(self.themes)
+
+  def compile(self, name: str) -> tuple:
+    """The palette, the palettes by class name and the stylesheet of the
+    theme, built on first use"""
+    out = self._compiled.get(name)
+    if out is None:
+      theme = self.themes[name]
+      palette = self._palette(self.basePalette(), theme['palette'])
+      classes = {className: self._palette(palette, colors)
+                 for className, colors in theme['classes'].items()}
+      sheet = '\n'.join('%s { %s }' % (selector, ' '.join(
+        '%s: %s;' % item for item in properties.items()))
+                        for selector, properties in theme['rules'].items())
+      out = self._compiled[name] = (palette, classes, sheet)
+    return out
+
+  def basePalette(self) -> QPalette:
+    """The palette of the application before any theme was applied, which
+    every theme starts from"""
+    if self._base is None:
+      self._base = QPalette(QApplication.palette())
+    return self._base
+
+  @staticmethod
+  def _palette(base: QPalette, colors: dict) -> QPalette:
+    """A copy of the palette with the colors of the roles replaced"""
+    out = QPalette(base)
+    for role, color in colors.items():
+      out.setColor(getattr(QPalette.ColorRole, role), QColor(color))
+    return out
+
+  def install(self):
+    """Applies the theme of the settings unless a theme is applied
+    already. Called by every main window before creating its widgets."""
+    if self.current is None:
+      self.apply(Settings.instance()['appearance/theme'])
+
+  def apply(self, name: str):
+    """Styles the application with the theme, falling back to the default
+    theme for unknown names"""
+    if name not in self.themes:
+      name = self.defaultTheme
+    if name == self.current:
+      return
+    palette, classes, sheet = self.compile(name)
+    app = QApplication.instance()
+    windows = [window for window in app.topLevelWidgets()
+               if window.updatesEnabled()]
+    for window in windows:
+      window.setUpdatesEnabled(False)
+    try:
+      app.setPalette(palette)
+      for className in self._classNames():
+        app.setPalette(classes.get(className, palette), className)
+      if sheet != app.styleSheet():
+        app.setStyleSheet(sheet)
+    finally:
+      for window in windows:
+        window.setUpdatesEnabled(True)
+    self.current = name
+    self.switches += 1
+    self.changed.emit(name)
+
+  def _classNames(self) -> set:
+    """The class names given colors by any theme. Qt keeps the palette of
+    a class until replaced, so switching themes sets each of them."""
+    return {className for theme in self.themes.values()
+            for className in theme['classes']}
+
+  def setTheme(self, name: str):
+    """Switches to the theme and keeps it in the settings"""
+    Settings.instance()['appearance/theme'] = name
+
+  def _settingChanged(self, key: str, value: any):
+    """Applies the theme when its setting changes"""
+    if key == 'appearance/theme' and self.current is not None:
+      self.apply(value)
@@ -0,0 +1,206 @@
+"""The ui cache compiles Qt Designer files to Python modules only when
+needed. Each compiled form is stored as its own module in the cache
+directory under a name made from the form and a hash of the .ui file
+contents together with the uic version. A window created from an
+unchanged .ui file therefore imports the cached module in-process,
+without starting uic at all. Since every form and version has its own
+module, several windows may be created from .ui files at the same time
+without overwriting each other.
+The cache directory defaults to _uicache next to this module. When the
+package is installed where it may not be written, the cache location of
+the application is used instead, and failing that a private temporary
+directory."""
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+
+import PySide6
+
+_here = os.path.dirname(os.path.abspath(__file__))
+
+
+def _writable(folder: str) -> bool:
+  """Creates the folder if needed and checks that it may be written"""
+  try:
+    os.makedirs(folder, exist_ok=True)
+  except OSError:
+    return False
+  return os.access(folder, os.W_OK | os.X_OK)
+
+
+class UiCache:
+  """UiCache maps .ui files to the generated Ui classes. The instance
+  method load returns the class, compiling the file only if no module
+  exists in the cache for the current contents of the file. The class
+  carries the Qt class of the form in formClass. Use the class method
+  instance to access the cache shared by all windows."""
+
+  _instance = None
+
+  @classmethod
+  def instance(cls) -> UiCache:
+    """The process-wide cache"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  @staticmethod
+  def defaultDir() -> str:
+    """The first writable of _uicache next to this module, the
+    qtynotpy-uicache folder in the cache location of the application and
+    a new private temporary directory"""
+    folder = os.path.join(_here, '_uicache')
+    if _writable(folder):
+      return folder
+    from PySide6.QtCore import QStandardPaths
+    folder = os.path.join(QStandardPaths.writableLocation(
+      QStandardPaths.StandardLocation.CacheLocation), 'qtynotpy-uicache')
+    if os.path.isabs(folder) and _writable(folder):
+      return folder
+    import tempfile
+    return tempfile.mkdtemp(prefix='qtynotpy-uicache-')
+
+  def __init__(self, cacheDir=None):
+    self._cacheDir = self.defaultDir() if cacheDir is None else cacheDir
+    self._modules = {}
+    self._uic = None
+    self.compiled = 0
+    self.imported = 0
+
+  @property
+  def cacheDir(self) -> str:
+    """The directory holding the compiled modules"""
+    return self._cacheDir
+
+  @cacheDir.setter
+  def cacheDir(self, *_):
+    raise TypeError('cacheDir should not be set directly!')
+
+  @property
+  def uicVersion(self) -> str:
+    """The uic shipped with PySide6 carries the version of PySide6."""
+    return PySide6.__version__
+
+  @uicVersion.setter
+  def uicVersion(self, *_):
+    raise TypeError('uicVersion is read-only!')
+
+  @staticmethod
+  def formName(source: bytes, uiFid: str) -> str:
+    """The name of the form class as given in the .ui file. Falls back to
+    the capitalized file name."""
+    match = re.search(rb'<class>\s*(\w+)\s*</class>', source)
+    if match:
+      return match.group(1).decode()
+    return os.path.splitext(os.path.basename(uiFid))[0].capitalize()
+
+  @staticmethod
+  def formClass(source: bytes) -> str:
+    """The Qt class of the top level widget of the .ui file, such as
+    QWidget or QMainWindow"""
+    match = re.search(rb'<widget\s+class="(\w+)"', source)
+    return match.group(1).decode() if match else 'QWidget'
+
+  def key(self, source: bytes) -> str:
+    """The hash identifying the contents and the uic version"""
+    digest = hashlib.sha1(source)
+    digest.update(self.uicVersion.encode())
+    return digest.hexdigest()[:16]
+
+  def modulePath(self, uiFid: str, source: bytes) -> str:
+    """The path of the cached module for the given contents"""
+    stem = os.path.splitext(os.path.basename(uiFid))[0].lower()
+    name = 'ui_%s_%s.py' % (stem, self.key(source))
+    return os.path.join(self.cacheDir, name)
+
+  def uicCommand(self) -> list:
+    """Locates the uic executable. The binary shipped inside PySide6 is
+    preferred to the pyside6-uic wrapper script, as the wrapper starts a
+    Python interpreter only to launch the same binary."""
+    if self._uic is None:
+      base = os.path.dirname(PySide6.__file__)
+      for path in [os.path.join(base, 'Qt', 'libexec', 'uic'),
+                   os.path.join(base, 'uic'),
+                   os.path.join(base, 'uic.exe')]:
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+          self._uic = [path, '-g', 'python']
+          break
+      else:
+        import shutil
+        wrapper = shutil.which('pyside6-uic')
+        if wrapper is None:
+          raise FileNotFoundError('Unable to find uic!')
+        self._uic = [wrapper]
+    return self._uic
+
+  def compile(self, uiFid: str, target: str) -> str:
+    """Compiles the .ui file into the target module. The module is
+    written to a temporary file first and then renamed, such that other
+    processes never import a partially written module."""
+    import subprocess
+    import tempfile
+    os.makedirs(self.cacheDir, exist_ok=True)
+    result = subprocess.run(self.uicCommand() + [uiFid],
+                            capture_output=True, check=False)
+    if result.returncode:
+      raise RuntimeError('uic failed on %s: %s' % (
+        uiFid, result.stderr.decode(errors='replace')))
+    handle, tempFid = tempfile.mkstemp(suffix='.tmp', dir=self.cacheDir)
+    with os.fdopen(handle, 'wb') as f:
+      f.write(result.stdout)
+    os.replace(tempFid, target)
+    self.compiled += 1
+    return target
+
+  def load(self, uiFid: str) -> type:
+    """Returns the Ui class generated from the .ui file."""
+    with open(uiFid, 'rb') as f:
+      source = f.read()
+    target = self.modulePath(uiFid, source)
+    if target in self._modules:
+      module = self._modules[target]
+    else:
+      if not os.path.exists(target):
+        self.compile(uiFid, target)
+      moduleName = os.path.splitext(os.path.basename(target))[0]
+      spec = importlib.util.spec_from_file_location(moduleName, target)
+      module = importlib.util.module_from_spec(spec)
+      spec.loader.exec_module(module)
+      sys.modules[moduleName] = module
+      self._modules[target] = module
+      self.imported += 1
+    className = 'Ui_%s' % self.formName(source, uiFid)
+    if not hasattr(module, className):
+      raise Exception('No %s found in %s!' % (className, uiFid))
+    out = getattr(module, className)
+    out.formClass = self.formClass(source)
+    return out
+
+  def release(self, uiClass: type):
+    """Forgets the module of the Ui class, removing it from sys.modules
+    and its compiled file from the cache directory. Called when a reload
+    replaces the class, such that replaced forms do not pile up in memory
+    and on the disk. Windows still showing the form keep the class."""
+    module = sys.modules.get(uiClass.__module__)
+    target = getattr(module, '__file__', None)
+    if target is None or self._modules.get(target) is not module:
+      return
+    del self._modules[target]
+    del sys.modules[uiClass.__module__]
+    for path in (target, importlib.util.cache_from_source(target)):
+      try:
+        os.remove(path)
+      except OSError:
+        pass
+
+  def clear(self, memoryOnly=False):
+    """Forgets the imported modules. Unless memoryOnly is set, the
+    compiled modules are removed from the disk as well."""
+    self._modules = {}
+    if not memoryOnly and os.path.isdir(self.cacheDir):
+      import shutil
+      shutil.rmtree(self.cacheDir)
@@ -0,0 +1,97 @@
+"""The ui watcher reloads windows created from .ui files when the files
+change, without restarting the application. It is active in development
+mode only, which is enabled by setting the environment variable
+QTYNOTPY_DEV before the application starts. Each window created by
+BaseWindow.fromUI is then watched, and saving its .ui file rebuilds the
+form of the window in place, keeping the data of the window.
+
+Editors often save a file several times in a row, or replace it by
+renaming a new file over it, which drops the file from the watch list.
+Changes are therefore collected for delay milliseconds before the windows
+reload, and the directories of the files are watched as well, such that
+replaced files are watched again."""
+from __future__ import annotations
+
+import os
+import weakref
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer, Signal
+
+
+class UiWatcher(QObject):
+  """Use the class method instance to access the watcher of the
+  application. The reloaded signal is emitted with the file name and the
+  number of windows reloaded."""
+
+  reloaded = Signal(str, int)
+
+  _instance = None
+
+  delay = 200
+
+  @staticmethod
+  def enabled() -> bool:
+    """Flag indicating that development mode is on"""
+    return os.environ.get('QTYNOTPY_DEV', '') not in ('', '0')
+
+  @classmethod
+  def instance(cls) -> UiWatcher:
+    """The watcher of the application"""
+    if cls._instance is None:
+      cls._instance = cls()
+    return cls._instance
+
+  def __init__(self):
+    QObject.__init__(self)
+    self.watcher = QFileSystemWatcher(self)
+    self.watcher.fileChanged.connect(self._changed)
+    self.watcher.directoryChanged.connect(self._directoryChanged)
+    self.windows = {}
+    self.reloads = 0
+    self._pending = set()
+    self.timer = QTimer(self)
+    self.timer.setSingleShot(True)
+    self.timer.setInterval(self.delay)
+    self.timer.timeout.connect(self.reload)
+
+  def watch(self, window, uiFid: str):
+    """Reloads the window whenever the .ui file changes"""
+    path = os.path.abspath(uiFid)
+    self.windows.setdefault(path, weakref.WeakSet()).add(window)
+    if path not in self.watcher.files():
+      self.watcher.addPath(path)
+    folder = os.path.dirname(path)
+    if folder not in self.watcher.directories():
+      self.watcher.addPath(folder)
+
+  def unwatch(self, window):
+    """Stops reloading the window"""
+    for windows in self.windows.values():
+      windows.discard(window)
+
+  def _changed(self, path: str):
+    """Collects the changed file until the timer fires"""
+    self._pending.add(path)
+    self.timer.start()
+
+  def _directoryChanged(self, folder: str):
+    """Watches files replaced by renaming again"""
+    files = self.watcher.files()
+    for path in self.windows:
+      if os.path.dirname(path) == folder and path not in files and \
+          os.path.exists(path):
+        self.watcher.addPath(path)
+        self._changed(path)
+
+  def reload(self):
+    """Reloads the windows of the changed files"""
+    pending, self._pending = self._pending, set()
+    for path in pending:
+      if not os.path.exists(path):
+        continue
+      count = 0
+      for window in list(self.windows.get(path, ())):
+        if window.reloadUi():
+          count += 1
+      self.reloads += 1
+      self.reloaded.emit(path, count)